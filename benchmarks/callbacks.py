@@ -0,0 +1,131 @@
+"""Micro-benchmark of the EnergyPlus runner callbacks, generic vs specialized.
+
+With `--api fake`, callbacks are called in a loop against an in-process data exchange whose getters
+return constants, which isolates the Python overhead of the callbacks themselves. With `--api eplus`,
+episodes are simulated with the real E+ runtime and the wall time per env step is reported.
+
+Example:
+
+    python3 benchmarks/callbacks.py --env BBrightEnv --api fake --calls 100000
+    python3 benchmarks/callbacks.py --env BBrightEnv --api eplus --episodes 3
+"""
+import argparse
+import io
+import time
+from contextlib import redirect_stdout
+from queue import Queue
+from tempfile import TemporaryDirectory
+from typing import Dict
+
+from rleplus.env.energyplus import EnergyPlusRunner
+from rleplus.examples.registry import env_creator
+
+
+class FakeDataExchange:
+    """Ready, post-warmup E+ data exchange returning constant values."""
+
+    def api_data_fully_ready(self, state) -> bool:
+        return True
+
+    def warmup_flag(self, state) -> bool:
+        return False
+
+    def get_variable_handle(self, state, *args) -> int:
+        return 1
+
+    def get_meter_handle(self, state, *args) -> int:
+        return 1
+
+    def get_actuator_handle(self, state, *args) -> int:
+        return 1
+
+    def get_variable_value(self, state, handle: int) -> float:
+        return 21.0
+
+    def get_meter_value(self, state, handle: int) -> float:
+        return 1.0
+
+    def system_time_step(self, state) -> float:
+        return 1.0
+
+    def set_actuator_value(self, state, actuator_handle: int, actuator_value: float) -> None:
+        pass
+
+
+def bench_fake(runner_config, calls: int, specialize: bool) -> Dict[str, float]:
+    """Returns the mean cost of each callback, in microseconds."""
+    obs_queue, act_queue = Queue(), Queue()
+    runner = EnergyPlusRunner(episode=0, obs_queue=obs_queue, act_queue=act_queue, runner_config=runner_config)
+    runner.x = FakeDataExchange()
+    # _send_actions sets the heating and cooling setpoint actuators
+    runner.actuators = {"htg_spt": (), "clg_spt": ()}
+    runner.specialize_callbacks = specialize
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        runner.collect_obs_callback(None)
+        obs_queue.get_nowait()
+    collect_obs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        act_queue.put_nowait(20.0)
+        runner.send_actions_callback(None)
+    send_actions = time.perf_counter() - start
+
+    return {"collect_obs": collect_obs / calls * 1e6, "send_actions": send_actions / calls * 1e6}
+
+
+def bench_eplus(env_name: str, episodes: int, specialize: bool) -> float:
+    """Returns the mean wall time of an env step, in microseconds."""
+    with TemporaryDirectory() as output:
+        # set before the first reset: its first post-warmup callback already specializes callbacks
+        env = env_creator(env_name)({"output": output, "seed": 0, "specialize_callbacks": specialize})
+        steps, elapsed = 0, 0.0
+        try:
+            with redirect_stdout(io.StringIO()):
+                for _ in range(episodes):
+                    env.reset()
+                    done = False
+                    start = time.perf_counter()
+                    while not done:
+                        _, _, done, _, _ = env.step(env.action_space.sample())
+                        steps += 1
+                    elapsed += time.perf_counter() - start
+        finally:
+            env.close()
+    return elapsed / steps * 1e6
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--env", default="BBrightEnv", help="The gym environment whose runner config is used")
+    parser.add_argument("--api", choices=["fake", "eplus"], default="fake", help="E+ data exchange to run against")
+    parser.add_argument("--calls", type=int, default=100_000, help="Number of calls of each callback (fake API)")
+    parser.add_argument("--episodes", type=int, default=3, help="Number of episodes (E+ API)")
+    built_args = parser.parse_args()
+    print(f"Running with following CLI args: {built_args}")
+    return built_args
+
+
+def main():
+    args = parse_args()
+
+    if args.api == "fake":
+        with TemporaryDirectory() as output:
+            runner_config = env_creator(args.env)({"output": output}).runner_config
+            for specialize in [False, True]:
+                costs = bench_fake(runner_config, args.calls, specialize)
+                name = "specialized" if specialize else "generic"
+                print(
+                    f"{name:12} collect_obs: {costs['collect_obs']:.2f} us, send_actions: {costs['send_actions']:.2f} us"
+                )
+        return
+
+    for specialize in [False, True]:
+        name = "specialized" if specialize else "generic"
+        print(f"{name:12} {bench_eplus(args.env, args.episodes, specialize):.1f} us per env step")
+
+
+if __name__ == "__main__":
+    main()
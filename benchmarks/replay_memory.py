@@ -0,0 +1,140 @@
+"""Memory footprint of Pearl replay buffers: compact ring arrays vs one object per transition.
+
+Transitions of an E+ environment (observation size, discrete action space and ensemble size of
+`rleplus.train.pearl`) are pushed into a replay buffer, and the growth of the resident memory of the
+process is reported per transition:
+
+- `compact`: `rleplus.train.pearl_replay.CompactBootstrapReplayBuffer`
+- `pearl`: Pearl's `BootstrapReplayBuffer`
+- `tensors`: one object per transition holding the small tensors Pearl's `BootstrapReplayBuffer` stores
+  (states, action, reward, terminated flag, available actions and their masks, bootstrap mask), to
+  estimate its footprint where Pearl isn't installed
+
+Each buffer is measured in its own process.
+
+Example:
+
+    python3 benchmarks/replay_memory.py --transitions 200000
+"""
+import argparse
+import gc
+import inspect
+import multiprocessing as mp
+from types import SimpleNamespace
+from typing import Any, Dict
+
+import torch
+
+from rleplus.env.memory import rss_mb
+
+# observation size of BBrightEnv, actions of AmphitheaterEnv, ensemble size of rleplus.train.pearl
+OBS_SIZE = 9
+NUM_ACTIONS = 100
+ENSEMBLE_SIZE = 10
+
+
+def transition_kwargs(i: int, action_space) -> Dict[str, Any]:
+    # keyword arguments, as pushed by PearlAgent.observe()
+    return dict(
+        state=torch.rand(OBS_SIZE),
+        action=torch.tensor([i % NUM_ACTIONS]),
+        reward=float(i),
+        next_state=torch.rand(OBS_SIZE),
+        curr_available_actions=action_space,
+        next_available_actions=action_space,
+        terminated=False,
+        truncated=False,
+        max_number_actions=NUM_ACTIONS,
+    )
+
+
+class TensorsBuffer:
+    """One object of small tensors per transition, with the shapes of Pearl's BootstrapReplayBuffer."""
+
+    def __init__(self):
+        self.memory = []
+
+    def push(self, state, action, reward, next_state, terminated, **kwargs) -> None:
+        self.memory.append(
+            SimpleNamespace(
+                state=state.reshape(1, -1).clone(),
+                action=action.reshape(1, -1).clone(),
+                reward=torch.tensor([reward]),
+                next_state=next_state.reshape(1, -1).clone(),
+                curr_available_actions=torch.arange(NUM_ACTIONS).reshape(1, NUM_ACTIONS, 1),
+                curr_unavailable_actions_mask=torch.zeros((1, NUM_ACTIONS), dtype=torch.bool),
+                next_available_actions=torch.arange(NUM_ACTIONS).reshape(1, NUM_ACTIONS, 1),
+                next_unavailable_actions_mask=torch.zeros((1, NUM_ACTIONS), dtype=torch.bool),
+                terminated=torch.tensor([terminated]),
+                bootstrap_mask=torch.ones((1, ENSEMBLE_SIZE)),
+            )
+        )
+
+
+def make_buffer(kind: str, capacity: int):
+    if kind == "compact":
+        from rleplus.train.pearl_replay import CompactBootstrapReplayBuffer
+
+        return CompactBootstrapReplayBuffer(capacity, 1.0, ENSEMBLE_SIZE)
+    if kind == "pearl":
+        from pearl.replay_buffers.sequential_decision_making.bootstrap_replay_buffer import (
+            BootstrapReplayBuffer,
+        )
+
+        return BootstrapReplayBuffer(capacity, 1.0, ENSEMBLE_SIZE)
+    return TensorsBuffer()
+
+
+def measure(kind: str, transitions: int) -> float:
+    """Returns the resident memory growth per pushed transition, in bytes."""
+    action_space = SimpleNamespace(actions_batch=torch.arange(NUM_ACTIONS).reshape(NUM_ACTIONS, 1))
+    replay_buffer = make_buffer(kind, transitions)
+    # push arguments of the installed Pearl version
+    accepted = inspect.signature(replay_buffer.push).parameters
+    var_keyword = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in accepted.values())
+
+    gc.collect()
+    before = rss_mb()
+    for i in range(transitions):
+        kwargs = transition_kwargs(i, action_space)
+        replay_buffer.push(**(kwargs if var_keyword else {k: v for k, v in kwargs.items() if k in accepted}))
+    gc.collect()
+    return (rss_mb() - before) * 2**20 / transitions
+
+
+def _measure_in_process(kind: str, transitions: int, results) -> None:
+    results[kind] = measure(kind, transitions)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transitions", type=int, default=200_000, help="Number of pushed transitions")
+    parser.add_argument(
+        "--buffers",
+        nargs="+",
+        choices=["compact", "pearl", "tensors"],
+        default=["compact", "pearl", "tensors"],
+        help="Replay buffers to measure",
+    )
+    built_args = parser.parse_args()
+    print(f"Running with following CLI args: {built_args}")
+    return built_args
+
+
+def main():
+    args = parse_args()
+
+    ctx = mp.get_context("spawn")
+    results = ctx.Manager().dict()
+    for kind in args.buffers:
+        process = ctx.Process(target=_measure_in_process, args=(kind, args.transitions, results))
+        process.start()
+        process.join()
+        if kind in results:
+            print(f"{kind:8} {results[kind]:.0f} bytes per transition")
+        else:
+            print(f"{kind:8} failed (exit code {process.exitcode})")
+
+
+if __name__ == "__main__":
+    main()
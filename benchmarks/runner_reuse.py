@@ -0,0 +1,173 @@
+"""EnergyPlus runner reuse benchmark and soak test.
+
+`overhead` measures the per-reset cost of preparing an E+ state, without running simulations:
+creating a new API instance and state each time (previous behaviour) versus resetting a single state.
+
+`soak` runs many short episodes with a single environment and samples its memory metrics (see
+`rleplus.env.memory`), to check that reusing the runner doesn't leak. It fails if resident memory grows
+by more than `--max-growth-mb` per 1,000 episodes, or if runners, E+ states or threads accumulate.
+
+Example:
+
+    python3 benchmarks/runner_reuse.py overhead --iterations 200
+    python3 benchmarks/runner_reuse.py soak --env BBrightEnv --episodes 10000 --steps 4 --tracemalloc-top 5
+"""
+import argparse
+import time
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from rleplus.env.utils import try_import_energyplus_api
+
+EnergyPlusAPI, _, _ = try_import_energyplus_api()
+
+
+def _noop(state) -> None:
+    pass
+
+
+def _register_callbacks(api, state) -> None:
+    # same callbacks as EnergyPlusRunner
+    api.runtime.callback_progress(state, _noop)
+    api.runtime.callback_end_zone_timestep_after_zone_reporting(state, _noop)
+    api.runtime.callback_after_predictor_after_hvac_managers(state, _noop)
+
+
+def reset_fresh() -> None:
+    api = EnergyPlusAPI()
+    state = api.state_manager.new_state()
+    _register_callbacks(api, state)
+    api.runtime.clear_callbacks()
+    api.state_manager.delete_state(state)
+
+
+def make_reset_reused():
+    api = EnergyPlusAPI()
+    state = api.state_manager.new_state()
+
+    def reset_reused() -> None:
+        api.state_manager.reset_state(state)
+        api.runtime.clear_callbacks()
+        _register_callbacks(api, state)
+
+    return reset_reused
+
+
+def time_per_call(fn, iterations: int) -> Tuple[float, float]:
+    """Returns mean and std of fn() wall time, in milliseconds."""
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return float(np.mean(times)), float(np.std(times))
+
+
+# objects whose number must not grow with episodes
+BOUNDED_COUNTS = ["live_runners", "live_states", "energyplus_threads", "threads"]
+
+
+def soak(
+    env_name: str, episodes: int, steps: int, sample_every: int, tracemalloc_top: int
+) -> List[Tuple[int, Dict[str, float]]]:
+    from rleplus.examples.registry import env_creator
+
+    samples = []
+    with TemporaryDirectory() as output:
+        memory_metrics = {"every": sample_every, "tracemalloc_top": tracemalloc_top, "collect": True}
+        env = env_creator(env_name)({"output": output, "seed": 0, "memory_metrics": memory_metrics})
+        try:
+            for episode in range(episodes):
+                env.reset()
+                for _ in range(steps):
+                    env.step(env.action_space.sample())
+                if episode % sample_every == 0:
+                    samples.append((episode, env.memory_metrics()))
+                    metrics = samples[-1][1]
+                    print(
+                        f"episode {episode}: rss {metrics['rss_mb']:.1f} MB, "
+                        + ", ".join(f"{name} {int(metrics[name])}" for name in BOUNDED_COUNTS)
+                    )
+        finally:
+            env.close()
+    return samples
+
+
+def growth_per_1k_episodes(samples: List[Tuple[int, Dict[str, float]]]) -> Dict[str, float]:
+    """Growth of each metric per 1,000 episodes, fitted on the run after its first tenth (warm-up allocations)."""
+    samples = samples[len(samples) // 10 :]
+    episodes = np.array([episode for episode, _ in samples], dtype=np.float64)
+    if len(samples) < 2:
+        return {}
+    growth = {}
+    for name in samples[-1][1]:
+        values = np.array([metrics.get(name, np.nan) for _, metrics in samples])
+        valid = ~np.isnan(values)
+        if valid.sum() >= 2:
+            growth[name] = float(np.polyfit(episodes[valid], values[valid], 1)[0] * 1000)
+    return growth
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    overhead_parser = subparsers.add_parser("overhead", help="Per-reset overhead, fresh vs reused E+ state")
+    overhead_parser.add_argument("--iterations", type=int, default=200, help="Number of resets to time")
+
+    soak_parser = subparsers.add_parser("soak", help="Memory over many episodes with a reused runner")
+    soak_parser.add_argument("--env", default="BBrightEnv", help="The gym environment to use")
+    soak_parser.add_argument("--episodes", type=int, default=10_000, help="Number of episodes")
+    soak_parser.add_argument("--steps", type=int, default=4, help="Steps per episode")
+    soak_parser.add_argument("--sample-every", type=int, default=100, help="Sample memory every n episodes")
+    soak_parser.add_argument(
+        "--max-growth-mb",
+        type=float,
+        default=5.0,
+        help="Fail if resident memory grows by more than this many MB per 1,000 episodes",
+    )
+    soak_parser.add_argument(
+        "--tracemalloc-top",
+        type=int,
+        default=0,
+        help="Also trace allocations and report the growth of the top N project modules (slows the run down)",
+    )
+
+    built_args = parser.parse_args()
+    print(f"Running with following CLI args: {built_args}")
+    return built_args
+
+
+def main():
+    args = parse_args()
+
+    if args.command == "overhead":
+        fresh = time_per_call(reset_fresh, args.iterations)
+        reused = time_per_call(make_reset_reused(), args.iterations)
+        print(f"fresh API + state: {fresh[0]:.3f} ms ± {fresh[1]:.3f}")
+        print(f"reused state:      {reused[0]:.3f} ms ± {reused[1]:.3f}")
+        print(f"speedup:           {fresh[0] / reused[0]:.1f}x")
+        return
+
+    samples = soak(args.env, args.episodes, args.steps, args.sample_every, args.tracemalloc_top)
+    growth = growth_per_1k_episodes(samples)
+    print("growth per 1,000 episodes:")
+    for name, value in sorted(growth.items()):
+        print(f"  {name}: {value:+.3f}")
+
+    failures = []
+    if growth.get("rss_mb", 0.0) > args.max_growth_mb:
+        failures.append(f"resident memory grew by {growth['rss_mb']:.1f} MB per 1,000 episodes")
+    # after warm-up, e.g. thread pools started on the first episodes
+    first, last = samples[len(samples) // 10][1], samples[-1][1]
+    for name in BOUNDED_COUNTS:
+        if last[name] > first[name]:
+            failures.append(f"{name} grew from {int(first[name])} to {int(last[name])}")
+    if failures:
+        raise SystemExit("Memory leak: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
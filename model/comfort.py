@@ -0,0 +1,253 @@
+import warnings
+from typing import Dict
+
+import numpy as np
+from pythermalcomfort.models import set_tmp
+from pythermalcomfort.utilities import check_standard_compliance_array, valid_range
+
+# ASHRAE 55: above this relative air speed, PMV is computed with the SET-based cooling effect
+STILL_AIR_THRESHOLD = 0.1
+
+
+def pmv_ppd_vectorized(tdb, tr, vr, rh, met, clo, wme=0.0, standard: str = "ISO", limit_inputs: bool = True) -> Dict:
+    """
+    Calculate the Predicted Mean Vote (PMV) and Predicted Percentage of Dissatisfied (PPD) for
+    arrays of conditions, following ISO 7730 or ASHRAE 55.
+
+    All inputs are broadcast against each other, so e.g. a sweep over temperatures and occupants
+    can be done in a single call. Results are identical to `pythermalcomfort.models.pmv_ppd`, but
+    the clothing surface temperature fixed-point iteration runs on whole arrays at once.
+
+    Parameters:
+    - tdb: Dry bulb air temperature, [°C]
+    - tr: Mean radiant temperature, [°C]
+    - vr: Relative air speed, [m/s]
+    - rh: Relative humidity, [%]
+    - met: Metabolic rate, [met]
+    - clo: Dynamic clothing insulation, [clo]
+    - wme: External work, [met]
+    - standard: "ISO" or "ASHRAE". With ASHRAE, the cooling effect of elevated air speed
+      (vr > 0.1 m/s) is applied as per ASHRAE 55 2020 Addendum C.
+    - limit_inputs: if True, returns nan for inputs outside the standard's applicability limits.
+
+    Returns:
+    - dict with "pmv" and "ppd" arrays (rounded to 2 and 1 decimals).
+    """
+    tdb, tr, vr, rh, met, clo, wme = np.broadcast_arrays(
+        *[np.asarray(x, dtype=np.float64) for x in (tdb, tr, vr, rh, met, clo, wme)]
+    )
+
+    standard = standard.lower()
+    if standard not in ["iso", "ashrae"]:
+        raise ValueError("PMV calculations can only be performed in compliance with ISO or ASHRAE Standards")
+
+    tdb_valid, tr_valid, v_valid, met_valid, clo_valid = check_standard_compliance_array(
+        standard, tdb=tdb, tr=tr, v=vr, met=met, clo=clo
+    )
+
+    if standard == "ashrae":
+        ce = cooling_effect_vectorized(tdb, tr, vr, rh, met, clo, wme)
+        tdb, tr = tdb - ce, tr - ce
+        vr = np.where(ce > 0, STILL_AIR_THRESHOLD, vr)
+
+    pmv_array = pmv_vectorized(tdb, tr, vr, rh, met, clo, wme)
+    ppd_array = 100.0 - 95.0 * np.exp(-0.03353 * pmv_array**4.0 - 0.2179 * pmv_array**2.0)
+
+    if limit_inputs:
+        pmv_valid = valid_range(pmv_array, (-100, 100) if standard == "ashrae" else (-2, 2))
+        all_valid = ~(
+            np.isnan(tdb_valid)
+            | np.isnan(tr_valid)
+            | np.isnan(v_valid)
+            | np.isnan(met_valid)
+            | np.isnan(clo_valid)
+            | np.isnan(pmv_valid)
+        )
+        pmv_array = np.where(all_valid, pmv_array, np.nan)
+        ppd_array = np.where(all_valid, ppd_array, np.nan)
+
+    return {"pmv": np.around(pmv_array, 2), "ppd": np.around(ppd_array, 1)}
+
+
+def pmv_vectorized(tdb, tr, vr, rh, met, clo, wme=0.0, max_iterations: int = 150) -> np.ndarray:
+    """
+    Fanger's PMV equation (ISO 7730), unrounded and without applicability checks.
+
+    The clothing surface temperature is solved by fixed-point iteration on all elements at once.
+    Elements are frozen as soon as they converge, so each one goes through exactly the same
+    sequence of updates as in the scalar algorithm.
+    """
+    tdb, tr, vr, rh, met, clo, wme = np.broadcast_arrays(
+        *[np.asarray(x, dtype=np.float64) for x in (tdb, tr, vr, rh, met, clo, wme)]
+    )
+    shape = tdb.shape
+    tdb, tr, vr, rh, met, clo, wme = [x.ravel() for x in (tdb, tr, vr, rh, met, clo, wme)]
+
+    pa = rh * 10 * np.exp(16.6536 - 4030.183 / (tdb + 235))
+
+    icl = 0.155 * clo  # thermal insulation of the clothing in M2K/W
+    m = met * 58.15  # metabolic rate in W/M2
+    w = wme * 58.15  # external work in W/M2
+    mw = m - w  # internal heat production in the human body
+    # ratio of surface clothed body over nude body
+    f_cl = np.where(icl <= 0.078, 1 + 1.29 * icl, 1.05 + 0.645 * icl)
+
+    # heat transfer coefficient by forced convection
+    hcf = 12.1 * np.sqrt(vr)
+    hc = hcf.copy()
+    taa = tdb + 273
+    tra = tr + 273
+    t_cla = taa + (35.5 - tdb) / (3.5 * icl + 0.1)
+
+    p1 = icl * f_cl
+    p2 = p1 * 3.96
+    p3 = p1 * 100
+    p4 = p1 * taa
+    p5 = (308.7 - 0.028 * mw) + (p2 * (tra / 100.0) ** 4)
+    xn = t_cla / 100
+    xf = t_cla / 50
+    eps = 0.00015
+
+    # indices of elements still iterating
+    active = np.flatnonzero(np.abs(xn - xf) > eps)
+    n = 0
+    while active.size > 0:
+        xf[active] = (xf[active] + xn[active]) / 2
+        hcn = 2.38 * np.abs(100.0 * xf[active] - taa[active]) ** 0.25
+        hc[active] = np.maximum(hcf[active], hcn)
+        xn[active] = (p5[active] + p4[active] * hc[active] - p2[active] * xf[active] ** 4) / (
+            100 + p3[active] * hc[active]
+        )
+        active = active[np.abs(xn[active] - xf[active]) > eps]
+        n += 1
+        if n > max_iterations:
+            raise StopIteration("Max iterations exceeded")
+
+    tcl = 100 * xn - 273
+
+    # heat loss diff. through skin
+    hl1 = 3.05 * 0.001 * (5733 - (6.99 * mw) - pa)
+    # heat loss by sweating
+    hl2 = np.where(mw > 58.15, 0.42 * (mw - 58.15), 0.0)
+    # latent respiration heat loss
+    hl3 = 1.7 * 0.00001 * m * (5867 - pa)
+    # dry respiration heat loss
+    hl4 = 0.0014 * m * (34 - tdb)
+    # heat loss by radiation
+    hl5 = 3.96 * f_cl * (xn**4 - (tra / 100.0) ** 4)
+    # heat loss by convection
+    hl6 = f_cl * hc * (tcl - tdb)
+
+    ts = 0.303 * np.exp(-0.036 * m) + 0.028
+    return (ts * (mw - hl1 - hl2 - hl3 - hl4 - hl5 - hl6)).reshape(shape)
+
+
+def cooling_effect_vectorized(tdb, tr, vr, rh, met, clo, wme=0.0) -> np.ndarray:
+    """
+    Cooling Effect (CE) of elevated air speed, as defined by ASHRAE 55 2020, for arrays of conditions.
+
+    CE is the value that, subtracted from both tdb and tr, yields under still air the same SET as
+    under the elevated air speed. It's solved over [0, 40] °C with Brent's method on all elements at
+    once. As in `pythermalcomfort.models.cooling_effect`, CE is 0 for vr <= 0.1 m/s or when no
+    solution exists in that interval, and is rounded to 2 decimals.
+    """
+    tdb, tr, vr, rh, met, clo, wme = np.broadcast_arrays(
+        *[np.asarray(x, dtype=np.float64) for x in (tdb, tr, vr, rh, met, clo, wme)]
+    )
+    ce = np.zeros(tdb.shape)
+    elevated = vr > STILL_AIR_THRESHOLD
+    if not elevated.any():
+        return ce
+
+    tdb, tr, vr, rh, met, clo, wme = [x[elevated] for x in (tdb, tr, vr, rh, met, clo, wme)]
+
+    def _set(idx, t_db, t_r, v):
+        return set_tmp(
+            tdb=t_db,
+            tr=t_r,
+            v=v,
+            rh=rh[idx],
+            met=met[idx],
+            clo=clo[idx],
+            wme=wme[idx],
+            round=False,
+            calculate_ce=True,
+            limit_inputs=False,
+        )
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+
+        all_idx = np.arange(tdb.size)
+        initial_set = _set(all_idx, tdb, tr, vr)
+
+        def _f(x, idx):
+            return _set(idx, tdb[idx] - x, tr[idx] - x, np.full(idx.size, STILL_AIR_THRESHOLD)) - initial_set[idx]
+
+        root = brentq_vectorized(_f, np.zeros(tdb.size), np.full(tdb.size, 40.0))
+
+    ce[elevated] = np.where(np.isnan(root), 0.0, np.around(root, 2))
+    return ce
+
+
+def brentq_vectorized(f, a, b, xtol=2e-12, rtol=4 * np.finfo(float).eps, maxiter=100) -> np.ndarray:
+    """
+    Element-wise Brent's method, following step by step scipy's `optimize.brentq` implementation so
+    that, when several roots are bracketed, the same one is found.
+
+    `f(x, idx)` evaluates the function of elements `idx` at `x`. Elements with no sign change over
+    [a, b], or that don't converge in `maxiter` iterations, are set to nan.
+    """
+    xpre, xcur = np.array(a, dtype=np.float64), np.array(b, dtype=np.float64)
+    all_idx = np.arange(xpre.size)
+    fpre, fcur = f(xpre, all_idx), f(xcur, all_idx)
+
+    root = np.full(xpre.size, np.nan)
+    root = np.where(fcur == 0, xcur, root)
+    root = np.where(fpre == 0, xpre, root)
+    active = (fpre != 0) & (fcur != 0) & (np.signbit(fpre) != np.signbit(fcur))
+
+    xblk, fblk, spre, scur = np.zeros(xpre.size), np.zeros(xpre.size), np.zeros(xpre.size), np.zeros(xpre.size)
+    idx = np.flatnonzero(active)
+    for _ in range(maxiter):
+        if idx.size == 0:
+            break
+        xp, xc, fp, fc = xpre[idx], xcur[idx], fpre[idx], fcur[idx]
+        xb, fb, sp, sc = xblk[idx], fblk[idx], spre[idx], scur[idx]
+
+        bracket = (fp != 0) & (fc != 0) & (np.signbit(fp) != np.signbit(fc))
+        xb, fb = np.where(bracket, xp, xb), np.where(bracket, fp, fb)
+        sp, sc = np.where(bracket, xc - xp, sp), np.where(bracket, xc - xp, sc)
+
+        swap = np.abs(fb) < np.abs(fc)
+        xp, xc, xb = np.where(swap, xc, xp), np.where(swap, xb, xc), np.where(swap, xc, xb)
+        fp, fc, fb = np.where(swap, fc, fp), np.where(swap, fb, fc), np.where(swap, fc, fb)
+
+        delta = (xtol + rtol * np.abs(xc)) / 2
+        sbis = (xb - xc) / 2
+        converged = (fc == 0) | (np.abs(sbis) < delta)
+        root[idx[converged]] = xc[converged]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            interpolate = -fc * (xc - xp) / (fc - fp)
+            dpre = (fp - fc) / (xp - xc)
+            dblk = (fb - fc) / (xb - xc)
+            extrapolate = -fc * (fb * dblk - fp * dpre) / (dblk * dpre * (fb - fp))
+        stry = np.where(xp == xb, interpolate, extrapolate)
+
+        try_step = (np.abs(sp) > delta) & (np.abs(fc) < np.abs(fp))
+        good_step = try_step & (2 * np.abs(stry) < np.minimum(np.abs(sp), 3 * np.abs(sbis) - delta))
+        sp, sc = np.where(good_step, sc, sbis), np.where(good_step, stry, sbis)
+
+        xp, fp = xc, fc
+        xc = xc + np.where(np.abs(sc) > delta, sc, np.where(sbis > 0, delta, -delta))
+
+        # write back the state of elements still iterating, and evaluate them at their new point
+        keep = ~converged
+        idx, xc = idx[keep], xc[keep]
+        xpre[idx], fpre[idx], xcur[idx] = xp[keep], fp[keep], xc
+        xblk[idx], fblk[idx], spre[idx], scur[idx] = xb[keep], fb[keep], sp[keep], sc[keep]
+        if idx.size > 0:
+            fcur[idx] = f(xc, idx)
+
+    return root
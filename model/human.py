@@ -4,6 +4,8 @@ from pythermalcomfort.utilities import v_relative, clo_dynamic
 from pythermalcomfort.utilities import met_typical_tasks
 from pythermalcomfort.utilities import clo_individual_garments
 
+from model.comfort import pmv_ppd_vectorized
+
 
 class Human:
     def __init__(self, icl:float=1.1, met:float=1.4, 
@@ -34,9 +36,11 @@ class Human:
         self.k2 = -2.6 # Steepness parameter for the falling side of the probability curve.
         self.T2 = -1.6 # pmv at which the falling side of the curve transitions from high to low probability.
 
-    def calcpmv(self, tdb: float, tr: float, v: float, rh: float) -> float:
+    def calcpmv(self, tdb, tr, v, rh):
         """
         Calculate the Predicted Mean Vote (PMV) based on the input variables.
+        Inputs can be floats or numpy arrays, which are broadcast against each other. Scalar inputs (one
+        occupant at each step of an episode) use pythermalcomfort's scalar model, faster for a single value.
 
         Parameters:
         - tdb: Dry bulb air temperature, [°C]
@@ -45,12 +49,14 @@ class Human:
         - rh: Relative humidity, [%]
 
         Returns:
-        - pmv: Predicted Mean Vote.
+        - pmv: Predicted Mean Vote, a float for scalar inputs, an array otherwise.
         """
         vr = v_relative(v=v, met=self.met)
         clo = clo_dynamic(clo=self.icl, met=self.met)
-        results = pmv_ppd(tdb=tdb, tr=tr, vr=vr, rh=rh, met=self.met, clo=clo, standard="ASHRAE")
-        return results['pmv']
+        if np.ndim(tdb) == 0 and np.ndim(tr) == 0 and np.ndim(v) == 0 and np.ndim(rh) == 0:
+            return pmv_ppd(tdb=tdb, tr=tr, vr=vr, rh=rh, met=self.met, clo=clo, standard="ASHRAE")["pmv"]
+        pmv = pmv_ppd_vectorized(tdb=tdb, tr=tr, vr=vr, rh=rh, met=self.met, clo=clo, standard="ASHRAE")["pmv"]
+        return float(pmv) if pmv.ndim == 0 else pmv
     
     def temp2pmv(self, min_tdb = 10.0, max_tdb = 40.0, step_tdb = 0.5, tr = 25, v = 0.1, rh =50) -> dict:
         """ Uniformly samples the pmv values varying the temperature
@@ -61,25 +67,20 @@ class Human:
         v: average air speed, [m/s]
         rh: relative humidity, [%]
         """
-        pmvs = {"pmv": [], "tdb": []}
-        vr = v_relative(v=v, met=self.met)
-        clo = clo_dynamic(clo=self.icl, met=self.met)
-        for tdb in np.arange(min_tdb, max_tdb, step_tdb):
-            results = pmv_ppd(tdb=tdb, tr=tr, vr=vr, rh=rh, met=self.met, clo=clo, standard="ASHRAE")
-            pmvs["pmv"].append(results['pmv'])
-            pmvs["tdb"].append(tdb)
-        return pmvs
+        tdb = np.arange(min_tdb, max_tdb, step_tdb)
+        return {"pmv": self.calcpmv(tdb, tr, v, rh), "tdb": tdb}
     
-    def calcprobability(self, pmv: float, ) -> float:
+    def calcprobability(self, pmv):
         """
         Calculate the probability of complaint based on the current pmv.
 
         Parameters:
-        - pmv: Current pmv.
+        - pmv: Current pmv, a float or a numpy array.
 
         Returns:
-        - probability: Probability of complaint.
+        - probability: Probability of complaint, a float for a scalar pmv, an array otherwise.
         """
+        pmv = np.asarray(pmv, dtype=np.float64)
         if self.prob_func == "exp":
             probability = np.exp(self.exp_a * pmv - self.exp_b) + np.exp(-self.exp_c * pmv - self.exp_d)
         elif self.prob_func == "sigmoid":
@@ -87,11 +88,12 @@ class Human:
             falling_side = 1 / (1 + np.exp(-self.k2 * (pmv - self.T2)))
             probability = rising_side + falling_side
         else:
-            probability = 0.0
-        # limit  probabilities between 0 and 1
-        probability = max(0.0, min(1.0, self.normalizer * probability))
+            probability = np.zeros_like(pmv)
+        # limit  probabilities between 0 and 1, an undefined pmv (outside of the model's range) is a sure complaint
+        probability = np.clip(self.normalizer * probability, 0.0, 1.0)
+        probability = np.where(np.isnan(probability), 1.0, probability)
         
-        return probability
+        return float(probability) if probability.ndim == 0 else probability
     
     def temp2prob(self, min_tdb = 10.0, max_tdb = 40.0, step_tdb = 0.5, tr = 25, v = 0.1, rh =50) -> dict:
         """ Uniformly samples the probability of complaint varying the temperature
@@ -102,14 +104,8 @@ class Human:
         v: average air speed, [m/s]
         rh: relative humidity, [%]
         """
-        probabilities = {"probability": [], "tdb": [], "pmv": []}
         pmvs = self.temp2pmv(min_tdb, max_tdb, step_tdb, tr, v, rh)
-        for pmv, tdb in zip(pmvs["pmv"], pmvs["tdb"]):
-            probability = self.calcprobability(pmv)
-            probabilities["probability"].append(probability)
-            probabilities["tdb"].append(tdb)
-            probabilities["pmv"].append(pmv)
-        return probabilities
+        return {"probability": self.calcprobability(pmvs["pmv"]), "tdb": pmvs["tdb"], "pmv": pmvs["pmv"]}
     
     def pmv2prob(self, min_pmv = -3.0, max_pmv = 3.0, step_pmv = 0.1) -> dict:
         """ Uniformly samples the probability of complaint varying the pmv
@@ -117,12 +113,8 @@ class Human:
         max_pmv: max pmv, [-]
         step_pmv: step of the pmv, [-]
         """
-        probabilities = {"probability": [], "pmv": []}
-        for pmv in np.arange(min_pmv, max_pmv, step_pmv):
-            probability = self.calcprobability(pmv)
-            probabilities["probability"].append(probability)
-            probabilities["pmv"].append(pmv)
-        return probabilities
+        pmv = np.arange(min_pmv, max_pmv, step_pmv)
+        return {"probability": self.calcprobability(pmv), "pmv": pmv}
     
     def setProbabilityFunction(self, prob_func: str) -> None:
         """
@@ -0,0 +1,66 @@
+"""Per-episode aggregates and distributions computed in bounded memory, by chunks of episodes."""
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from rleplus.analysis.store import HistoryStore
+
+
+def _segment_stats(values: np.ndarray, offsets: np.ndarray) -> Dict[str, np.ndarray]:
+    """nan-aware sum, count, mean, min and max of consecutive segments `values[offsets[i]:offsets[i + 1]]`."""
+    starts, lengths = offsets[:-1], np.diff(offsets)
+    count = np.zeros(len(starts), dtype=np.int64)
+    total, minimum, maximum = np.zeros(len(starts)), np.full(len(starts), np.nan), np.full(len(starts), np.nan)
+
+    # reduceat over non-empty segments only: their starts are in bounds and strictly increasing
+    non_empty = lengths > 0
+    if non_empty.any():
+        valid = ~np.isnan(values)
+        segment_starts = starts[non_empty]
+        count[non_empty] = np.add.reduceat(valid.astype(np.int64), segment_starts)
+        total[non_empty] = np.add.reduceat(np.where(valid, values, 0.0), segment_starts)
+        minimum[non_empty] = np.minimum.reduceat(np.where(valid, values, np.inf), segment_starts)
+        maximum[non_empty] = np.maximum.reduceat(np.where(valid, values, -np.inf), segment_starts)
+
+    empty = count == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(empty, np.nan, total / count)
+    return {
+        "sum": total,
+        "count": count,
+        "mean": mean,
+        "min": np.where(empty, np.nan, minimum),
+        "max": np.where(empty, np.nan, maximum),
+    }
+
+
+def episode_stats(
+    store: HistoryStore, column: str, absolute: bool = False, chunk_episodes: int = 1024
+) -> Dict[str, np.ndarray]:
+    """Per-episode nan-aware sum, count, mean, min and max of a column (of its absolute values if `absolute`)."""
+    chunks: List[Dict[str, np.ndarray]] = []
+    for offsets, values in store.iter_chunks([column], chunk_episodes=chunk_episodes):
+        column_values = np.abs(values[column]) if absolute else values[column]
+        chunks.append(_segment_stats(column_values, offsets))
+    if not chunks:
+        return {name: np.empty(0) for name in ["sum", "count", "mean", "min", "max"]}
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def episode_energy(store: HistoryStore, columns: Sequence[str], chunk_episodes: int = 1024) -> np.ndarray:
+    """Total energy of each episode, summed over meter columns."""
+    energy = np.zeros(store.num_episodes)
+    for column in columns:
+        energy += episode_stats(store, column, chunk_episodes=chunk_episodes)["sum"]
+    return energy
+
+
+def histogram(store: HistoryStore, column: str, bins: np.ndarray, chunk_episodes: int = 1024) -> Dict[str, np.ndarray]:
+    """Histogram of a column over fixed `bins` edges, with the number of nan values (e.g. invalid PMVs)."""
+    counts = np.zeros(len(bins) - 1, dtype=np.int64)
+    num_nan = 0
+    for _, values in store.iter_chunks([column], chunk_episodes=chunk_episodes):
+        valid = ~np.isnan(values[column])
+        counts += np.histogram(values[column][valid], bins=bins)[0]
+        num_nan += int((~valid).sum())
+    return {"counts": counts, "bins": bins, "nan": np.array(num_nan)}
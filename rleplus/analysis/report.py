@@ -0,0 +1,210 @@
+"""Plots of training results and simulation histories, computed out of core.
+
+History pickle files are converted (incrementally) to a history store next to them, then per-episode
+aggregates are computed by chunks of episodes. Produces the plots of `training.ipynb` and
+`results.ipynb`, and a CSV of per-episode aggregates.
+
+Example:
+
+    python3 rleplus/analysis/report.py --history tmp/history.pkl \
+        --training-results results/pmv_default_2_years/training-results.pkl --output plots
+"""
+import argparse
+import csv
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from rleplus.analysis.aggregates import episode_energy, episode_stats, histogram
+from rleplus.analysis.store import (
+    METADATA_FILE,
+    HistoryStore,
+    convert_history,
+    convert_training_results,
+)
+
+# meter / energy columns of the example environments
+ENERGY_COLUMNS = ["elec", "dh", "eeq_htg"]
+TRAINING_LOSS_COLUMN = "info/learner/default_policy/total_loss"
+TRAINING_REWARD_COLUMN = "episode_reward_mean"
+
+
+def open_store(path: str, store_dir: Optional[str] = None) -> HistoryStore:
+    """Opens a history store, converting `path` first if it's a pickle file."""
+    if os.path.isdir(path) and os.path.exists(os.path.join(path, METADATA_FILE)):
+        return HistoryStore(path)
+    return convert_history(path, store_dir or f"{path}.store")
+
+
+def _plot_lines(plt, lines: Dict[str, np.ndarray], xlabel: str, ylabel: str, title: str, output: Path) -> None:
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for label, values in lines.items():
+        ax.plot(values, label=label)
+    if len(lines) > 1:
+        ax.legend()
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    fig.savefig(output, bbox_inches="tight")
+    plt.close(fig)
+    print(f"Saved {output}")
+
+
+def plot_training_results(plt, store: HistoryStore, output: Path) -> None:
+    for column, ylabel, name in [
+        (TRAINING_LOSS_COLUMN, "total loss", "total_loss"),
+        (TRAINING_REWARD_COLUMN, "mean reward", "episode_reward_mean"),
+    ]:
+        if column in store.columns:
+            _plot_lines(
+                plt,
+                {ylabel: store.column(column)},
+                "iteration",
+                ylabel,
+                f"{ylabel} over iterations",
+                output / f"training_{name}.png",
+            )
+
+
+def plot_history(plt, store: HistoryStore, output: Path, energy_columns: List[str], chunk_episodes: int) -> None:
+    aggregates: Dict[str, np.ndarray] = {}
+
+    reward = episode_stats(store, "reward", chunk_episodes=chunk_episodes)
+    aggregates.update({f"reward_{name}": reward[name] for name in ["sum", "mean", "min", "max"]})
+    _plot_lines(
+        plt,
+        {"mean": reward["mean"], "max": reward["max"], "min": reward["min"]},
+        "episode",
+        "reward",
+        "mean, max, min rewards over episodes",
+        output / "reward_mean_max_min.png",
+    )
+    _plot_lines(
+        plt,
+        {"total reward": reward["sum"]},
+        "episode",
+        "total reward",
+        "total rewards over episodes",
+        output / "reward_total.png",
+    )
+
+    if "pmv" in store.columns:
+        pmv = episode_stats(store, "pmv", chunk_episodes=chunk_episodes)
+        abs_pmv = episode_stats(store, "pmv", absolute=True, chunk_episodes=chunk_episodes)
+        aggregates.update({f"pmv_{name}": pmv[name] for name in ["mean", "min", "max"]})
+        aggregates.update({f"abs_pmv_{name}": abs_pmv[name] for name in ["sum", "mean", "max"]})
+        aggregates["pmv_invalid"] = store.episode_lengths - pmv["count"]
+
+        _plot_lines(
+            plt,
+            {"total abs(pmv)": abs_pmv["sum"]},
+            "episode",
+            "total abs(pmv)",
+            "total abs(pmv) values over episodes",
+            output / "pmv_abs_total.png",
+        )
+        _plot_lines(
+            plt,
+            {"mean": pmv["mean"], "max": pmv["max"], "min": pmv["min"]},
+            "episode",
+            "pmv",
+            "mean, max, min pmv values over episodes",
+            output / "pmv_mean_max_min.png",
+        )
+        _plot_lines(
+            plt,
+            {"mean": abs_pmv["mean"], "max": abs_pmv["max"], "min": abs_pmv["min"]},
+            "episode",
+            "abs(pmv)",
+            "mean, max, min of the abs(pmv) over episodes",
+            output / "pmv_abs_mean_max_min.png",
+        )
+
+        distribution = histogram(store, "pmv", bins=np.linspace(-3, 3, 61), chunk_episodes=chunk_episodes)
+        fig, ax = plt.subplots(figsize=(10, 5))
+        ax.stairs(distribution["counts"], distribution["bins"], fill=True)
+        ax.set_xlabel("pmv")
+        ax.set_ylabel("timesteps")
+        ax.set_title(f"pmv distribution ({int(distribution['nan'])} invalid pmv values)")
+        fig.savefig(output / "pmv_distribution.png", bbox_inches="tight")
+        plt.close(fig)
+        print(f"Saved {output / 'pmv_distribution.png'}")
+
+    energy_columns = [column for column in energy_columns if column in store.columns]
+    if energy_columns:
+        aggregates["energy"] = episode_energy(store, energy_columns, chunk_episodes=chunk_episodes)
+        _plot_lines(
+            plt,
+            {"energy": aggregates["energy"]},
+            "episode",
+            f"energy ({' + '.join(energy_columns)})",
+            "energy per episode",
+            output / "energy.png",
+        )
+
+    with open(output / "episodes.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["episode", "steps", *aggregates.keys()])
+        for i, row in enumerate(zip(store.episode_lengths, *aggregates.values())):
+            writer.writerow([i, *[float(value) for value in row]])
+    print(f"Saved {output / 'episodes.csv'}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--history",
+        help="Simulation history: a history.pkl file (converted to a store next to it) or a converted store",
+        required=False,
+        default=None,
+    )
+    parser.add_argument("--training-results", help="training-results.pkl file", required=False, default=None)
+    parser.add_argument("--output", help="Output directory of plots", required=False, default="plots")
+    parser.add_argument(
+        "--energy-columns",
+        nargs="+",
+        default=ENERGY_COLUMNS,
+        help="History columns summed into energy per episode, when present",
+    )
+    parser.add_argument(
+        "--chunk-episodes",
+        type=int,
+        default=1024,
+        help="Number of episodes loaded in memory at once",
+    )
+    built_args = parser.parse_args()
+    print(f"Running with following CLI args: {built_args}")
+    return built_args
+
+
+def main():
+    args = parse_args()
+    if args.history is None and args.training_results is None:
+        raise ValueError("Nothing to plot: give --history and/or --training-results")
+
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise ImportError("Plots require matplotlib, install it with `pip install matplotlib`")
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+
+    if args.training_results is not None:
+        store = convert_training_results(args.training_results, f"{args.training_results}.store")
+        print(f"Training results: {store.num_episodes} iterations")
+        plot_training_results(plt, store, output)
+
+    if args.history is not None:
+        store = open_store(args.history)
+        print(f"History: {store.num_episodes} episodes, {store.num_rows} timesteps, columns: {store.columns}")
+        plot_history(plt, store, output, args.energy_columns, args.chunk_episodes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Columnar, episode-indexed storage of simulation histories.
+
+`EnergyPlusEnv.save_history()` appends one pickle frame per episode to `history.pkl`, a dict of
+column name to list of values (observations, reward, PMV). `convert_history()` streams these frames
+one at a time into a `HistoryStore` directory:
+
+- `{column}.f64`: raw float64 values of each column (URL-quoted name), all episodes concatenated
+- `offsets.npy`: row offset of each episode (n_episodes + 1 values)
+- `store.json`: columns, number of rows, and the byte offset of the source file converted so far
+
+Columns are memory-mapped when read, so analysis cost doesn't depend on available RAM. As the source
+file is append-only, converting it again only reads the frames appended since the last conversion.
+"""
+import json
+import os
+import pickle as pkl
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+import numpy as np
+
+METADATA_FILE = "store.json"
+OFFSETS_FILE = "offsets.npy"
+
+
+def column_file(path: Path, name: str) -> Path:
+    """File of a column, names being escaped as they can contain separators (e.g. `info/learner/...`)."""
+    return path / f"{quote(name, safe='')}.f64"
+
+
+def iter_pickle_frames(path: Union[Path, str], start: int = 0) -> Iterator[Tuple[Any, int]]:
+    """Yields the objects of an append-mode pickle file one at a time, with the byte offset following each one."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        while True:
+            try:
+                frame = pkl.load(f)
+            except EOFError:
+                return
+            yield frame, f.tell()
+
+
+class HistoryStore:
+    """Read access to a columnar history store."""
+
+    def __init__(self, path: Union[Path, str]):
+        self.path = Path(path)
+        with open(self.path / METADATA_FILE) as f:
+            self.metadata: Dict[str, Any] = json.load(f)
+        self.columns: List[str] = self.metadata["columns"]
+        self.num_rows: int = self.metadata["num_rows"]
+        self.offsets: np.ndarray = np.load(self.path / OFFSETS_FILE)
+
+    @property
+    def num_episodes(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def episode_lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def column(self, name: str) -> np.ndarray:
+        """Memory-mapped values of a column, for all episodes."""
+        if name not in self.columns:
+            raise KeyError(f"Unknown column {name}, available columns: {self.columns}")
+        if self.num_rows == 0:
+            return np.empty(0)
+        return np.memmap(column_file(self.path, name), dtype=np.float64, mode="r", shape=(self.num_rows,))
+
+    def episode(self, i: int) -> Dict[str, np.ndarray]:
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return {name: np.array(self.column(name)[start:end]) for name in self.columns}
+
+    def iter_chunks(
+        self, columns: List[str], chunk_episodes: int = 1024
+    ) -> Iterator[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+        """Yields chunks of `chunk_episodes` episodes: their row offsets (relative to the chunk) and column values."""
+        mapped = {name: self.column(name) for name in columns}
+        for first in range(0, self.num_episodes, chunk_episodes):
+            offsets = self.offsets[first : min(first + chunk_episodes, self.num_episodes) + 1]
+            start, end = offsets[0], offsets[-1]
+            yield offsets - start, {name: np.asarray(values[start:end]) for name, values in mapped.items()}
+
+
+class _HistoryWriter:
+    """Appends episodes to a history store, rows of all columns being kept aligned."""
+
+    def __init__(self, path: Path, source: str, resume: bool):
+        self.path = path
+        self.source = source
+        self.columns: List[str] = []
+        self.num_rows = 0
+        self.offsets: List[int] = [0]
+        self.source_offset = 0
+
+        if resume:
+            store = HistoryStore(path)
+            self.columns, self.num_rows = list(store.columns), store.num_rows
+            self.offsets, self.source_offset = store.offsets.tolist(), store.metadata["source_offset"]
+            # drop rows written after the last saved metadata, e.g. by an interrupted conversion
+            for name in self.columns:
+                with open(column_file(self.path, name), "r+b") as f:
+                    f.truncate(self.num_rows * 8)
+        else:
+            path.mkdir(parents=True, exist_ok=True)
+            for stale_file in path.glob("*.f64"):
+                stale_file.unlink()
+
+    def append(self, episode: Dict[str, Any]) -> None:
+        values = {name: np.asarray(value, dtype=np.float64).reshape(-1) for name, value in episode.items()}
+        length = max((len(v) for v in values.values()), default=0)
+
+        for name in values:
+            if name not in self.columns:
+                # new column: earlier episodes have no value for it
+                self.columns.append(name)
+                np.full(self.num_rows, np.nan).tofile(column_file(self.path, name))
+
+        for name in self.columns:
+            value = values.get(name, np.empty(0))
+            # columns shorter than the episode (e.g. PMV with comfort metrics off) are padded with nan
+            if len(value) < length:
+                value = np.concatenate([value, np.full(length - len(value), np.nan)])
+            with open(column_file(self.path, name), "ab") as f:
+                value.tofile(f)
+
+        self.num_rows += length
+        self.offsets.append(self.num_rows)
+
+    def commit(self, source_offset: int) -> None:
+        self.source_offset = source_offset
+        np.save(self.path / OFFSETS_FILE, np.array(self.offsets, dtype=np.int64))
+        metadata = {
+            "source": self.source,
+            "source_offset": self.source_offset,
+            "columns": self.columns,
+            "num_rows": self.num_rows,
+        }
+        # metadata is written last and atomically: it validates the rows written before
+        tmp_file = self.path / f"{METADATA_FILE}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(metadata, f)
+        os.replace(tmp_file, self.path / METADATA_FILE)
+
+
+def convert_history(
+    source: Union[Path, str], path: Union[Path, str], commit_every: int = 100, rebuild: bool = False
+) -> HistoryStore:
+    """Converts an append-mode history pickle file into a history store, and returns it.
+
+    If the store was already converted from the same source, only the episodes appended since are converted, unless
+    `rebuild`. Progress is committed every `commit_every` episodes, so an interrupted conversion resumes from there.
+    """
+    path = Path(path)
+    source = os.path.abspath(source)
+    resume = False
+    if not rebuild and (path / METADATA_FILE).exists():
+        with open(path / METADATA_FILE) as f:
+            metadata = json.load(f)
+        resume = metadata["source"] == source and metadata["source_offset"] <= os.path.getsize(source)
+
+    writer = _HistoryWriter(path, source, resume)
+    source_offset = writer.source_offset
+    pending = 0
+    for episode, source_offset in iter_pickle_frames(source, start=writer.source_offset):
+        writer.append(episode)
+        pending += 1
+        if pending == commit_every:
+            writer.commit(source_offset)
+            pending = 0
+    writer.commit(source_offset)
+    return HistoryStore(path)
+
+
+def flatten_result(result: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flattens the numeric scalars of a nested RLlib result dict, e.g. `info/learner/default_policy/total_loss`."""
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            if key != "config":
+                flat.update(flatten_result(value, prefix=f"{name}/"))
+        elif isinstance(value, (bool, int, float, np.number)):
+            flat[name] = float(value)
+    return flat
+
+
+def convert_training_results(
+    source: Union[Path, str], path: Union[Path, str], columns: Optional[List[str]] = None
+) -> HistoryStore:
+    """Converts a `training-results.pkl` file into a history store with one row (and episode) per training iteration.
+
+    Frames of the file can be single result dicts or lists of them. Only numeric scalars are kept, or `columns` if
+    given (flattened names, see `flatten_result()`).
+    """
+    writer = _HistoryWriter(Path(path), os.path.abspath(source), resume=False)
+    source_offset = 0
+    for frame, source_offset in iter_pickle_frames(source):
+        for result in frame if isinstance(frame, list) else [frame]:
+            flat = flatten_result(result)
+            if columns is not None:
+                flat = {name: flat.get(name, np.nan) for name in columns}
+            writer.append({name: [value] for name, value in flat.items()})
+        # results of a frame are dropped before loading the next one
+        del frame
+    writer.commit(source_offset)
+    return HistoryStore(path)
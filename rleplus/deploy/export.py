@@ -0,0 +1,230 @@
+"""Export a trained RLlib policy to a standalone TorchScript artifact.
+
+The exported module maps a batch of raw environment observations to greedy environment actions:
+observation preprocessing (dtype cast, observation filter) and action post-processing (argmax for
+discrete spaces, unsquashing/clipping for continuous ones) are baked in. The artifact can then be
+loaded without Ray with `rleplus.deploy.inference.ExportedPolicy`.
+
+Example:
+
+    python3 rleplus/deploy/export.py --checkpoint results/pmv_default_2_years/checkpoints \
+        --output policy.pt
+"""
+import argparse
+import json
+import pickle as pkl
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import gymnasium as gym
+import numpy as np
+import torch
+from torch import nn
+
+# name of the metadata file stored alongside the TorchScript module
+METADATA_FILE = "metadata.json"
+
+
+class _RLModuleActor(nn.Module):
+    """Calls an RLModule's inference forward pass and returns the action distribution inputs."""
+
+    def __init__(self, module: nn.Module):
+        super().__init__()
+        self.module = module
+
+    def forward(self, obs: torch.Tensor) -> torch.Tensor:
+        return self.module.forward_inference({"obs": obs})["action_dist_inputs"]
+
+
+class _ModelV2Actor(nn.Module):
+    """Calls a ModelV2's forward pass and returns the action distribution inputs."""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, obs: torch.Tensor) -> torch.Tensor:
+        return self.model({"obs": obs}, [], None)[0]
+
+
+class GreedyPolicy(nn.Module):
+    """Raw observations in, greedy environment actions out."""
+
+    def __init__(
+        self,
+        actor: nn.Module,
+        action_space: gym.Space,
+        normalize_actions: bool,
+        clip_actions: bool,
+        obs_filter: Optional[Tuple[np.ndarray, np.ndarray, float]] = None,
+    ):
+        super().__init__()
+        self.actor = actor
+        self.discrete = isinstance(action_space, gym.spaces.Discrete)
+        self.normalize_actions = normalize_actions
+        self.clip_actions = clip_actions
+
+        if obs_filter is not None:
+            mean, std, clip = obs_filter
+        else:
+            mean, std, clip = np.zeros(1), np.ones(1), float("inf")
+        self.register_buffer("obs_mean", torch.as_tensor(mean, dtype=torch.float32))
+        self.register_buffer("obs_std", torch.as_tensor(std, dtype=torch.float32))
+        self.obs_clip = float(clip)
+
+        if self.discrete:
+            self.action_dim = 1
+            low, high = np.zeros(1), np.full(1, action_space.n - 1)
+        else:
+            self.action_dim = int(np.prod(action_space.shape))
+            low, high = action_space.low.reshape(-1), action_space.high.reshape(-1)
+        self.register_buffer("action_low", torch.as_tensor(low, dtype=torch.float32))
+        self.register_buffer("action_high", torch.as_tensor(high, dtype=torch.float32))
+
+    def forward(self, obs: torch.Tensor) -> torch.Tensor:
+        x = (obs.to(torch.float32) - self.obs_mean) / self.obs_std
+        x = torch.clamp(x, -self.obs_clip, self.obs_clip)
+        dist_inputs = self.actor(x)
+
+        if self.discrete:
+            return torch.argmax(dist_inputs, dim=-1)
+
+        # diagonal gaussian: first half of the inputs is the mean, second half the log std
+        action = dist_inputs[..., : self.action_dim]
+        if self.normalize_actions:
+            action = (
+                self.action_low + (torch.clamp(action, -1.0, 1.0) + 1.0) * (self.action_high - self.action_low) / 2.0
+            )
+        if self.normalize_actions or self.clip_actions:
+            action = torch.max(torch.min(action, self.action_high), self.action_low)
+        return action
+
+
+def _resolve_policy_dir(checkpoint: Path, policy_id: str) -> Path:
+    if (checkpoint / "policies" / policy_id).exists():
+        return checkpoint / "policies" / policy_id
+    return checkpoint
+
+
+def _load_obs_filter(checkpoint: Path, policy_id: str) -> Optional[Tuple[np.ndarray, np.ndarray, float]]:
+    """Returns (mean, std, clip) of the MeanStdFilter saved with an algorithm checkpoint, if any."""
+    state_file = checkpoint / "algorithm_state.pkl"
+    if not state_file.exists():
+        return None
+
+    with open(state_file, "rb") as f:
+        state = pkl.load(f)
+    obs_filter = state.get("worker", {}).get("filters", {}).get(policy_id)
+    if obs_filter is None or type(obs_filter).__name__ != "MeanStdFilter":
+        return None
+
+    stats = obs_filter.running_stats
+    mean = np.asarray(stats.mean) if obs_filter.demean else np.zeros(stats.shape)
+    std = np.asarray(stats.std) + 1e-8 if obs_filter.destd else np.ones(stats.shape)
+    clip = obs_filter.clip if obs_filter.clip is not None else float("inf")
+    return mean, std, clip
+
+
+def build_greedy_policy(checkpoint: str, policy_id: str = "default_policy") -> Tuple[GreedyPolicy, Dict[str, Any]]:
+    """Restores an RLlib checkpoint and wraps its model into a `GreedyPolicy`."""
+    from ray.rllib.core.rl_module import RLModule
+    from ray.rllib.policy.policy import Policy
+
+    checkpoint_path = Path(checkpoint)
+    policy = Policy.from_checkpoint(str(_resolve_policy_dir(checkpoint_path, policy_id)))
+    model = policy.model
+
+    if isinstance(model, RLModule):
+        if model.is_stateful():
+            raise ValueError("Recurrent policies (e.g. trained with --use-lstm) can't be exported")
+        actor = _RLModuleActor(model)
+    else:
+        if len(model.get_initial_state()) > 0:
+            raise ValueError("Recurrent policies (e.g. trained with --use-lstm) can't be exported")
+        actor = _ModelV2Actor(model)
+
+    greedy_policy = GreedyPolicy(
+        actor=actor,
+        action_space=policy.action_space,
+        normalize_actions=policy.config.get("normalize_actions", True),
+        clip_actions=policy.config.get("clip_actions", False),
+        obs_filter=_load_obs_filter(checkpoint_path, policy_id),
+    )
+
+    action_space = policy.action_space
+    metadata = {
+        "source": "rllib",
+        "checkpoint": str(checkpoint_path.resolve()),
+        "policy_id": policy_id,
+        "exported_at": datetime.now().isoformat(),
+        "observation_shape": list(policy.observation_space.shape),
+        "action_space": (
+            {"type": "discrete", "n": int(action_space.n)}
+            if isinstance(action_space, gym.spaces.Discrete)
+            else {
+                "type": "box",
+                "shape": list(action_space.shape),
+                "low": action_space.low.tolist(),
+                "high": action_space.high.tolist(),
+            }
+        ),
+    }
+    return greedy_policy, metadata
+
+
+def save_artifact(greedy_policy: GreedyPolicy, metadata: Dict[str, Any], output: str, batch_size: int = 8) -> str:
+    """Traces, freezes and writes a `GreedyPolicy` to a TorchScript file, with its metadata."""
+    greedy_policy.eval()
+
+    example = torch.zeros((batch_size, *metadata["observation_shape"]), dtype=torch.float32)
+    with torch.no_grad():
+        traced = torch.jit.trace(greedy_policy, example, check_trace=False)
+    traced = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    torch.jit.save(traced, output, _extra_files={METADATA_FILE: json.dumps(metadata)})
+    return output
+
+
+def export_policy(checkpoint: str, output: str, policy_id: str = "default_policy") -> str:
+    """Exports the greedy policy of a checkpoint to a frozen TorchScript file.
+
+    Returns the path of the written artifact.
+    """
+    greedy_policy, metadata = build_greedy_policy(checkpoint, policy_id)
+    return save_artifact(greedy_policy, metadata, output)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--checkpoint",
+        help="RLlib algorithm or policy checkpoint directory",
+        required=True,
+    )
+    parser.add_argument(
+        "--output",
+        help="Path of the exported TorchScript artifact",
+        required=False,
+        default="policy.pt",
+    )
+    parser.add_argument(
+        "--policy-id",
+        help="Policy to export from an algorithm checkpoint",
+        required=False,
+        default="default_policy",
+    )
+    built_args = parser.parse_args()
+    print(f"Running with following CLI args: {built_args}")
+    return built_args
+
+
+def main():
+    args = parse_args()
+    output = export_policy(checkpoint=args.checkpoint, output=args.output, policy_id=args.policy_id)
+    print(f"Policy exported to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Single-process batched inference with exported policies.
+
+Loads an artifact written by `rleplus.deploy.export` and runs it with plain PyTorch: no Ray, no
+learner stack. Observations are given as raw environment observations (as returned by
+`EnergyPlusEnv.step()`), actions are returned in the environment action space, before
+`post_process_action()`.
+"""
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+import torch
+
+from rleplus.deploy.export import METADATA_FILE
+
+
+class ExportedPolicy:
+    """Greedy policy loaded from an exported TorchScript artifact.
+
+    `torch.set_num_threads()` applies to the whole process, so threads are only set when `num_threads` is given,
+    e.g. by the inference server. Processes embedding a policy (evaluator, notebooks) keep their own setting.
+    """
+
+    def __init__(self, path: str, num_threads: Optional[int] = None):
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+
+        extra_files = {METADATA_FILE: ""}
+        self.module = torch.jit.load(path, map_location="cpu", _extra_files=extra_files)
+        self.module.eval()
+        self.metadata: Dict[str, Any] = json.loads(extra_files[METADATA_FILE])
+        self.observation_shape = tuple(self.metadata["observation_shape"])
+        self.discrete = self.metadata["action_space"]["type"] == "discrete"
+
+    def reset(self) -> None:
+        """Exported policies are stateless, nothing to reset."""
+
+    def compute_actions(self, obs_batch: np.ndarray) -> np.ndarray:
+        """Computes actions for a batch of observations of shape (batch, *observation_shape)."""
+        obs = torch.from_numpy(np.asarray(obs_batch, dtype=np.float32).reshape(-1, *self.observation_shape))
+        with torch.inference_mode():
+            return self.module(obs).numpy()
+
+    def compute_action(self, obs: np.ndarray) -> Any:
+        """Computes the action for a single observation."""
+        action = self.compute_actions(obs)[0]
+        return int(action) if self.discrete else action
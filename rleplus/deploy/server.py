@@ -0,0 +1,318 @@
+"""Micro-batching policy inference server for live building control.
+
+Room controllers POST their latest observation to a localhost HTTP endpoint. Requests arriving
+close to each other (typically at E+ timestep boundaries) are grouped into micro-batches: a batch is
+closed when it reaches `max_batch_size` or when `max_wait_ms` elapsed since its first request. Each
+batch is run through the policy in a single call, and actions are post-processed into setpoints
+with the environment's `post_process_action()`.
+
+Endpoints:
+
+- `POST /act` with `{"observation": [...]}` or `{"observation": {"air_tmp": ..., ...}}`,
+  returns `{"setpoint": ...}`. Errors are returned as `{"error": ...}`: 400 for invalid requests,
+  500 if the policy failed and 504 if inference did not complete within the request timeout
+- `GET /metrics` returns request, batch size and latency statistics
+
+Example:
+
+    python3 rleplus/deploy/server.py --env BBrightEnv --policy policy.pt --port 8000
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Queue
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+Observation = Union[Sequence[float], Dict[str, float]]
+
+
+class MicroBatcher:
+    """Groups concurrent inference requests into batches.
+
+    `compute_actions` is called from a single background thread with a (batch, obs_dim) array and
+    must return one action per row.
+    """
+
+    def __init__(
+        self,
+        compute_actions: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 20.0,
+        latency_window: int = 10_000,
+    ):
+        assert max_batch_size > 0, "max_batch_size must be > 0"
+        assert max_wait_ms >= 0.0, "max_wait_ms must be >= 0"
+
+        self.compute_actions = compute_actions
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.requests: Queue = Queue()
+        self.metrics_lock = threading.Lock()
+        self.num_requests = 0
+        self.num_batches = 0
+        self.max_seen_batch_size = 0
+        self.latencies: Deque[float] = deque(maxlen=latency_window)
+        self.inference_times: Deque[float] = deque(maxlen=latency_window)
+
+        self.running = True
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, obs: np.ndarray) -> Future:
+        """Enqueues an observation, the returned future resolves to its action."""
+        future: Future = Future()
+        self.requests.put((time.perf_counter(), np.asarray(obs, dtype=np.float32), future))
+        return future
+
+    def stop(self) -> None:
+        self.running = False
+        self.worker.join()
+
+    def _next_batch(self) -> List[Any]:
+        try:
+            batch = [self.requests.get(timeout=0.1)]
+        except Empty:
+            return []
+
+        deadline = batch[0][0] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait())
+            except Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while self.running:
+            batch = self._next_batch()
+            if len(batch) == 0:
+                continue
+
+            start = time.perf_counter()
+            try:
+                actions = self.compute_actions(np.stack([obs for _, obs, _ in batch]))
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            end = time.perf_counter()
+
+            with self.metrics_lock:
+                self.num_requests += len(batch)
+                self.num_batches += 1
+                self.max_seen_batch_size = max(self.max_seen_batch_size, len(batch))
+                self.inference_times.append(end - start)
+                self.latencies.extend(end - enqueued for enqueued, _, _ in batch)
+
+            for (_, _, future), action in zip(batch, actions):
+                future.set_result(action)
+
+    def metrics(self) -> Dict[str, float]:
+        with self.metrics_lock:
+            latencies = np.array(self.latencies) * 1000.0
+            inference_times = np.array(self.inference_times) * 1000.0
+            return {
+                "requests": self.num_requests,
+                "batches": self.num_batches,
+                "batch_size_mean": self.num_requests / self.num_batches if self.num_batches else 0.0,
+                "batch_size_max": self.max_seen_batch_size,
+                "latency_ms_mean": float(latencies.mean()) if latencies.size else 0.0,
+                "latency_ms_p50": float(np.percentile(latencies, 50)) if latencies.size else 0.0,
+                "latency_ms_p95": float(np.percentile(latencies, 95)) if latencies.size else 0.0,
+                "latency_ms_p99": float(np.percentile(latencies, 99)) if latencies.size else 0.0,
+                "inference_ms_mean": float(inference_times.mean()) if inference_times.size else 0.0,
+            }
+
+
+class InferenceServer(ThreadingHTTPServer):
+    """HTTP front-end of a `MicroBatcher`.
+
+    Observations can be sent as lists (in observation space order) or as dicts keyed by the
+    environment's variable/meter names, in which case `obs_keys` gives the expected order. With `obs_keys`,
+    list observations must have one value per key.
+    """
+
+    daemon_threads = True
+    # room controllers connect in bursts at timestep boundaries, the default backlog of 5 drops them
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        address,
+        batcher: MicroBatcher,
+        post_process_action: Callable[[Any], Any],
+        obs_keys: Optional[List[str]] = None,
+        request_timeout: float = 5.0,
+    ):
+        super().__init__(address, _InferenceRequestHandler)
+        self.batcher = batcher
+        self.post_process_action = post_process_action
+        self.obs_keys = obs_keys
+        self.request_timeout = request_timeout
+
+    def to_array(self, obs: Observation) -> np.ndarray:
+        if isinstance(obs, dict):
+            if self.obs_keys is None:
+                raise ValueError("Observation given as a dict but observation keys are unknown")
+            missing = set(self.obs_keys) - set(obs)
+            if missing:
+                raise ValueError(f"Missing observation keys: {sorted(missing)}")
+            obs = [obs[key] for key in self.obs_keys]
+        obs = np.asarray(obs, dtype=np.float32)
+        # rejected here with a 400: a malformed observation would fail the whole micro-batch it is stacked into
+        if obs.ndim != 1:
+            raise ValueError(f"Observation must be a flat list, got shape {list(obs.shape)}")
+        if self.obs_keys is not None and len(obs) != len(self.obs_keys):
+            raise ValueError(f"Observation must have {len(self.obs_keys)} values, got {len(obs)}")
+        return obs
+
+    def act(self, obs: Observation) -> float:
+        action = self.batcher.submit(self.to_array(obs)).result(timeout=self.request_timeout)
+        return float(np.asarray(self.post_process_action(action)).reshape(-1)[0])
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.batcher.stop()
+
+
+class _InferenceRequestHandler(BaseHTTPRequestHandler):
+    server: InferenceServer
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._reply(200, self.server.batcher.metrics())
+        else:
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/act":
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            obs = self.server.to_array(body["observation"])
+        except (KeyError, ValueError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        try:
+            setpoint = self.server.act(obs)
+        except FutureTimeoutError:
+            self._reply(504, {"error": f"Inference timed out after {self.server.request_timeout}s"})
+            return
+        except Exception as e:
+            # raised by the policy in the batcher thread, or by post_process_action()
+            self._reply(500, {"error": f"Inference failed: {e!r}"})
+            return
+        self._reply(200, {"setpoint": setpoint})
+
+    def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # one line per request is too verbose for bursts of room controllers
+        pass
+
+
+def request_setpoint(url: str, observation: Observation, timeout: float = 5.0) -> float:
+    """Client helper: sends an observation to a running server and returns the setpoint."""
+    request = urllib.request.Request(
+        f"{url}/act",
+        data=json.dumps({"observation": observation}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())["setpoint"]
+
+
+def load_policy(path: str, num_threads: Optional[int] = None):
+    """Loads an exported policy, exporting it first if `path` is an RLlib checkpoint directory.
+
+    `num_threads` sets the process's torch threads (see `ExportedPolicy`).
+    """
+    from rleplus.deploy.export import export_policy
+    from rleplus.deploy.inference import ExportedPolicy
+
+    if os.path.isdir(path):
+        with TemporaryDirectory() as tmp_dir:
+            return ExportedPolicy(export_policy(path, os.path.join(tmp_dir, "policy.pt")), num_threads=num_threads)
+    return ExportedPolicy(path, num_threads=num_threads)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--env",
+        help="The gym environment whose observation layout and action post-processing are used.",
+        required=False,
+        default="BBrightEnv",
+    )
+    parser.add_argument(
+        "--policy",
+        help="Exported policy artifact or RLlib checkpoint directory",
+        required=True,
+    )
+    parser.add_argument("--host", help="Address to bind", required=False, default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Port to listen on", required=False, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Maximum number of requests per batch")
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=20.0,
+        help="Maximum time a request waits for its batch to fill up, in milliseconds",
+    )
+    parser.add_argument(
+        "--num-threads",
+        type=int,
+        default=1,
+        help="Number of torch threads of the server process. Micro-batches are small, a single thread avoids "
+        "the overhead of intra-op parallelism",
+    )
+    built_args = parser.parse_args()
+    print(f"Running with following CLI args: {built_args}")
+    return built_args
+
+
+def main():
+    from rleplus.examples.registry import env_creator
+
+    args = parse_args()
+
+    policy = load_policy(args.policy, num_threads=args.num_threads)
+    # env is only used for its observation layout and post_process_action(), E+ is never started
+    env = env_creator(args.env)({"output": TemporaryDirectory().name})
+    obs_keys = list(env.get_variables().keys()) + list(env.get_meters().keys())
+
+    server = InferenceServer(
+        (args.host, args.port),
+        batcher=MicroBatcher(policy.compute_actions, args.max_batch_size, args.max_wait_ms),
+        post_process_action=env.post_process_action,
+        obs_keys=obs_keys,
+    )
+    print(f"Serving {args.policy} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Building model bundles: IDF and weather files distributed through the Ray object store.
+
+Example envs locate their IDF and weather files next to their module, and outputs default to a directory created
+on the driver. Without shared storage, workers of a multi-node cluster can't find them. A `ModelBundle` stores the
+model files once in the Ray object store (`make_bundle()` on the driver). Each node then materializes them on
+first use into a local cache keyed by the content digest (`materialize_bundle()`), shared by the workers of the
+node. Derived artifacts (e.g. IDF copies with another timestep or run period, weather statistics) are written in
+each worker's own output directory, see `worker_output_dir()`.
+
+Use `env_config["model_bundle"]`, see `rleplus.train.rllib --model-bundle`.
+"""
+import hashlib
+import os
+import shutil
+import socket
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+# local cache of materialized bundles, overridable for nodes with a dedicated local disk
+CACHE_DIR_ENV = "RLEPLUS_BUNDLE_CACHE"
+# bundle directories materialized by this process, by digest
+_materialized: Dict[str, Path] = {}
+
+
+def default_cache_dir() -> str:
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(tempfile.gettempdir(), "rleplus-bundles")
+
+
+@dataclass
+class ModelBundle:
+    """Model files stored in the Ray object store, by role (e.g. "idf", "epw")."""
+
+    # digest of the file names and contents
+    digest: str
+    # file name (or names) of each role
+    files: Dict[str, Union[str, List[str]]]
+    # ray.ObjectRef of the {file name: content} dict
+    ref: Any
+
+
+def make_bundle(files: Dict[str, Union[Path, str, List[Union[Path, str]]]]) -> ModelBundle:
+    """Reads model files (a path or a list of paths by role) and puts them in the Ray object store.
+
+    Files are stored by name, which must be unique across roles.
+    """
+    import ray
+
+    contents: Dict[str, bytes] = {}
+    names: Dict[str, Union[str, List[str]]] = {}
+    for role, paths in files.items():
+        role_paths = [Path(p) for p in paths] if isinstance(paths, (list, tuple)) else [Path(paths)]
+        for path in role_paths:
+            if path.name in contents and contents[path.name] != path.read_bytes():
+                raise ValueError(f"Different model files named {path.name}")
+            contents[path.name] = path.read_bytes()
+        names[role] = [p.name for p in role_paths] if isinstance(paths, (list, tuple)) else role_paths[0].name
+
+    digest = hashlib.sha256()
+    for name in sorted(contents):
+        digest.update(name.encode())
+        digest.update(hashlib.sha256(contents[name]).digest())
+    return ModelBundle(digest=digest.hexdigest()[:16], files=names, ref=ray.put(contents))
+
+
+def materialize_bundle(bundle: ModelBundle, cache_dir: Union[Path, str, None] = None) -> Dict[str, Any]:
+    """Returns the local paths of the bundle's files by role, fetching and writing them on first use on this node.
+
+    Files are written into a temporary directory renamed once complete, so that workers of a node materializing
+    the same bundle concurrently never see partial files.
+    """
+    directory = Path(cache_dir or default_cache_dir()) / bundle.digest
+    if _materialized.get(bundle.digest) != directory and not directory.is_dir():
+        import ray
+
+        contents: Dict[str, bytes] = ray.get(bundle.ref)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{bundle.digest}-", dir=directory.parent))
+        for name, content in contents.items():
+            (tmp_dir / name).write_bytes(content)
+        try:
+            os.rename(tmp_dir, directory)
+        except OSError:
+            # materialized meanwhile by another worker of the node
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    _materialized[bundle.digest] = directory
+
+    return {
+        role: [str(directory / n) for n in names] if isinstance(names, list) else str(directory / names)
+        for role, names in bundle.files.items()
+    }
+
+
+def worker_output_dir(output: Union[Path, str], vector_index: int = 0) -> str:
+    """Output directory of this worker (node, process and sub-environment) below `output`, created if missing."""
+    directory = os.path.join(output, f"{socket.gethostname()}-{os.getpid()}-{vector_index}")
+    os.makedirs(directory, exist_ok=True)
+    return directory
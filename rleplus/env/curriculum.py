@@ -0,0 +1,76 @@
+"""Prioritized curriculum over episode start days and weather files."""
+from typing import Tuple
+
+import numpy as np
+
+
+class StartDateCurriculum:
+    """Samples episode start days (and weather files) where the policy performs worst.
+
+    Each (day, weather file) pair keeps an exponential moving average of a score measuring how badly
+    the policy did on its last episodes, e.g. the negated return or the discomfort ratio. Pairs are
+    sampled with rank-based priorities, `P(i) ∝ (1 / rank(i)) ** (1 / temperature)`, mixed with a
+    staleness term favoring pairs not sampled for a while, so that scores don't go stale. Pairs without
+    a score yet get the priority of the top ranked one, so that all of them get explored.
+
+    See: M. Jiang, E. Grefenstette and T. Rocktäschel, "Prioritized Level Replay", ICML 2021.
+    """
+
+    def __init__(
+        self,
+        num_days: int,
+        num_weather_files: int = 1,
+        temperature: float = 0.3,
+        staleness_coef: float = 0.1,
+        score_decay: float = 0.5,
+    ):
+        assert num_days > 0 and num_weather_files > 0, "curriculum must have at least one day and weather file"
+        assert temperature > 0.0, "temperature must be > 0"
+        assert 0.0 <= staleness_coef <= 1.0, "staleness_coef must be in [0, 1]"
+        assert 0.0 < score_decay <= 1.0, "score_decay must be in (0, 1]"
+
+        self.num_days = num_days
+        self.num_weather_files = num_weather_files
+        self.temperature = temperature
+        self.staleness_coef = staleness_coef
+        self.score_decay = score_decay
+
+        self.scores = np.zeros((num_weather_files, num_days))
+        self.visited = np.zeros((num_weather_files, num_days), dtype=bool)
+        # number of sampled episodes, and when each pair was last sampled
+        self.num_sampled = 0
+        self.last_sampled = np.zeros((num_weather_files, num_days))
+
+    def probabilities(self) -> np.ndarray:
+        """Sampling probabilities, with shape (number of weather files, number of days)."""
+        visited = self.visited.ravel()
+        score_weights = np.ones(visited.size)
+        if visited.any():
+            ranks = np.empty(visited.sum())
+            # stable sort: ties are broken by weather file and day order
+            ranks[np.argsort(-self.scores.ravel()[visited], kind="stable")] = np.arange(1, ranks.size + 1)
+            score_weights[visited] = (1.0 / ranks) ** (1.0 / self.temperature)
+        probs = score_weights / score_weights.sum()
+
+        staleness = self.num_sampled - self.last_sampled.ravel()
+        if self.staleness_coef > 0.0 and staleness.sum() > 0:
+            probs = (1.0 - self.staleness_coef) * probs + self.staleness_coef * staleness / staleness.sum()
+        return probs.reshape(self.scores.shape)
+
+    def sample(self, rng: np.random.Generator) -> Tuple[int, int]:
+        """Returns the (day index, weather file index) of the next episode."""
+        i = rng.choice(self.scores.size, p=self.probabilities().ravel())
+        weather_file, day = divmod(int(i), self.num_days)
+        self.num_sampled += 1
+        self.last_sampled[weather_file, day] = self.num_sampled
+        return day, weather_file
+
+    def update(self, day: int, weather_file: int, score: float) -> None:
+        """Accounts for the score of a finished episode, higher scores get sampled more."""
+        if np.isnan(score):
+            return
+        if self.visited[weather_file, day]:
+            self.scores[weather_file, day] += self.score_decay * (score - self.scores[weather_file, day])
+        else:
+            self.scores[weather_file, day] = score
+            self.visited[weather_file, day] = True
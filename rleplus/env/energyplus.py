@@ -1,10 +1,14 @@
 import abc
+import copy
+import math
 import os
 import threading
-from dataclasses import dataclass
+import time
+import weakref
+from dataclasses import asdict, dataclass, replace
 from pathlib import Path
 from queue import Empty, Full, Queue
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import pickle as pkl
 
@@ -14,9 +18,27 @@ import numpy as np
 import random
 from datetime import datetime, timedelta
 
-from pythermalcomfort.models import pmv
-
-from rleplus.env.utils import try_import_energyplus_api
+from model.comfort import pmv_ppd_vectorized
+from rleplus.env.bundle import materialize_bundle, worker_output_dir
+from rleplus.env.curriculum import StartDateCurriculum
+from rleplus.env.faults import (
+    EpisodeFailure,
+    RetryPolicy,
+    classify_failure,
+    keep_failed_output,
+)
+from rleplus.env.frame_stack import FrameStack, action_bounds, stacked_space
+from rleplus.env.kpi import EpisodeKPIs
+from rleplus.env.memory import MemoryTracker, count_threads
+from rleplus.env.outputs import EpisodeOutputs, output_columns, read_episode_outputs
+from rleplus.env.weather import WeatherPool
+from rleplus.env.utils import (
+    read_idf_run_period,
+    read_idf_timesteps_per_hour,
+    try_import_energyplus_api,
+    write_idf_with_run_period,
+    write_idf_with_timesteps_per_hour,
+)
 
 EnergyPlusAPI, DataExchange, _ = try_import_energyplus_api()
 
@@ -41,8 +63,14 @@ class RunnerConfig:
     csv: bool = False
     # In verbose mode, EnergyPlus will print to stdout
     verbose: bool = False
-    # EnergyPlus timestep duration, in fractional hour. Default is 0.25 (15 minutes)
-    eplus_timestep_duration: float = 0.25
+    # EnergyPlus timestep duration, in fractional hour. Derived from the IDF Timestep object, if given it must match it
+    eplus_timestep_duration: Optional[float] = None
+    # Parse the outputs of variables and meters into numpy arrays at the end of the simulation, with these
+    # `read_episode_outputs()` parameters. None to not parse them
+    outputs: Optional[Dict[str, Any]] = None
+    # Swap E+ callbacks for specialized ones once handles are resolved and warmup is over. Disabled e.g. to compare
+    # with the generic path
+    specialize_callbacks: bool = True
 
     def __post_init__(self):
         self.epw = str(self.epw)
@@ -59,7 +87,15 @@ class RunnerConfig:
             if len(data) == 0:
                 raise ValueError(f"No {name} provided")
 
-        assert self.eplus_timestep_duration > 0.0, "E+ timestep duration must be > 0.0"
+        idf_timestep_duration = 1.0 / read_idf_timesteps_per_hour(self.idf)
+        if self.eplus_timestep_duration is not None and not math.isclose(
+            self.eplus_timestep_duration, idf_timestep_duration
+        ):
+            raise ValueError(
+                f"E+ timestep duration {self.eplus_timestep_duration} doesn't match the IDF Timestep object "
+                f"({idf_timestep_duration})"
+            )
+        self.eplus_timestep_duration = idf_timestep_duration
 
 
 class EnergyPlusRunner:
@@ -67,15 +103,20 @@ class EnergyPlusRunner:
 
     This class is responsible for running EnergyPlus in a separate thread and to interact
     with it through its API.
+
+    A runner is meant to be reused across episodes: its EnergyPlus API instance and state are kept,
+    and `reset_episode()` only resets per-episode fields. Call `close()` to release the E+ state.
     """
 
+    # live runners and E+ states of the process, reported by memory metrics (see MemoryTracker)
+    instances: "weakref.WeakSet[EnergyPlusRunner]" = weakref.WeakSet()
+    live_states = 0
+
     def __init__(self, episode: int, obs_queue: Queue, act_queue: Queue, runner_config: RunnerConfig) -> None:
-        self.episode = episode
+        EnergyPlusRunner.instances.add(self)
         self.runner_config = runner_config
         self.verbose = self.runner_config.verbose
 
-        self.obs_queue = obs_queue
-        self.act_queue = act_queue
         # protect act_queue from concurrent access that can happen at end of simulation
         self.act_queue_mutex = threading.Lock()
 
@@ -83,12 +124,7 @@ class EnergyPlusRunner:
         self.x: DataExchange = self.energyplus_api.exchange
         self.energyplus_exec_thread: Optional[threading.Thread] = None
         self.energyplus_state: Any = None
-        self.sim_results: Dict[str, Any] = {}
-        self.initialized = False
-        self.progress_value: int = 0
-        self.simulation_complete = False
-        # Zone timestep duration, in fractional hour. Default is 15 minutes
-        # Make sure to set this value to reflect your simulation timestep (ie 4 steps per hour in IDF = 0.25)
+        # Zone timestep duration, in fractional hour (ie 4 steps per hour in IDF = 0.25)
         self.zone_timestep_duration = self.runner_config.eplus_timestep_duration
 
         # below is declaration of variables, meters and actuators
@@ -101,12 +137,53 @@ class EnergyPlusRunner:
 
         self.actuators = runner_config.actuators
         self.actuator_handles: Dict[str, int] = {}
+
+        # once handles are resolved and warmup is over, E+ callbacks are swapped for specialized ones that skip
+        # readiness checks (see _specialize_callbacks()), unless disabled in the runner config
+        self.specialize_callbacks = runner_config.specialize_callbacks
+        self.collect_obs_callback: Callable[[Any], None] = self._collect_obs
+        self.send_actions_callback: Callable[[Any], None] = self._send_actions
+
+        self.reset_episode(episode, obs_queue, act_queue)
+
+    def reset_episode(
+        self, episode: int, obs_queue: Queue, act_queue: Queue, runner_config: Optional[RunnerConfig] = None
+    ) -> None:
+        """Resets per-episode fields, to start a new episode with `start()`.
+
+        `runner_config` can change the simulated IDF and weather files, e.g. for another run period. Variables, meters,
+        actuators and timestep duration must stay the same.
+        """
+        if runner_config is not None:
+            self.runner_config = runner_config
+            self.specialize_callbacks = runner_config.specialize_callbacks
+        self.episode = episode
+        self.obs_queue = obs_queue
+        self.act_queue = act_queue
+
+        self.sim_results: Dict[str, Any] = {}
+        self.initialized = False
+        self.progress_value: int = 0
+        self.simulation_complete = False
         self.last_action = 0.0
 
     def start(self) -> None:
-        self.energyplus_state = self.energyplus_api.state_manager.new_state()
         runtime = self.energyplus_api.runtime
 
+        # previous episode's thread may still be returning from run_energyplus
+        if self.energyplus_exec_thread is not None:
+            self.energyplus_exec_thread.join()
+            self.energyplus_exec_thread = None
+
+        if self.energyplus_state is None:
+            self.energyplus_state = self.energyplus_api.state_manager.new_state()
+            EnergyPlusRunner.live_states += 1
+        else:
+            # reusing the state is cheaper than deleting it and allocating a new one. Resetting it also
+            # unregisters its callbacks, so references to the previous ones are released before registering again
+            self.energyplus_api.state_manager.reset_state(self.energyplus_state)
+            runtime.clear_callbacks()
+
         # register callback used to track simulation progress
         def _report_progress(progress: int) -> None:
             self.progress_value = progress
@@ -117,19 +194,49 @@ class EnergyPlusRunner:
 
         runtime.set_console_output_status(self.energyplus_state, self.verbose)
 
+        # registered callbacks call the current (generic or specialized) implementation
+        self._use_generic_callbacks()
+
+        # warmup happens at the beginning of each environment (sizing period, run period)
+        def _begin_new_environment(state_argument) -> None:
+            self._use_generic_callbacks()
+
+        runtime.callback_begin_new_environment(self.energyplus_state, _begin_new_environment)
+
         # register callback used to collect observations
-        runtime.callback_end_zone_timestep_after_zone_reporting(self.energyplus_state, self._collect_obs)
+        def _collect_obs(state_argument) -> None:
+            self.collect_obs_callback(state_argument)
+
+        runtime.callback_end_zone_timestep_after_zone_reporting(self.energyplus_state, _collect_obs)
 
         # register callback used to send actions
-        runtime.callback_after_predictor_after_hvac_managers(self.energyplus_state, self._send_actions)
+        def _send_actions(state_argument) -> None:
+            self.send_actions_callback(state_argument)
+
+        runtime.callback_after_predictor_after_hvac_managers(self.energyplus_state, _send_actions)
 
         # run EnergyPlus in a non-blocking way
-        def _run_energyplus(rn, cmd_args, state, results):
+        def _run_energyplus(rn, cmd_args, state, results, output_dir):
             if self.verbose:
                 print(f"running EnergyPlus with args: {cmd_args}")
 
             # start simulation
-            results["exit_code"] = rn.run_energyplus(state, cmd_args)
+            try:
+                results["exit_code"] = rn.run_energyplus(state, cmd_args)
+            except Exception as e:
+                # e.g. disk full while E+ writes its outputs
+                results["error"] = e
+
+            if self.runner_config.outputs is not None and results.get("exit_code") == 0:
+                # parsed here, the env only waits for it when the next episode starts
+                try:
+                    results["outputs"] = read_episode_outputs(
+                        output_dir,
+                        output_columns(self.runner_config.variables, self.runner_config.meters),
+                        **self.runner_config.outputs,
+                    )
+                except (OSError, ValueError) as e:
+                    print(f"Failed to read the outputs of {output_dir}: {e}")
 
             if not self.simulation_complete:
                 # free consumers from waiting
@@ -138,22 +245,57 @@ class EnergyPlusRunner:
                 self.stop()
 
         self.energyplus_exec_thread = threading.Thread(
+            name=f"energyplus-episode-{self.episode}",
             target=_run_energyplus,
-            args=(self.energyplus_api.runtime, self.make_eplus_args(), self.energyplus_state, self.sim_results),
+            args=(
+                self.energyplus_api.runtime,
+                self.make_eplus_args(),
+                self.energyplus_state,
+                self.sim_results,
+                self.output_dir,
+            ),
         )
         self.energyplus_exec_thread.start()
 
     def stop(self) -> None:
+        """Ends the current episode. The E+ state is kept for the next one."""
         if not self.simulation_complete:
             self.simulation_complete = True
             self._flush_queues()
-            self.energyplus_exec_thread.join()
-            self.energyplus_exec_thread = None
+            # stop() is also called from the E+ thread when the simulation ends by itself
+            if self.energyplus_exec_thread is not threading.current_thread():
+                self.energyplus_exec_thread.join()
+                self.energyplus_exec_thread = None
+
+    def close(self) -> None:
+        """Ends the current episode and releases the E+ state."""
+        self.stop()
+        if self.energyplus_state is not None:
+            if self.energyplus_exec_thread is not None:
+                self.energyplus_exec_thread.join()
+                self.energyplus_exec_thread = None
             self.energyplus_api.runtime.clear_callbacks()
             self.energyplus_api.state_manager.delete_state(self.energyplus_state)
+            self.energyplus_state = None
+            EnergyPlusRunner.live_states -= 1
+
+    def episode_outputs(self) -> Optional[EpisodeOutputs]:
+        """Parsed outputs of the ended episode (see `RunnerConfig.outputs`), waiting for the E+ thread to end.
+
+        Must be called after `stop()`, None if outputs aren't parsed or the simulation failed.
+        """
+        if self.energyplus_exec_thread is not None and self.energyplus_exec_thread is not threading.current_thread():
+            self.energyplus_exec_thread.join()
+            self.energyplus_exec_thread = None
+        return self.sim_results.get("outputs")
 
     def failed(self) -> bool:
-        return self.sim_results.get("exit_code", -1) > 0
+        return self.sim_results.get("exit_code", -1) > 0 or "error" in self.sim_results
+
+    @property
+    def output_dir(self) -> str:
+        """E+ output directory of the current episode."""
+        return f"{self.runner_config.output}/episode-{self.episode:08}-{os.getpid():05}"
 
     def make_eplus_args(self) -> List[str]:
         """Make command line arguments to pass to EnergyPlus."""
@@ -162,21 +304,32 @@ class EnergyPlusRunner:
             "-w",
             self.runner_config.epw,
             "-d",
-            f"{self.runner_config.output}/episode-{self.episode:08}-{os.getpid():05}",
+            self.output_dir,
             self.runner_config.idf,
         ]
         return eplus_args
 
-    def init_exchange(self, default_action: float) -> Dict[str, float]:
+    def init_exchange(self, default_action: float) -> Optional[Dict[str, float]]:
+        """Sends the default action and waits for the first observation, None if E+ ended before sending one."""
         self.last_action = default_action
         self.act_queue.put(default_action)
-        return self.obs_queue.get()
+        while True:
+            try:
+                return self.obs_queue.get(timeout=1)
+            except Empty:
+                # when E+ exits early, stop() may flush the None sent to wake us up
+                if self.simulation_complete:
+                    return None
 
     def _collect_obs(self, state_argument) -> None:
         """EnergyPlus callback that collects output variables/meters values and enqueue them."""
         if self.simulation_complete or not self._init_callback(state_argument):
             return
-        
+        if self.specialize_callbacks:
+            self._specialize_callbacks()
+            self.collect_obs_callback(state_argument)
+            return
+
         self.next_obs = {
             **{key: self.x.get_variable_value(state_argument, handle) for key, handle in self.var_handles.items()},
             **{key: self.x.get_meter_value(state_argument, handle) for key, handle in self.meter_handles.items()},
@@ -216,6 +369,10 @@ class EnergyPlusRunner:
         """EnergyPlus callback that sets actuator value from last decided action."""
         if self.simulation_complete or not self._init_callback(state_argument):
             return
+        if self.specialize_callbacks:
+            self._specialize_callbacks()
+            self.send_actions_callback(state_argument)
+            return
 
         # E+ has zone and system timesteps, a zone timestep can be made of several system timesteps
         # (number varies on each iteration). We should send actions at least once per zone timestep, so we can
@@ -249,6 +406,62 @@ class EnergyPlusRunner:
             state=state_argument, actuator_handle=self.actuator_handles["clg_spt"], actuator_value=(next_action+0.5)
         )
 
+    def _use_generic_callbacks(self) -> None:
+        self.collect_obs_callback = self._collect_obs
+        self.send_actions_callback = self._send_actions
+
+    def _specialize_callbacks(self) -> None:
+        """Swaps in callbacks specialized for the current episode, once handles are resolved and warmup is over.
+
+        They do the same work as the generic ones, without readiness checks, with handles, queues and E+ API
+        functions bound as locals.
+        """
+        x = self.x
+        get_variable_value, get_meter_value, set_actuator_value = (
+            x.get_variable_value,
+            x.get_meter_value,
+            x.set_actuator_value,
+        )
+        system_time_step = x.system_time_step
+        var_handles = tuple(self.var_handles.items())
+        meter_handles = tuple(self.meter_handles.items())
+        actuator_handles = self.actuator_handles
+        zone_timestep_duration = self.zone_timestep_duration
+        obs_queue, act_queue, act_queue_mutex = self.obs_queue, self.act_queue, self.act_queue_mutex
+
+        def collect_obs(state_argument) -> None:
+            if self.simulation_complete:
+                return
+            # a new dict per timestep, as observations are kept in env history
+            next_obs = {key: get_variable_value(state_argument, handle) for key, handle in var_handles}
+            for key, handle in meter_handles:
+                next_obs[key] = get_meter_value(state_argument, handle)
+            self.next_obs = next_obs
+            obs_queue.put(next_obs)
+
+        def send_actions(state_argument) -> None:
+            if self.simulation_complete:
+                return
+            # see _send_actions(). System timestep is only read when it matters (no action waiting)
+            if act_queue.empty() and system_time_step(state_argument) < zone_timestep_duration:
+                act_queue.put(self.last_action)
+
+            with act_queue_mutex:
+                if self.simulation_complete:
+                    return
+                next_action = act_queue.get()
+
+            if next_action is None:
+                self.simulation_complete = True
+                return
+
+            self.last_action = next_action
+            set_actuator_value(state_argument, actuator_handles["htg_spt"], next_action)
+            set_actuator_value(state_argument, actuator_handles["clg_spt"], next_action + 0.5)
+
+        self.collect_obs_callback = collect_obs
+        self.send_actions_callback = send_actions
+
     def _init_callback(self, state_argument) -> bool:
         """Initialize EnergyPlus handles and checks if simulation runtime is ready."""
         self.initialized = self._init_handles(state_argument) and not self.x.warmup_flag(state_argument)
@@ -319,44 +532,172 @@ class EnergyPlusEnv(gym.Env, metaclass=abc.ABCMeta):
         self.last_obs = {}
 
         self.action_space = self.get_action_space()
+
+        # frame stacking: observations are the last k observations (and optionally actions) stacked in one flat array,
+        # served from a ring buffer, see rleplus.env.frame_stack. A cheaper alternative to recurrent models
+        self.frame_stack: Optional[FrameStack] = None
+        frame_stack_config = self.env_config.get("frame_stack")
+        if frame_stack_config:
+            # number of frames, or {"num_frames": k, "actions": bool, "copy": bool}
+            if not isinstance(frame_stack_config, dict):
+                frame_stack_config = {"num_frames": frame_stack_config}
+            stack_actions = frame_stack_config.get("actions", False)
+            # without copy, observations are views of the ring buffer, only valid until the next step: for consumers
+            # which don't keep them (RLlib's sample collectors do)
+            self.frame_stack_copy = frame_stack_config.get("copy", True)
+            observation_size = int(np.prod(self.observation_space.shape))
+            action_size = len(action_bounds(self.action_space)[0]) if stack_actions else 0
+            self.frame_stack = FrameStack(
+                frame_stack_config["num_frames"], observation_size, action_size, dtype=self.observation_space.dtype
+            )
+            # action of the first frames of an episode
+            self.frame_stack_reset_action = np.clip(0, *action_bounds(self.action_space)) if stack_actions else 0
+            self.observation_space = stacked_space(
+                self.observation_space, self.frame_stack.num_frames, self.action_space if stack_actions else None
+            )
+
+        # RLlib passes an EnvContext, which tells which rollout worker / sub-environment this env is.
+        # Both indices are mixed into the seed so that workers draw independent random streams
+        self.worker_index = getattr(env_config, "worker_index", 0)
+        self.vector_index = getattr(env_config, "vector_index", 0)
+        self.seed_rng(self.env_config.get("seed"))
+
+        # model bundle: the model files are materialized from the Ray object store into a local cache of the node,
+        # and outputs (including derived IDFs and weather files) go to a directory of this worker, so that workers
+        # of a multi-node cluster need no shared storage, see rleplus.env.bundle
+        self.bundle_files: Dict[str, Any] = {}
+        model_bundle = self.env_config.get("model_bundle")
+        if model_bundle:
+            self.bundle_files = materialize_bundle(model_bundle)
+            # copied, the config may be shared by other envs of the process
+            self.env_config = copy.copy(env_config)
+            self.env_config["output"] = worker_output_dir(env_config["output"], self.vector_index)
+
         self.default_action = self.post_process_action(self.action_space.sample())
 
         self.energyplus_runner: Optional[EnergyPlusRunner] = None
+        # runner configuration the runner was created with
+        self.energyplus_runner_config: Optional[RunnerConfig] = None
         self.obs_queue: Optional[Queue] = None
         self.act_queue: Optional[Queue] = None
 
         self.reward_history = []
         self.obs_history = []
-        self.pmv_history = []
+        self._pmv_history = []
+        # number of occupant complaints raised during the last compute_reward() call
+        self.complaints = 0
 
         if reward_type in ["pmv", "human", "zero"]:
             self.reward_type = reward_type
         else:
             raise ValueError(f"Invalid reward type: {reward_type}")
-    
-        # each day is 96 timesteps (15 minutes)
-        self.episode_length = 96
+
+        # PMV of each step is a deferred metric: its inputs are recorded on each step and evaluated in one
+        # vectorized batch when the episode ends or pmv_history is read ("episode"), on each step ("step")
+        # or never ("off")
+        self.comfort_metrics = self.env_config.get("comfort_metrics", "episode")
+        if self.comfort_metrics not in ["episode", "step", "off"]:
+            raise ValueError(f"Invalid comfort metrics mode: {self.comfort_metrics}")
+        self.comfort_inputs: List[Tuple[float, float, float]] = []
+
+        # in pipeline mode, the bookkeeping of a step (history, KPIs, comfort metrics) is done during the next
+        # step, while E+ simulates the timestep. Histories then lag one step behind until the episode ends
+        self.pipeline = self.env_config.get("pipeline", False)
+        self.pending_step: Optional[Tuple[Dict[str, float], float, int]] = None
 
         self.w_file = w_file
 
-        self.runner_config = RunnerConfig(
-            epw=self.get_weather_file(),
-            idf=self.get_idf_file(),
-            output=self.env_config["output"],
-            variables=self.get_variables(),
-            meters=self.get_meters(),
-            actuators=self.get_actuators(),
-            csv=self.env_config.get("csv", False),
-            verbose=self.env_config.get("verbose", False),
-            eplus_timestep_duration=self.env_config.get("eplus_timestep_duration", 0.25),
+        # episode outputs: the outputs of variables and meters of each episode are parsed into numpy arrays (see
+        # rleplus.env.outputs) once E+ ends, and exposed as `episode_outputs` when the next episode starts or the
+        # env is closed
+        outputs_config = self.env_config.get("episode_outputs")
+        # True for defaults, or read_episode_outputs() parameters
+        self.outputs_config: Optional[Dict[str, Any]] = (
+            (outputs_config if isinstance(outputs_config, dict) else {}) if outputs_config else None
+        )
+        self.episode_outputs: Optional[EpisodeOutputs] = None
+
+        # simulation fidelity: number of E+ zone timesteps per hour. If set, a copy of the IDF with this Timestep is
+        # simulated, otherwise the IDF's own Timestep is used
+        self.timesteps_per_hour: Optional[int] = self.env_config.get("timesteps_per_hour")
+        self.runner_config = self.make_runner_config()
+        # each episode is one day, e.g. 96 timesteps of 15 minutes
+        self.episode_length = round(24 / self.runner_config.eplus_timestep_duration)
+        self.episode_start_timestep = 0
+
+        # streaming KPIs of the current episode, reported in the info dict of the last step
+        self.kpis = EpisodeKPIs(
+            meters=list(self.get_meters().keys()),
+            timestep_hours=self.runner_config.eplus_timestep_duration,
         )
 
+        # weather pool: each episode simulates a weather file sampled from a pool of EPW files and synthetic variants
+        # of them, see WeatherPool. An explicit weather file in env_config takes precedence
+        self.weather_pool: Optional[WeatherPool] = None
+        weather_pool_config = self.env_config.get("weather_pool")
+        if weather_pool_config and not self.env_config.get("epw"):
+            # a directory / list of EPW files, or WeatherPool parameters
+            if not isinstance(weather_pool_config, dict):
+                weather_pool_config = {"weather_files": weather_pool_config}
+            if "weather_pool" in self.bundle_files:
+                weather_pool_config = {**weather_pool_config, "weather_files": self.bundle_files["weather_pool"]}
+            self.weather_pool = WeatherPool(
+                **{"cache_dir": os.path.join(self.env_config["output"], "weather"), **weather_pool_config}
+            )
+
+        # start date curriculum: instead of the first day of the IDF run period, each episode simulates the day (and
+        # weather file) of the run period where the policy performed worst, see StartDateCurriculum
+        self.curriculum: Optional[StartDateCurriculum] = None
+        # (day index, weather file index) of the current episode
+        self.curriculum_choice: Optional[Tuple[int, int]] = None
+        curriculum_config = self.env_config.get("start_date_curriculum")
+        if curriculum_config:
+            # True for defaults, a metric name, or StartDateCurriculum parameters with "metric" and "weather_files"
+            if curriculum_config is True:
+                curriculum_config = {}
+            elif isinstance(curriculum_config, str):
+                curriculum_config = {"metric": curriculum_config}
+            curriculum_config = dict(curriculum_config)
+            self.curriculum_metric = curriculum_config.pop("metric", "return")
+            if self.curriculum_metric not in ["return", "discomfort", "complaints"]:
+                raise ValueError(f"Invalid curriculum metric: {self.curriculum_metric}")
+            weather_files = curriculum_config.pop("weather_files", None)
+            self.curriculum_weather_files = [str(f) for f in weather_files] if weather_files else None
+            self.run_period_start, run_period_end = read_idf_run_period(self.model_idf_file())
+            self.curriculum = StartDateCurriculum(
+                num_days=(run_period_end - self.run_period_start).days + 1,
+                num_weather_files=len(weather_files) if weather_files else 1,
+                **curriculum_config,
+            )
+
+        # fault tolerance: an EnergyPlus failure ends the episode (truncated, with the failure reported in info)
+        # instead of raising, and the next episode starts on a fresh runner, see RetryPolicy. Without it, failures
+        # raise a RuntimeError
+        self.retry_policy: Optional[RetryPolicy] = None
+        fault_tolerance = self.env_config.get("fault_tolerance")
+        if fault_tolerance:
+            # True for defaults, or RetryPolicy parameters
+            self.retry_policy = RetryPolicy(**(fault_tolerance if isinstance(fault_tolerance, dict) else {}))
+        self.last_failure: Optional[EpisodeFailure] = None
+
+        # memory metrics, reported in the info dict of the last step of an episode, see MemoryTracker
+        self.memory_tracker: Optional[MemoryTracker] = None
+        memory_metrics = self.env_config.get("memory_metrics")
+        if memory_metrics:
+            # True for defaults, or MemoryTracker parameters
+            memory_metrics = memory_metrics if isinstance(memory_metrics, dict) else {}
+            self.memory_tracker = MemoryTracker(**{"output_dir": self.env_config["output"], **memory_metrics})
+        self.num_failures = 0
+        # failures since the last completed episode, and failed starts not reported yet
+        self.consecutive_failures = 0
+        self.start_failures = 0
+
     @abc.abstractmethod
     def get_weather_file(self) -> Union[Path, str]:
         """Returns the path to a valid weather file (.epw).
 
-        This method can be used to randomize training data by providing different weather
-        files. It's called on each reset()
+        It's called when the runner configuration is made. To randomize weather files on each
+        reset(), see `env_config["weather_pool"]`.
         """
 
     @abc.abstractmethod
@@ -387,6 +728,27 @@ class EnergyPlusEnv(gym.Env, metaclass=abc.ABCMeta):
     def get_actuators(self) -> Dict[str, Tuple[str, str, str]]:
         """Returns the actuators to control during simulation."""
 
+    def get_comfort_inputs(self, obs: Dict[str, float]) -> Optional[Tuple[float, float, float]]:
+        """Returns the (air temperature, mean radiant temperature, relative humidity) of an observation,
+        used to compute comfort metrics.
+
+        Default implementation returns None: the environment doesn't track comfort.
+        """
+        return None
+
+    def uses_complaints(self) -> bool:
+        """Returns whether compute_reward() draws occupant complaints, counted in `complaints`.
+
+        Default implementation is True for the "human" reward type.
+        """
+        return self.reward_type == "human"
+
+    def get_comfort_params(self) -> Dict[str, Any]:
+        """Returns the PMV parameters other than the comfort inputs: relative air speed `vr` (m/s),
+        metabolic rate `met`, clothing insulation `clo` and `standard` (see `model.comfort.pmv_ppd_vectorized`).
+        """
+        return {"vr": 0.1, "met": 1.1, "clo": 1.4, "standard": "ISO"}
+
     def post_process_action(self, action: Union[float, List[float]]) -> Union[float, List[float]]:
         """Post-processes the action(s) before sending it to EnergyPlus.
 
@@ -395,45 +757,231 @@ class EnergyPlusEnv(gym.Env, metaclass=abc.ABCMeta):
         """
         return action
 
+    def model_idf_file(self) -> Union[Path, str]:
+        """Returns the IDF file of the model, materialized from the model bundle if any."""
+        return self.bundle_files.get("idf") or self.get_idf_file()
+
+    def get_model_files(self) -> Dict[str, Any]:
+        """Returns the model files to bundle by role: "idf", "epw" and "weather_pool" (EPW files of the weather
+        pool, if any), see `rleplus.env.bundle.make_bundle()`."""
+        files = {"idf": self.get_idf_file(), "epw": self.env_config.get("epw") or self.get_weather_file()}
+        if self.weather_pool is not None:
+            files["weather_pool"] = [weather_file for weather_file, _ in self.weather_pool.base_files]
+        return files
+
+    def make_runner_config(self) -> RunnerConfig:
+        idf = self.model_idf_file()
+        if self.timesteps_per_hour is not None:
+            idf = write_idf_with_timesteps_per_hour(idf, self.timesteps_per_hour, self.env_config["output"])
+
+        return RunnerConfig(
+            # an explicit weather file in env_config takes precedence (used for evaluation)
+            epw=self.env_config.get("epw") or self.bundle_files.get("epw") or self.get_weather_file(),
+            idf=idf,
+            output=self.env_config["output"],
+            variables=self.get_variables(),
+            meters=self.get_meters(),
+            actuators=self.get_actuators(),
+            csv=self.env_config.get("csv", False),
+            verbose=self.env_config.get("verbose", False),
+            outputs=self.outputs_config,
+            specialize_callbacks=self.env_config.get("specialize_callbacks", True),
+        )
+
+    def make_episode_runner_config(self) -> RunnerConfig:
+        """Returns the runner configuration of the next episode, with its start day and weather file sampled from the
+        curriculum and weather pool, if any."""
+        changes = {}
+        if self.weather_pool is not None:
+            changes["epw"] = self.weather_pool.sample(self.np_random)
+        if self.curriculum is not None:
+            day, weather_file = self.curriculum_choice = self.curriculum.sample(self.np_random)
+            changes["idf"] = write_idf_with_run_period(
+                self.runner_config.idf, self.run_period_start + timedelta(days=day), self.env_config["output"]
+            )
+            if self.curriculum_weather_files is not None:
+                changes["epw"] = self.curriculum_weather_files[weather_file]
+        return replace(self.runner_config, **changes) if changes else self.runner_config
+
+    def curriculum_score(self, kpis: Dict[str, float]) -> float:
+        """Scores a finished episode for the start date curriculum, the worse the policy did the higher.
+
+        Can be overridden to prioritize on other signals, e.g. TD errors reported by the learner.
+        """
+        if self.curriculum_metric == "return":
+            return -kpis["reward_total"]
+        if self.curriculum_metric == "discomfort":
+            return kpis["discomfort_ratio"]
+        return kpis["complaints"]
+
+    def set_fidelity(self, timesteps_per_hour: Optional[int]) -> None:
+        """Sets the number of E+ timesteps per hour (None for the IDF's own), starting from the next episode.
+
+        Coarse timesteps make episodes shorter and cheaper to simulate, e.g. to train on 1 timestep per hour first
+        and switch to the IDF's fine resolution later on.
+        """
+        if timesteps_per_hour == self.timesteps_per_hour:
+            return
+        self.timesteps_per_hour = timesteps_per_hour
+        self.runner_config = self.make_runner_config()
+
+    def seed_rng(self, seed: Optional[int] = None) -> None:
+        """Seeds the env random number generator (`np_random`) and the action/observation spaces.
+
+        The seed is combined with the worker and vector indices. If seed is None, fresh entropy is
+        used.
+        """
+        seed_seq = np.random.SeedSequence(seed, spawn_key=(self.worker_index, self.vector_index))
+        self._np_random = np.random.Generator(np.random.PCG64(seed_seq))
+
+        action_seed, obs_seed = seed_seq.spawn(2)
+        self.action_space.seed(int(action_seed.generate_state(1)[0]))
+        self.observation_space.seed(int(obs_seed.generate_state(1)[0]))
+
+        # discard draws made from the previous generator
+        self.uniforms = np.empty(0)
+        self.uniforms_pos = 0
+
+    def uniform_draws(self, n: int) -> np.ndarray:
+        """Returns n uniform draws in [0, 1) from the env random number generator.
+
+        Draws are generated by episode-sized blocks (n draws per timestep for the whole episode), so
+        that reward functions drawing a few numbers per step don't pay the generator call overhead
+        on each step.
+        """
+        if self.uniforms_pos + n > len(self.uniforms):
+            self.uniforms = self.np_random.random(max(n, 1) * self.episode_length)
+            self.uniforms_pos = 0
+
+        draws = self.uniforms[self.uniforms_pos : self.uniforms_pos + n]
+        self.uniforms_pos += n
+        return draws
+
     def reset(self, *, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None):
         print("Episode:", self.episode, " finised at Timestep:", self.timestep)
-        
+
+        if seed is not None:
+            self.seed_rng(seed)
+
         self.episode += 1
+        self.episode_start_timestep = self.timestep
         self.last_obs = self.observation_space.sample()
 
+        # apply fidelity changes (see set_fidelity())
+        self.episode_length = round(24 / self.runner_config.eplus_timestep_duration)
+        self.kpis.timestep_hours = self.runner_config.eplus_timestep_duration
+
         # reset history
         self.reward_history = []
         self.obs_history = []
-        self.pmv_history = []
+        self._pmv_history = []
+        self.comfort_inputs = []
+        self.pending_step = None
+        self.kpis.reset()
 
         if self.energyplus_runner is not None:
             self.energyplus_runner.stop()
+            if self.outputs_config is not None:
+                self.episode_outputs = self.energyplus_runner.episode_outputs()
+
+        while True:
+            if self.consecutive_failures > 0 and self.retry_policy is not None:
+                time.sleep(self.retry_policy.delay(self.consecutive_failures))
+            failure = self.start_episode()
+            if failure is None:
+                break
+            # raises if out of retries
+            self.handle_failure(failure)
+            self.start_failures += 1
+
+        return self.observation(self.last_obs, reset=True), {}
+
+    def start_episode(self) -> Optional[EpisodeFailure]:
+        """Starts the simulation of the current episode and waits for its first observation.
 
+        Returns the failure if E+ failed to start (or an I/O error occurred), None otherwise.
+        """
         # observations and actions queues for flow control
         # queues have a default max size of 1
         # as only 1 E+ timestep is processed at a time
         self.obs_queue = Queue(maxsize=1)
         self.act_queue = Queue(maxsize=1)
 
-        # Generate random date and set it as the start and end date
-        # start_date = datetime(2022, 1, 1) + timedelta(days=random.randint(0, 364))
-        # end_date = start_date
-
-        # Update runner_config with new dates - gives error :(
-        # self.runner_config['start_date'] = start_date.strftime('%m/%d/%Y')
-        # self.runner_config['end_date'] = end_date.strftime('%m/%d/%Y')
-
-        self.energyplus_runner = EnergyPlusRunner(
-            episode=self.episode,
-            obs_queue=self.obs_queue,
-            act_queue=self.act_queue,
-            runner_config=self.runner_config,
+        output_dir = None
+        try:
+            # the runner (E+ API instance and state) is created once and reused across episodes, unless its
+            # configuration changed. Curriculum start days and weather files only change the files simulated by the
+            # runner
+            if self.energyplus_runner is not None and self.energyplus_runner_config is not self.runner_config:
+                self.energyplus_runner.close()
+                self.energyplus_runner = None
+            episode_runner_config = self.make_episode_runner_config()
+            if self.energyplus_runner is None:
+                self.energyplus_runner = EnergyPlusRunner(
+                    episode=self.episode,
+                    obs_queue=self.obs_queue,
+                    act_queue=self.act_queue,
+                    runner_config=episode_runner_config,
+                )
+                self.energyplus_runner_config = self.runner_config
+            else:
+                self.energyplus_runner.reset_episode(
+                    self.episode, self.obs_queue, self.act_queue, episode_runner_config
+                )
+            output_dir = self.energyplus_runner.output_dir
+            self.energyplus_runner.start()
+
+            # wait until E+ is ready.
+            obs = self.energyplus_runner.init_exchange(default_action=self.default_action)
+        except OSError as e:
+            return classify_failure(self.episode, None, output_dir, error=e)
+
+        if obs is None:
+            # E+ ended before the first observation
+            sim_results = self.energyplus_runner.sim_results
+            return classify_failure(self.episode, sim_results.get("exit_code"), output_dir, sim_results.get("error"))
+        self.last_obs = obs
+        return None
+
+    def handle_failure(self, failure: EpisodeFailure) -> None:
+        """Tears down the runner of a failed episode and keeps its output directory.
+
+        Raises a RuntimeError without fault tolerance, or once out of retries.
+        """
+        self.num_failures += 1
+        self.consecutive_failures += 1
+        self.last_failure = failure
+        # the failed E+ state isn't reused: the next episode starts on a fresh runner
+        if self.energyplus_runner is not None:
+            self.energyplus_runner.close()
+            self.energyplus_runner = None
+        keep_failed_output(failure)
+
+        description = f"EnergyPlus failed with {failure.exit_code} ({failure.kind}) on episode {failure.episode}"
+        if failure.message:
+            description += f": {failure.message}"
+        if self.retry_policy is None or not self.retry_policy.allows(self.consecutive_failures, self.num_failures):
+            raise RuntimeError(description)
+        print(f"{description}. Output kept in {failure.output_dir}, restarting (failure {self.consecutive_failures})")
+
+    def fail_episode(self, action=None):
+        """Ends the current episode after an E+ failure, as truncated, and reports the failure in info."""
+        sim_results = self.energyplus_runner.sim_results
+        failure = classify_failure(
+            self.episode, sim_results.get("exit_code"), self.energyplus_runner.output_dir, sim_results.get("error")
         )
-        self.energyplus_runner.start()
+        self.handle_failure(failure)
 
-        # wait until E+ is ready.
-        self.last_obs = obs = self.energyplus_runner.init_exchange(default_action=self.default_action)
-        return np.array(list(obs.values())), {}
+        info = {"complaints": 0, "failure": asdict(failure), "kpis": self.episode_kpis(failed=True)}
+        return self.observation(self.last_obs, action), 0.0, False, True, info
+
+    def episode_kpis(self, failed: bool = False) -> Dict[str, float]:
+        """KPIs of the finished episode, with the number of failed starts before it and whether it failed."""
+        kpis = self.kpis.as_dict()
+        kpis["episode_failed"] = int(failed)
+        kpis["start_failures"] = self.start_failures
+        self.start_failures = 0
+        return kpis
 
     def step(self, action):
         self.timestep += 1
@@ -441,7 +989,7 @@ class EnergyPlusEnv(gym.Env, metaclass=abc.ABCMeta):
 
         # check for simulation errors
         if self.energyplus_runner.failed():
-            raise RuntimeError(f"EnergyPlus failed with {self.energyplus_runner.sim_results['exit_code']}")
+            return self.fail_episode(action)
 
         # simulation_complete is likely to happen after last env step()
         # is called, hence leading to waiting on queue for a timeout
@@ -451,6 +999,7 @@ class EnergyPlusEnv(gym.Env, metaclass=abc.ABCMeta):
         else:
             # post-process action
             action_to_apply = self.post_process_action(action)
+            self.kpis.update_setpoint(float(action_to_apply))
             # do not post-process action
             # action_to_apply = action
 
@@ -463,6 +1012,8 @@ class EnergyPlusEnv(gym.Env, metaclass=abc.ABCMeta):
             timeout = 2
             try:
                 self.act_queue.put(action_to_apply, timeout=timeout)
+                # E+ is simulating the timestep, meanwhile record the previous step (pipeline mode)
+                self.record_pending_step()
                 obs = self.obs_queue.get(timeout=timeout)
             except (Full, Empty):
                 obs = None
@@ -470,6 +1021,8 @@ class EnergyPlusEnv(gym.Env, metaclass=abc.ABCMeta):
 
             # obs can be None if E+ simulation is complete
             # this materializes by either an empty queue or a None value received from queue
+            if obs is None and self.energyplus_runner.failed():
+                return self.fail_episode(action)
             if obs is None:
                 done = True
                 obs = self.last_obs
@@ -477,30 +1030,106 @@ class EnergyPlusEnv(gym.Env, metaclass=abc.ABCMeta):
                 self.last_obs = obs
 
             # finish episode if episode_length is reached
-            if self.timestep % self.episode_length == 0 and self.timestep > 0:
+            if self.timestep - self.episode_start_timestep >= self.episode_length:
                 done = True
 
         # compute reward
+        self.complaints = 0
         reward = self.compute_reward(obs)
 
-        # compute pmv
-        _pmv = pmv(tdb=obs["air_tmp"], tr=obs["rad_tmp"], vr=0.1, rh=obs["air_hum"], met=1.1, clo=1.4)
-
-        # store history
-        self.reward_history.append(reward)
-        self.obs_history.append(obs)
-        self.pmv_history.append(_pmv)
+        # store history, update KPIs and comfort metrics (during the next step in pipeline mode)
+        self.record_pending_step()
+        if self.pipeline and not done:
+            self.pending_step = (obs, reward, self.complaints)
+        else:
+            self.record_step(obs, reward, self.complaints, done)
 
+        info = {"complaints": self.complaints}
         if done:
             self.save_history("./tmp/history.pkl")
+            info["kpis"] = self.episode_kpis()
+            self.consecutive_failures = 0
+            if self.memory_tracker is not None and self.memory_tracker.due(self.episode):
+                info["memory"] = self.memory_metrics()
+            if self.curriculum_choice is not None:
+                self.curriculum.update(*self.curriculum_choice, self.curriculum_score(info["kpis"]))
+                self.curriculum_choice = None
 
         # print("obs", obs, "reward", reward, "done", done, "action", action)
+        return self.observation(obs, action), reward, done, False, info
+
+    def observation(self, obs: Dict[str, float], action=None, reset: bool = False) -> np.ndarray:
+        """Returns the observation array of an E+ observation, and the action that led to it.
+
+        With frame stacking, the observation is stacked with the previous ones (the first one of an episode on
+        `reset`, repeated).
+        """
         obs_vec = np.array(list(obs.values()))
-        return obs_vec, reward, done, False, {}
+        if self.frame_stack is None:
+            return obs_vec
+        if reset:
+            self.frame_stack.reset(obs_vec, self.frame_stack_reset_action)
+        else:
+            self.frame_stack.push(obs_vec, action)
+        return self.frame_stack.stacked(copy=self.frame_stack_copy)
+
+    def memory_metrics(self) -> Dict[str, float]:
+        """Memory metrics of the process, with objects the env holds that should not grow across episodes."""
+        return self.memory_tracker.report(
+            live_runners=lambda: len(EnergyPlusRunner.instances),
+            live_states=EnergyPlusRunner.live_states,
+            energyplus_threads=count_threads("energyplus-episode-"),
+            history_items=len(self.obs_history) + len(self.reward_history) + len(self._pmv_history),
+            queued=self.obs_queue.qsize() + self.act_queue.qsize(),
+        )
+
+    def record_step(self, obs: Dict[str, float], reward: float, complaints: int, done: bool) -> None:
+        """Stores a step in history and accounts for it in episode KPIs and comfort metrics."""
+        self.reward_history.append(reward)
+        self.obs_history.append(obs)
+
+        self.kpis.update(obs, reward, complaints)
+
+        # record comfort inputs, PMV is computed in batch
+        if self.comfort_metrics != "off":
+            comfort_inputs = self.get_comfort_inputs(obs)
+            if comfort_inputs is not None:
+                self.comfort_inputs.append(comfort_inputs)
+            if self.comfort_metrics == "step" or done:
+                self.flush_comfort_metrics()
+
+    def record_pending_step(self) -> None:
+        """Records the step deferred in pipeline mode, if any."""
+        if self.pending_step is not None:
+            pending_step, self.pending_step = self.pending_step, None
+            self.record_step(*pending_step, done=False)
+
+    @property
+    def pmv_history(self) -> List[float]:
+        """PMV of each step of the current episode (nan outside of the PMV model validity range)."""
+        self.record_pending_step()
+        self.flush_comfort_metrics()
+        return self._pmv_history
+
+    def flush_comfort_metrics(self) -> None:
+        """Computes the PMV of all recorded comfort inputs in a single vectorized call."""
+        if len(self.comfort_inputs) == 0:
+            return
+
+        tdb, tr, rh = np.array(self.comfort_inputs, dtype=np.float64).T
+        self.comfort_inputs = []
+        pmvs = pmv_ppd_vectorized(tdb=tdb, tr=tr, rh=rh, **self.get_comfort_params())["pmv"].tolist()
+
+        self._pmv_history.extend(pmvs)
+        for _pmv in pmvs:
+            self.kpis.update_pmv(_pmv)
 
     def close(self):
         if self.energyplus_runner is not None:
-            self.energyplus_runner.stop()
+            self.energyplus_runner.close()
+            if self.outputs_config is not None:
+                self.episode_outputs = self.energyplus_runner.episode_outputs()
+            self.energyplus_runner = None
 
     def render(self, mode="human"):
         pass
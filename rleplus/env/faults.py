@@ -0,0 +1,109 @@
+"""Classification of failed EnergyPlus episodes, and the retry policy restarting them."""
+import errno
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+# failure kinds, see classify_failure()
+DISK_FULL = "disk_full"
+IO_ERROR = "io_error"
+FATAL_ERROR = "fatal_error"
+NO_OUTPUT = "no_output"
+EXIT_CODE = "exit_code"
+
+
+@dataclass
+class EpisodeFailure:
+    """A failed episode (or episode start)."""
+
+    episode: int
+    # one of the failure kinds above
+    kind: str
+    # exit code of EnergyPlus, None if it didn't exit (e.g. failed to start)
+    exit_code: Optional[int]
+    # output directory of the episode, kept for diagnosis
+    output_dir: Optional[str]
+    message: str = ""
+
+
+def read_fatal_errors(output_dir: Union[Path, str], max_lines: int = 5) -> str:
+    """Returns the first severe / fatal error lines of an episode's `eplusout.err`, if any."""
+    err_file = Path(output_dir) / "eplusout.err"
+    if not err_file.exists():
+        return ""
+    lines = []
+    with open(err_file, errors="replace") as f:
+        for line in f:
+            if "** Severe  **" in line or "**  Fatal  **" in line:
+                lines.append(line.strip())
+                if len(lines) == max_lines:
+                    break
+    return "\n".join(lines)
+
+
+def classify_failure(
+    episode: int,
+    exit_code: Optional[int],
+    output_dir: Optional[str],
+    error: Optional[BaseException] = None,
+) -> EpisodeFailure:
+    """Classifies a failed episode from the EnergyPlus exit code, the exception raised (if any) and E+ error file."""
+    message = read_fatal_errors(output_dir) if output_dir is not None else ""
+    if isinstance(error, OSError):
+        kind = DISK_FULL if error.errno == errno.ENOSPC else IO_ERROR
+        message = str(error)
+    elif "No space left on device" in message:
+        kind = DISK_FULL
+    elif "Fatal" in message:
+        kind = FATAL_ERROR
+    elif exit_code is None or exit_code == 0:
+        # E+ ended before sending the first observation
+        kind = NO_OUTPUT
+        message = message or str(error or "")
+    else:
+        kind = EXIT_CODE
+    return EpisodeFailure(episode=episode, kind=kind, exit_code=exit_code, output_dir=output_dir, message=message)
+
+
+def keep_failed_output(failure: EpisodeFailure) -> None:
+    """Renames the output directory of a failed episode with a `-failed` suffix, so that it's easy to find."""
+    if failure.output_dir is None or not os.path.isdir(failure.output_dir):
+        return
+    failed_dir = f"{failure.output_dir}-failed"
+    try:
+        os.replace(failure.output_dir, failed_dir)
+        failure.output_dir = failed_dir
+    except OSError:
+        # e.g. an existing failed directory of a previous run: kept in place
+        pass
+
+
+@dataclass
+class RetryPolicy:
+    """Budget and backoff of episode restarts after EnergyPlus failures.
+
+    Up to `max_retries` consecutive failures (of episode starts or during episodes) are retried, waiting
+    `backoff * 2 ** (n - 1)` seconds (at most `max_backoff`) before the n-th consecutive retry. An episode completed
+    without failure resets the count. `max_failures` bounds the total number of failures over the env's lifetime
+    (unbounded if None).
+    """
+
+    max_retries: int = 3
+    backoff: float = 1.0
+    max_backoff: float = 60.0
+    max_failures: Optional[int] = None
+
+    def __post_init__(self):
+        assert self.max_retries >= 0, "max_retries must be >= 0"
+        assert self.backoff >= 0.0 and self.max_backoff >= 0.0, "backoff must be >= 0"
+
+    def allows(self, consecutive_failures: int, total_failures: int) -> bool:
+        """Whether to retry after `consecutive_failures` failures in a row, `total_failures` in total."""
+        if self.max_failures is not None and total_failures > self.max_failures:
+            return False
+        return consecutive_failures <= self.max_retries
+
+    def delay(self, consecutive_failures: int) -> float:
+        """Seconds to wait before retrying after `consecutive_failures` failures in a row (the first one is 1)."""
+        return min(self.backoff * 2 ** max(consecutive_failures - 1, 0), self.max_backoff)
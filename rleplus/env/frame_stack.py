@@ -0,0 +1,80 @@
+"""Frame stacking: observations of the last k steps (optionally with their actions) as a single flat array.
+
+A cheaper alternative to recurrent models (`--use-lstm`, Pearl's `LSTMHistorySummarizationModule`) to give a
+feed-forward policy recent thermal dynamics. Frames are stored in a preallocated ring buffer: each step writes one
+frame, the stacked observation is a strided view of the buffer, and no history is shifted or concatenated.
+"""
+from typing import Optional, Tuple
+
+import gymnasium as gym
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+def action_bounds(action_space: gym.Space) -> Tuple[np.ndarray, np.ndarray]:
+    """Bounds of the flattened actions of a Discrete (the action index) or Box action space."""
+    if isinstance(action_space, gym.spaces.Discrete):
+        return np.array([action_space.start]), np.array([action_space.start + action_space.n - 1])
+    if isinstance(action_space, gym.spaces.Box):
+        return action_space.low.reshape(-1), action_space.high.reshape(-1)
+    raise ValueError(f"Unsupported action space for frame stacking: {action_space}")
+
+
+def stacked_space(
+    observation_space: gym.spaces.Box, num_frames: int, action_space: Optional[gym.Space] = None
+) -> gym.spaces.Box:
+    """Space of `num_frames` stacked frames, oldest first, each frame being an observation followed by its action
+    (with `action_space`)."""
+    low, high = observation_space.low.reshape(-1), observation_space.high.reshape(-1)
+    if action_space is not None:
+        action_low, action_high = action_bounds(action_space)
+        low, high = np.concatenate([low, action_low]), np.concatenate([high, action_high])
+    return gym.spaces.Box(low=np.tile(low, num_frames), high=np.tile(high, num_frames), dtype=observation_space.dtype)
+
+
+class FrameStack:
+    """Last `num_frames` frames of `observation_size` values (followed by `action_size` values) in a ring buffer.
+
+    Each frame is written twice, at `position` and `position + num_frames` of a buffer of `2 * num_frames` rows, so
+    that the last `num_frames` frames are always contiguous. `windows` is a read-only strided view of the buffer,
+    its row `position` being the flattened frames from the oldest to the last one.
+    """
+
+    def __init__(self, num_frames: int, observation_size: int, action_size: int = 0, dtype=np.float32):
+        assert num_frames > 0, "num_frames must be > 0"
+        self.num_frames = num_frames
+        self.observation_size = observation_size
+        self.action_size = action_size
+        frame_size = observation_size + action_size
+        self.buffer = np.zeros((2 * num_frames, frame_size), dtype=dtype)
+        itemsize = self.buffer.itemsize
+        self.windows = as_strided(
+            self.buffer,
+            shape=(num_frames, num_frames * frame_size),
+            strides=(frame_size * itemsize, itemsize),
+            writeable=False,
+        )
+        # index of the oldest frame, overwritten by the next push
+        self.position = 0
+
+    def _write(self, row: int, observation: np.ndarray, action) -> None:
+        self.buffer[row, : self.observation_size] = observation
+        if self.action_size:
+            self.buffer[row, self.observation_size :] = np.reshape(action, -1)
+
+    def reset(self, observation: np.ndarray, action=0) -> None:
+        """Fills all frames with the first observation of an episode (and an action, 0 by default)."""
+        self._write(0, observation, action)
+        self.buffer[1:] = self.buffer[0]
+        self.position = 0
+
+    def push(self, observation: np.ndarray, action=0) -> None:
+        """Appends a frame: an observation and the action that led to it. The oldest frame is dropped."""
+        self._write(self.position, observation, action)
+        self.buffer[self.position + self.num_frames] = self.buffer[self.position]
+        self.position = (self.position + 1) % self.num_frames
+
+    def stacked(self, copy: bool = True) -> np.ndarray:
+        """Stacked frames, oldest first. Without `copy`, a read-only view only valid until the next push or reset."""
+        window = self.windows[self.position]
+        return window.copy() if copy else window
@@ -0,0 +1,169 @@
+"""Streaming building KPIs, updated in O(1) per step."""
+import math
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# PMV comfort band, as recommended by ISO 7730 category B / ASHRAE 55
+PMV_COMFORT_LIMIT = 0.5
+
+
+class P2Quantile:
+    """Streaming quantile estimator using the P² algorithm.
+
+    Keeps 5 markers whose heights track the min, p/2, p, (1+p)/2 quantiles and the max, adjusted
+    with piecewise-parabolic interpolation. Memory and update cost are constant.
+
+    See: R. Jain and I. Chlamtac, "The P² algorithm for dynamic calculation of quantiles and
+    histograms without storing observations", Communications of the ACM, 1985.
+    """
+
+    def __init__(self, p: float):
+        assert 0.0 < p < 1.0, "quantile must be in (0, 1)"
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1.0, 1.0 + 2.0 * p, 1.0 + 4.0 * p, 3.0 + 2.0 * p, 5.0]
+        self.increments = [0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0]
+
+    def update(self, x: float) -> None:
+        self.count += 1
+        q, n = self.heights, self.positions
+
+        # initialization: the first 5 observations are the markers
+        if self.count <= 5:
+            q.append(x)
+            if self.count == 5:
+                q.sort()
+            return
+
+        # find cell k such that q[k] <= x < q[k+1], adjusting extreme markers
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # adjust heights of the middle markers if they are off their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1.0 and n[i + 1] - n[i] > 1) or (d <= -1.0 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> float:
+        if self.count == 0:
+            return math.nan
+        if self.count < 5:
+            # not enough observations yet: exact quantile of what we have
+            ordered = sorted(self.heights)
+            return ordered[int(round(self.p * (len(ordered) - 1)))]
+        return self.heights[2]
+
+
+class EpisodeKPIs:
+    """Building KPIs accumulated over an episode.
+
+    Tracks rewards, meter energy (total, per meter and peak per timestep), PMV mean and quantiles,
+    time spent outside the ±0.5 PMV comfort band, occupant complaints and setpoint changes. No
+    per-step history is retained.
+    """
+
+    def __init__(
+        self,
+        meters: Sequence[str],
+        timestep_hours: float = 0.25,
+        quantiles: Iterable[float] = (0.05, 0.5, 0.95),
+        setpoint_tolerance: float = 1e-3,
+    ):
+        self.meters = list(meters)
+        self.timestep_hours = timestep_hours
+        self.quantile_levels = list(quantiles)
+        self.setpoint_tolerance = setpoint_tolerance
+        self.reset()
+
+    def reset(self) -> None:
+        self.steps = 0
+        self.reward_total = 0.0
+        self.energy_totals = {meter: 0.0 for meter in self.meters}
+        self.energy_peak = 0.0
+        self.pmv_count = 0
+        self.pmv_sum = 0.0
+        self.pmv_abs_sum = 0.0
+        self.pmv_invalid = 0
+        self.pmv_quantiles = [P2Quantile(p) for p in self.quantile_levels]
+        self.discomfort_steps = 0
+        self.complaints = 0
+        self.setpoint_changes = 0
+        self.last_setpoint: Optional[float] = None
+
+    def update(self, obs: Dict[str, float], reward: float, complaints: int = 0) -> None:
+        """Accounts for one environment step."""
+        self.steps += 1
+        self.reward_total += reward
+        self.complaints += complaints
+
+        step_energy = 0.0
+        for meter in self.meters:
+            self.energy_totals[meter] += obs[meter]
+            step_energy += obs[meter]
+        self.energy_peak = max(self.energy_peak, step_energy)
+
+    def update_pmv(self, pmv: float) -> None:
+        """Accounts for the PMV of one step. NaN values (inputs outside the model's validity
+        range) count as discomfort but are excluded from PMV statistics."""
+        if math.isnan(pmv):
+            self.pmv_invalid += 1
+            self.discomfort_steps += 1
+            return
+
+        self.pmv_count += 1
+        self.pmv_sum += pmv
+        self.pmv_abs_sum += abs(pmv)
+        for quantile in self.pmv_quantiles:
+            quantile.update(pmv)
+        if abs(pmv) > PMV_COMFORT_LIMIT:
+            self.discomfort_steps += 1
+
+    def update_setpoint(self, setpoint: float) -> None:
+        """Accounts for the setpoint applied during one step, counting changes."""
+        if self.last_setpoint is not None and abs(setpoint - self.last_setpoint) > self.setpoint_tolerance:
+            self.setpoint_changes += 1
+        self.last_setpoint = setpoint
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "steps": self.steps,
+            "reward_total": self.reward_total,
+            "energy_total": sum(self.energy_totals.values()),
+            "energy_peak": self.energy_peak,
+            **{f"energy_total_{meter}": total for meter, total in self.energy_totals.items()},
+            "pmv_mean": self.pmv_sum / self.pmv_count if self.pmv_count else math.nan,
+            "pmv_abs_mean": self.pmv_abs_sum / self.pmv_count if self.pmv_count else math.nan,
+            **{f"pmv_p{round(q.p * 100):02d}": q.value() for q in self.pmv_quantiles},
+            "pmv_invalid": self.pmv_invalid,
+            "discomfort_hours": self.discomfort_steps * self.timestep_hours,
+            "discomfort_ratio": self.discomfort_steps / self.steps if self.steps else math.nan,
+            "complaints": self.complaints,
+            "setpoint_changes": self.setpoint_changes,
+        }
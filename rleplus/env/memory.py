@@ -0,0 +1,106 @@
+"""Memory accounting of environments, to find what grows over long runs.
+
+`MemoryTracker` reports, every few episodes, the process resident memory, the allocations traced by
+`tracemalloc` grouped by module of the project, objects that should not accumulate (live runners, E+ states and
+threads, history items, queued observations) and the size of the simulation outputs on disk.
+"""
+import gc
+import os
+import threading
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+# root of the project (rleplus and model packages), allocations traced in files below it are grouped by module
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def rss_mb() -> float:
+    """Resident memory of the current process, in MB (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+
+
+def dir_size_mb(path: Union[Path, str]) -> float:
+    """Total size of the files below a directory, in MB."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                # removed meanwhile, e.g. by another worker
+                pass
+    return total / 1024**2
+
+
+def count_threads(prefix: str) -> int:
+    """Number of live threads whose name starts with `prefix`."""
+    return sum(1 for thread in threading.enumerate() if thread.name.startswith(prefix))
+
+
+def module_name(filename: str) -> Optional[str]:
+    """Project module of a source file, e.g. `rleplus.env.energyplus`, None outside of the project."""
+    try:
+        relative = Path(filename).resolve().relative_to(PROJECT_ROOT)
+    except ValueError:
+        return None
+    return ".".join(relative.with_suffix("").parts)
+
+
+def traced_by_module(snapshot: tracemalloc.Snapshot, top: int) -> Dict[str, float]:
+    """Traced memory (MB) of the `top` project modules holding the most memory, and of everything else."""
+    by_module: Dict[str, float] = {}
+    other = 0.0
+    for stat in snapshot.statistics("filename"):
+        module = module_name(stat.traceback[0].filename)
+        if module is None:
+            other += stat.size
+        else:
+            by_module[module] = by_module.get(module, 0.0) + stat.size
+    largest = sorted(by_module.items(), key=lambda item: item[1], reverse=True)
+    metrics = {f"traced_{module}_mb": size / 1024**2 for module, size in largest[:top]}
+    metrics["traced_other_mb"] = (other + sum(size for _, size in largest[top:])) / 1024**2
+    return metrics
+
+
+class MemoryTracker:
+    """Reports memory metrics every `every` episodes.
+
+    Args:
+        every: number of episodes between two reports.
+        tracemalloc_top: number of project modules reported with their traced memory. 0 disables tracemalloc,
+            which slows allocations down.
+        output_dir: simulation outputs directory whose size is reported, None to skip it (walking a large
+            directory is slow).
+        collect: run the garbage collector before each report, so that objects only waiting for a collection
+            (e.g. runners in reference cycles with their E+ callbacks) aren't counted as live.
+    """
+
+    def __init__(
+        self, every: int = 1, tracemalloc_top: int = 0, output_dir: Optional[str] = None, collect: bool = False
+    ):
+        assert every >= 1, "every must be >= 1"
+        self.every = every
+        self.tracemalloc_top = tracemalloc_top
+        self.output_dir = output_dir
+        self.collect = collect
+        if tracemalloc_top > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def due(self, episode: int) -> bool:
+        return episode % self.every == 0
+
+    def report(self, **counts: Union[float, Callable[[], float]]) -> Dict[str, float]:
+        """Memory metrics, with `counts` of objects held by the caller (e.g. history items), given as values or
+        functions evaluated after the garbage collection."""
+        if self.collect:
+            gc.collect()
+        counts = {name: count() if callable(count) else count for name, count in counts.items()}
+        metrics = {"rss_mb": rss_mb(), "threads": threading.active_count(), **counts}
+        if self.output_dir is not None and os.path.isdir(self.output_dir):
+            metrics["output_mb"] = dir_size_mb(self.output_dir)
+        if self.tracemalloc_top > 0 and tracemalloc.is_tracing():
+            metrics["traced_mb"] = tracemalloc.get_traced_memory()[0] / 1024**2
+            metrics.update(traced_by_module(tracemalloc.take_snapshot(), self.tracemalloc_top))
+        return {name: float(value) for name, value in metrics.items()}
@@ -0,0 +1,267 @@
+"""Streaming readers of EnergyPlus outputs (`eplusout.csv` or `eplusout.eso`) into numpy columns.
+
+Output files are read line by line, only the selected columns being kept, as compact arrays. Columns are
+selected by output labels, e.g. `ENVIRONMENT:SITE OUTDOOR AIR DRYBULB TEMPERATURE` for a variable or
+`ELECTRICITY:HVAC` for a meter, see `output_columns()` to select those of an environment's variables and meters.
+
+Rows keep their simulation environment (e.g. sizing periods, then the run period) and timestamp (month, day,
+minutes since midnight, 24:00 being 1440). Parsed outputs can be cached as an `.npz` file next to the episode
+output directory, see `read_episode_outputs()`.
+"""
+import os
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+# reporting frequency of the outputs read by default
+TIMESTEP = "TimeStep"
+# ESO data dictionary ids of the environment and timestep / hourly timestamp records
+ESO_ENVIRONMENT_ID = "1"
+ESO_TIMESTAMP_ID = "2"
+# a gap larger than the longest E+ timestep between two CSV rows starts a new environment
+MAX_TIMESTEP_MINUTES = 60
+
+
+def output_columns(variables: Dict[str, Tuple[str, str]], meters: Dict[str, str]) -> Dict[str, str]:
+    """Output labels of an environment's variables and meters, by column name (e.g. `get_variables()` keys)."""
+    columns = {name: f"{key}:{variable}".upper() for name, (variable, key) in variables.items()}
+    columns.update({name: meter.upper() for name, meter in meters.items()})
+    return columns
+
+
+@dataclass
+class EpisodeOutputs:
+    """Outputs of a simulation: one value per row and column, with the environment and timestamp of each row."""
+
+    columns: Dict[str, np.ndarray]
+    # index of the simulation environment of each row (sizing periods first, run period last)
+    environments: np.ndarray
+    month: np.ndarray
+    day: np.ndarray
+    # minutes since midnight at the end of the timestep (1..1440)
+    minutes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.environments)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @property
+    def num_environments(self) -> int:
+        return int(self.environments.max()) + 1 if len(self) else 0
+
+    def environment(self, index: int = -1) -> "EpisodeOutputs":
+        """Rows of a single environment, by default the last one (the run period)."""
+        if index < 0:
+            index += self.num_environments
+        rows = self.environments == index
+        return EpisodeOutputs(
+            columns={name: values[rows] for name, values in self.columns.items()},
+            environments=self.environments[rows],
+            month=self.month[rows],
+            day=self.day[rows],
+            minutes=self.minutes[rows],
+        )
+
+    def timestamps(self, year: int = 2001) -> np.ndarray:
+        """Timestamps of rows (end of timestep), as datetime64[m]. Outputs don't record the year."""
+        dates = np.array([f"{year:04d}-{m:02d}-{d:02d}" for m, d in zip(self.month, self.day)], dtype="datetime64[m]")
+        return dates + self.minutes.astype("timedelta64[m]")
+
+    def save(self, path: Union[Path, str], source_stamp: Tuple[float, int] = (0.0, 0)) -> None:
+        """Saves to an uncompressed `.npz` file, with the modification time and size of the parsed output file."""
+        tmp_file = f"{path}.tmp.npz"
+        np.savez(
+            tmp_file,
+            environments=self.environments,
+            month=self.month,
+            day=self.day,
+            minutes=self.minutes,
+            source_stamp=np.array(source_stamp, dtype=np.float64),
+            **{f"column:{name}": values for name, values in self.columns.items()},
+        )
+        os.replace(tmp_file, path)
+
+    @staticmethod
+    def load(path: Union[Path, str]) -> Tuple["EpisodeOutputs", Tuple[float, int]]:
+        """Loads outputs saved with `save()`, and the stamp of the output file they were parsed from."""
+        with np.load(path) as data:
+            outputs = EpisodeOutputs(
+                columns={key[len("column:") :]: data[key] for key in data.files if key.startswith("column:")},
+                environments=data["environments"],
+                month=data["month"],
+                day=data["day"],
+                minutes=data["minutes"],
+            )
+            mtime, size = data["source_stamp"]
+        return outputs, (float(mtime), int(size))
+
+
+class _ColumnsBuilder:
+    """Accumulates rows into compact arrays."""
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        self.values = {name: array("d") for name in names}
+        self.environments, self.month, self.day, self.minutes = array("h"), array("b"), array("b"), array("h")
+
+    def add_row(self, environment: int, month: int, day: int, minutes: int) -> None:
+        self.environments.append(environment)
+        self.month.append(month)
+        self.day.append(day)
+        self.minutes.append(minutes)
+        for values in self.values.values():
+            values.append(np.nan)
+
+    def set(self, name: str, value: float) -> None:
+        self.values[name][-1] = value
+
+    def build(self, dtype: np.dtype) -> EpisodeOutputs:
+        return EpisodeOutputs(
+            columns={
+                name: np.frombuffer(values, dtype=np.float64).astype(dtype) for name, values in self.values.items()
+            },
+            environments=np.frombuffer(self.environments, dtype=np.int16).copy(),
+            month=np.frombuffer(self.month, dtype=np.int8).copy(),
+            day=np.frombuffer(self.day, dtype=np.int8).copy(),
+            minutes=np.frombuffer(self.minutes, dtype=np.int16).copy(),
+        )
+
+
+def _split_label(label: str) -> Tuple[str, str]:
+    """Splits `Key:Name [units](Frequency)` / `Name [units] !Frequency` into the upper-cased `KEY:NAME` and frequency."""
+    name, _, rest = label.partition(" [")
+    frequency = rest.rsplit("(", 1)[-1].rstrip(")") if "(" in rest else rest.rsplit("!", 1)[-1]
+    return name.strip().upper(), frequency.strip()
+
+
+def _match_columns(labels: Iterator[Tuple[str, str, str]], columns: Dict[str, str], frequency: str) -> Dict[str, str]:
+    """Maps output ids (column indices, ESO ids) to column names, for labels of the given frequency."""
+    by_label = {label.upper(): name for name, label in columns.items()}
+    matched = {}
+    for output_id, label, label_frequency in labels:
+        if label in by_label and label_frequency.lower() == frequency.lower():
+            matched[output_id] = by_label[label]
+    return matched
+
+
+def read_csv_outputs(
+    path: Union[Path, str], columns: Dict[str, str], frequency: str = TIMESTEP, dtype: np.dtype = np.float64
+) -> EpisodeOutputs:
+    """Reads the selected columns of an `eplusout.csv` file (see `output_columns()`), line by line.
+
+    Labels not found in the file are returned as empty columns.
+    """
+    with open(path) as f:
+        header = f.readline().rstrip("\n").split(",")
+        matched = _match_columns(((str(i), *_split_label(label)) for i, label in enumerate(header)), columns, frequency)
+        indices = [(int(i), name) for i, name in matched.items()]
+        builder = _ColumnsBuilder(list(columns.keys()))
+
+        environment, previous = 0, None
+        for line in f:
+            fields = line.rstrip("\n").split(",")
+            if not any(fields[i].strip() for i, _ in indices):
+                # a row of other frequencies only
+                continue
+            # " 01/21  24:00:00"
+            date, time = fields[0].split()
+            month, day = (int(v) for v in date.split("/"))
+            hour, minute, _ = (int(v) for v in time.split(":"))
+            minutes = hour * 60 + minute
+            # rows of environments follow each other without separator: a jump in time starts a new one
+            stamp = (month, day, minutes)
+            if previous is not None and not 0 < _minutes_between(previous, stamp) <= MAX_TIMESTEP_MINUTES:
+                environment += 1
+            previous = stamp
+
+            builder.add_row(environment, month, day, minutes)
+            for i, name in indices:
+                value = fields[i].strip()
+                if value:
+                    builder.set(name, float(value))
+    return builder.build(dtype)
+
+
+def _minutes_between(start: Tuple[int, int, int], end: Tuple[int, int, int]) -> int:
+    # a non-leap year is enough to compare consecutive timestamps
+    start_date = np.datetime64(f"2001-{start[0]:02d}-{start[1]:02d}")
+    end_date = np.datetime64(f"2001-{end[0]:02d}-{end[1]:02d}")
+    return int((end_date - start_date).astype(int)) * 1440 + end[2] - start[2]
+
+
+def read_eso_outputs(
+    path: Union[Path, str], columns: Dict[str, str], frequency: str = TIMESTEP, dtype: np.dtype = np.float64
+) -> EpisodeOutputs:
+    """Reads the selected outputs of an `eplusout.eso` file (see `output_columns()`), line by line."""
+    with open(path) as f:
+        labels = []
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("End of Data Dictionary"):
+                break
+            output_id, _, rest = line.split(",", 2) if line.count(",") >= 2 else (None, None, None)
+            if output_id is None or output_id in [ESO_ENVIRONMENT_ID, ESO_TIMESTAMP_ID] or not output_id.isdigit():
+                continue
+            # "Key,Name [units] !Frequency" for variables, "Name [units] !Frequency" for meters
+            label, label_frequency = _split_label(rest.replace(",", ":", 1))
+            labels.append((output_id, label, label_frequency.split()[0] if label_frequency else ""))
+        matched = _match_columns(iter(labels), columns, frequency)
+        builder = _ColumnsBuilder(list(columns.keys()))
+
+        environment, timestamp, row_added = -1, None, False
+        for line in f:
+            output_id, _, values = line.rstrip("\n").partition(",")
+            if output_id == ESO_ENVIRONMENT_ID:
+                environment += 1
+            elif output_id == ESO_TIMESTAMP_ID:
+                # day of simulation, month, day, DST, hour, start minute, end minute, day type
+                fields = values.split(",")
+                timestamp = (int(fields[1]), int(fields[2]), (int(fields[4]) - 1) * 60 + round(float(fields[6])))
+                row_added = False
+            elif output_id in matched and timestamp is not None:
+                # rows are added with their first selected value, timestamps of other frequencies are skipped
+                if not row_added:
+                    builder.add_row(max(environment, 0), *timestamp)
+                    row_added = True
+                builder.set(matched[output_id], float(values.split(",")[0]))
+            elif output_id.startswith("End of Data"):
+                break
+    return builder.build(dtype)
+
+
+def read_episode_outputs(
+    output_dir: Union[Path, str],
+    columns: Dict[str, str],
+    frequency: str = TIMESTEP,
+    dtype: np.dtype = np.float64,
+    cache: bool = True,
+) -> Optional[EpisodeOutputs]:
+    """Reads the outputs of an episode directory, from `eplusout.csv` if any, `eplusout.eso` otherwise.
+
+    If `cache`, parsed outputs are saved to `{output_dir}.npz`, which is read instead of the output file as long as
+    the output file didn't change and the cache has all selected columns. Returns None without output file.
+    """
+    output_dir = Path(output_dir)
+    source = next((output_dir / f for f in ["eplusout.csv", "eplusout.eso"] if (output_dir / f).exists()), None)
+    if source is None:
+        return None
+    stat = source.stat()
+    source_stamp = (stat.st_mtime, stat.st_size)
+
+    cache_file = Path(f"{output_dir}.npz")
+    if cache and cache_file.exists():
+        outputs, cached_stamp = EpisodeOutputs.load(cache_file)
+        if cached_stamp == source_stamp and set(columns) <= set(outputs.columns):
+            outputs.columns = {name: outputs.columns[name].astype(dtype, copy=False) for name in columns}
+            return outputs
+
+    reader = read_csv_outputs if source.suffix == ".csv" else read_eso_outputs
+    outputs = reader(source, columns, frequency=frequency, dtype=dtype)
+    if cache:
+        outputs.save(cache_file, source_stamp)
+    return outputs
@@ -1,7 +1,27 @@
+import calendar
 import glob
 import os
+import re
 import sys
-from typing import Optional
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+# E+ default number of timesteps per hour, used when the IDF has no Timestep object
+DEFAULT_TIMESTEPS_PER_HOUR = 6
+# valid values of the Timestep object (must evenly divide 60)
+VALID_TIMESTEPS_PER_HOUR = [1, 2, 3, 4, 5, 6, 10, 12, 15, 20, 30, 60]
+
+# a Timestep object: class name at the start of an object, followed by its single field
+_TIMESTEP_OBJECT = re.compile(r"(^|;)(\s*)timestep(\s*),(\s*)(\d+)(\s*);", re.IGNORECASE)
+# start of a RunPeriod object (not RunPeriodControl:*), its fields follow
+_RUN_PERIOD_OBJECT = re.compile(r"(^|;)\s*runperiod\s*,", re.IGNORECASE)
+# RunPeriod fields: Name, Begin Month, Begin Day of Month, Begin Year, End Month, End Day of Month, End Year,
+# Day of Week for Start Day, ...
+_BEGIN_MONTH, _BEGIN_DAY, _BEGIN_YEAR, _END_MONTH, _END_DAY, _END_YEAR, _DAY_OF_WEEK = range(1, 8)
+# year of run periods with no begin year, only used to count days (E+ then simulates a non-leap year)
+_DEFAULT_RUN_PERIOD_YEAR = 2001
 
 
 def try_import_energyplus_api(do_import: bool = True):
@@ -53,6 +73,135 @@ def solve_energyplus_install_path() -> str:
     return eplus_path
 
 
+def _strip_idf_comments(idf: str) -> str:
+    # "!" starts a comment until end of line. Comments are replaced with spaces so offsets are preserved
+    return re.sub(r"!.*", lambda m: " " * len(m.group(0)), idf)
+
+
+def read_idf_timesteps_per_hour(idf_path: Union[Path, str]) -> int:
+    """Returns the number of zone timesteps per hour set by the Timestep object of an IDF file."""
+    with open(idf_path, "r") as f:
+        match = _TIMESTEP_OBJECT.search(_strip_idf_comments(f.read()))
+    return int(match.group(5)) if match is not None else DEFAULT_TIMESTEPS_PER_HOUR
+
+
+def _write_idf(output: Path, idf: str) -> None:
+    # written atomically, as several workers can share the same output directory
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=output.parent, suffix=output.suffix, delete=False, newline="") as f:
+        f.write(idf)
+    os.replace(f.name, output)
+
+
+def write_idf_with_timesteps_per_hour(idf_path: Union[Path, str], timesteps_per_hour: int, output_dir: str) -> str:
+    """Writes a copy of an IDF file with its Timestep object set to `timesteps_per_hour`.
+
+    The derived file is named after the original one and the number of timesteps, so it's only written once per
+    output directory. Returns the path of the derived IDF file.
+    """
+    if timesteps_per_hour not in VALID_TIMESTEPS_PER_HOUR:
+        raise ValueError(f"Invalid timesteps per hour: {timesteps_per_hour}, must be one of {VALID_TIMESTEPS_PER_HOUR}")
+
+    idf_path = Path(idf_path)
+    output = Path(output_dir) / f"{idf_path.stem}-{timesteps_per_hour}tph{idf_path.suffix}"
+    if output.exists():
+        return str(output)
+
+    # newlines are kept as is (IDF editors write CRLF)
+    with open(idf_path, "r", newline="") as f:
+        idf = f.read()
+
+    match = _TIMESTEP_OBJECT.search(_strip_idf_comments(idf))
+    if match is not None:
+        idf = idf[: match.start(5)] + str(timesteps_per_hour) + idf[match.end(5) :]
+    else:
+        idf += f"\nTimestep,\n    {timesteps_per_hour};                       !- Number of Timesteps per Hour\n"
+
+    _write_idf(output, idf)
+    return str(output)
+
+
+def _run_period_fields(idf: str) -> List[Tuple[int, int]]:
+    """Returns the (start, end) offsets of the values of the first RunPeriod object fields, whitespace excluded."""
+    stripped = _strip_idf_comments(idf)
+    match = _RUN_PERIOD_OBJECT.search(stripped)
+    if match is None:
+        raise ValueError("No RunPeriod object found in IDF")
+
+    fields, start = [], match.end()
+    end = stripped.index(";", start)
+    for value in stripped[start:end].split(","):
+        if value.strip():
+            value_start = start + len(value) - len(value.lstrip())
+            fields.append((value_start, value_start + len(value.strip())))
+        else:
+            # blank fields are filled in right before their separator
+            fields.append((start + len(value), start + len(value)))
+        start += len(value) + 1
+    return fields
+
+
+def _run_period_dates(idf: str, fields: List[Tuple[int, int]]) -> Tuple[date, date]:
+    def _field(i: int) -> str:
+        return idf[slice(*fields[i])] if i < len(fields) else ""
+
+    begin_year = int(_field(_BEGIN_YEAR) or _DEFAULT_RUN_PERIOD_YEAR)
+    end_year = int(_field(_END_YEAR) or begin_year)
+    return (
+        date(begin_year, int(_field(_BEGIN_MONTH)), int(_field(_BEGIN_DAY))),
+        date(end_year, int(_field(_END_MONTH)), int(_field(_END_DAY))),
+    )
+
+
+def read_idf_run_period(idf_path: Union[Path, str]) -> Tuple[date, date]:
+    """Returns the begin and end dates (inclusive) of the first RunPeriod object of an IDF file.
+
+    If the run period has no begin year, dates are in a non-leap year.
+    """
+    with open(idf_path, "r") as f:
+        idf = f.read()
+    return _run_period_dates(idf, _run_period_fields(idf))
+
+
+def write_idf_with_run_period(idf_path: Union[Path, str], start: date, output_dir: str, days: int = 1) -> str:
+    """Writes a copy of an IDF file whose first RunPeriod object simulates `days` days from `start`.
+
+    The day of week for the start day is kept consistent: computed from `start` if the run period has a begin year,
+    shifted by as many days as the start date otherwise. The derived file is named after the original one and the run
+    period, so it's only written once per output directory. Returns the path of the derived IDF file.
+    """
+    idf_path = Path(idf_path)
+    output = Path(output_dir) / f"{idf_path.stem}-{start:%Y%m%d}-{days}d{idf_path.suffix}"
+    if output.exists():
+        return str(output)
+
+    with open(idf_path, "r", newline="") as f:
+        idf = f.read()
+
+    fields = _run_period_fields(idf)
+    begin, _ = _run_period_dates(idf, fields)
+    end = start + timedelta(days=days - 1)
+    values = {_BEGIN_MONTH: start.month, _BEGIN_DAY: start.day, _END_MONTH: end.month, _END_DAY: end.day}
+
+    has_year = bool(idf[slice(*fields[_BEGIN_YEAR])]) if _BEGIN_YEAR < len(fields) else False
+    if has_year:
+        values.update({_BEGIN_YEAR: start.year, _END_YEAR: end.year})
+    if _DAY_OF_WEEK < len(fields) and idf[slice(*fields[_DAY_OF_WEEK])]:
+        if has_year:
+            weekday = start.weekday()
+        else:
+            days_of_week = [day.lower() for day in calendar.day_name]
+            weekday = days_of_week.index(idf[slice(*fields[_DAY_OF_WEEK])].lower()) + (start - begin).days
+        values[_DAY_OF_WEEK] = calendar.day_name[weekday % 7]
+
+    # replaced from the last field, so that offsets of previous ones are still valid
+    for i in sorted(values, reverse=True):
+        idf = idf[: fields[i][0]] + str(values[i]) + idf[fields[i][1] :]
+
+    _write_idf(output, idf)
+    return str(output)
+
+
 def override(cls):
     """Annotation for documenting method overrides.
 
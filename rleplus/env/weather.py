@@ -0,0 +1,335 @@
+"""Weather file pool for domain randomization.
+
+A `WeatherPool` indexes a directory of EnergyPlus weather files (.epw), computes climate statistics
+of each file once (cached on disk, keyed by file content), and generates perturbed synthetic
+variants of them in the background. Envs sample a weather file from the pool on each reset, among
+the files ready at that time, stratified by climate so that e.g. a pool with many mild climates and
+a few cold ones still trains on cold climates regularly.
+"""
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+# number of header lines of an EPW file, data rows follow
+EPW_HEADER_LINES = 8
+# data columns
+EPW_MONTH, EPW_DRY_BULB, EPW_DEW_POINT, EPW_RELATIVE_HUMIDITY = 1, 6, 7, 8
+# EPW data dictionary validity ranges
+EPW_DRY_BULB_RANGE = (-70.0, 70.0)
+EPW_RELATIVE_HUMIDITY_RANGE = (0.0, 110.0)
+# base temperature of heating and cooling degree days, °C
+DEGREE_DAYS_BASE = 18.0
+
+# Magnus formula coefficients (Alduchov and Eskridge, 1996)
+_MAGNUS_B, _MAGNUS_C = 17.625, 243.04
+
+
+@dataclass
+class WeatherStats:
+    """Climate statistics of a weather file."""
+
+    # mean dry bulb temperature, °C, and relative humidity, %
+    mean_temperature: float
+    mean_humidity: float
+    # per month mean dry bulb temperature, °C, and relative humidity, %
+    monthly_temperature: List[float]
+    monthly_humidity: List[float]
+    # heating and cooling degree days
+    heating_degree_days: float
+    cooling_degree_days: float
+
+
+@dataclass
+class Perturbation:
+    """Perturbation of a synthetic weather file variant.
+
+    Dry bulb temperatures are `monthly mean + temperature_scale * (t - monthly mean) + temperature_offset`, plus AR(1)
+    noise. Relative humidity gets AR(1) noise, and dew points are recomputed from perturbed temperature and humidity.
+    """
+
+    temperature_offset: float = 0.0
+    temperature_scale: float = 1.0
+    temperature_noise: float = 0.0
+    humidity_noise: float = 0.0
+    # AR(1) coefficient of hourly noise, close to 1 for slowly varying noise
+    noise_autocorrelation: float = 0.9
+    seed: int = 0
+
+
+def file_hash(path: Union[Path, str]) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_epw(path: Union[Path, str]) -> Tuple[List[str], List[List[str]]]:
+    """Returns the header lines and the data rows (as lists of fields) of an EPW file, newlines kept as is."""
+    with open(path, "r", newline="") as f:
+        lines = f.read().splitlines(keepends=True)
+    return lines[:EPW_HEADER_LINES], [
+        line.rstrip("\r\n").split(",") for line in lines[EPW_HEADER_LINES:] if line.strip()
+    ]
+
+
+def _column(rows: List[List[str]], column: int) -> np.ndarray:
+    return np.array([row[column] for row in rows], dtype=np.float64)
+
+
+def compute_stats(months: np.ndarray, temperature: np.ndarray, humidity: np.ndarray) -> WeatherStats:
+    """Computes climate statistics from hourly months, dry bulb temperatures and relative humidities."""
+    daily_temperature = temperature[: len(temperature) // 24 * 24].reshape(-1, 24).mean(axis=1)
+    return WeatherStats(
+        mean_temperature=float(temperature.mean()),
+        mean_humidity=float(humidity.mean()),
+        monthly_temperature=[float(temperature[months == m].mean()) for m in range(1, 13)],
+        monthly_humidity=[float(humidity[months == m].mean()) for m in range(1, 13)],
+        heating_degree_days=float(np.maximum(DEGREE_DAYS_BASE - daily_temperature, 0.0).sum()),
+        cooling_degree_days=float(np.maximum(daily_temperature - DEGREE_DAYS_BASE, 0.0).sum()),
+    )
+
+
+def read_epw_stats(path: Union[Path, str]) -> WeatherStats:
+    _, rows = read_epw(path)
+    months = _column(rows, EPW_MONTH).astype(int)
+    return compute_stats(months, _column(rows, EPW_DRY_BULB), _column(rows, EPW_RELATIVE_HUMIDITY))
+
+
+def dew_point(temperature: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """Dew point temperature, °C, from dry bulb temperature, °C, and relative humidity, %."""
+    gamma = np.log(np.maximum(humidity, 1.0) / 100.0) + _MAGNUS_B * temperature / (_MAGNUS_C + temperature)
+    return _MAGNUS_C * gamma / (_MAGNUS_B - gamma)
+
+
+def _ar1_noise(rng: np.random.Generator, n: int, std: float, autocorrelation: float) -> np.ndarray:
+    # stationary AR(1) process with standard deviation `std`
+    innovations = rng.normal(0.0, std * math.sqrt(1.0 - autocorrelation**2), n)
+    noise = np.empty(n)
+    noise[0] = rng.normal(0.0, std)
+    for i in range(1, n):
+        noise[i] = autocorrelation * noise[i - 1] + innovations[i]
+    return noise
+
+
+def validate_epw_data(temperature: np.ndarray, dew_point_temperature: np.ndarray, humidity: np.ndarray) -> None:
+    if len(temperature) not in (8760, 8784):
+        raise ValueError(f"Expected 8760 or 8784 hourly rows, got {len(temperature)}")
+    for name, values, (low, high) in [
+        ("dry bulb temperature", temperature, EPW_DRY_BULB_RANGE),
+        ("dew point temperature", dew_point_temperature, EPW_DRY_BULB_RANGE),
+        ("relative humidity", humidity, EPW_RELATIVE_HUMIDITY_RANGE),
+    ]:
+        if not np.isfinite(values).all() or values.min() < low or values.max() > high:
+            raise ValueError(f"{name} out of range [{low}, {high}]")
+    if (dew_point_temperature > temperature + 0.05).any():
+        raise ValueError("dew point temperature above dry bulb temperature")
+
+
+def write_epw_variant(path: Union[Path, str], perturbation: Perturbation, output: Union[Path, str]) -> WeatherStats:
+    """Writes a perturbed, validated copy of an EPW file to `output` and returns its statistics."""
+    header, rows = read_epw(path)
+    months = _column(rows, EPW_MONTH).astype(int)
+    temperature = _column(rows, EPW_DRY_BULB)
+    humidity = _column(rows, EPW_RELATIVE_HUMIDITY)
+
+    rng = np.random.default_rng(perturbation.seed)
+    monthly_mean = np.array([0.0] + [temperature[months == m].mean() for m in range(1, 13)])[months]
+    temperature = monthly_mean + perturbation.temperature_scale * (temperature - monthly_mean)
+    temperature += perturbation.temperature_offset
+    if perturbation.temperature_noise > 0:
+        temperature += _ar1_noise(rng, len(rows), perturbation.temperature_noise, perturbation.noise_autocorrelation)
+    if perturbation.humidity_noise > 0:
+        humidity = humidity + _ar1_noise(
+            rng, len(rows), perturbation.humidity_noise, perturbation.noise_autocorrelation
+        )
+    humidity = np.clip(np.round(humidity), 1.0, 100.0)
+    temperature = np.round(temperature, 1)
+    dew_point_temperature = np.minimum(np.round(dew_point(temperature, humidity), 1), temperature)
+
+    validate_epw_data(temperature, dew_point_temperature, humidity)
+
+    for row, t, td, rh in zip(rows, temperature, dew_point_temperature, humidity):
+        row[EPW_DRY_BULB], row[EPW_DEW_POINT], row[EPW_RELATIVE_HUMIDITY] = f"{t:.1f}", f"{td:.1f}", f"{rh:.0f}"
+
+    newline = "\r\n" if header[0].endswith("\r\n") else "\n"
+    # COMMENTS 2 header line records the perturbation (without commas, header fields separator)
+    header = list(header)
+    params = " ".join(f"{name}={value}" for name, value in asdict(perturbation).items())
+    header[6] = f"COMMENTS 2,Synthetic variant of {Path(path).name}: {params}{newline}"
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    # written atomically, as several workers can share the same cache directory
+    with tempfile.NamedTemporaryFile("w", dir=output.parent, suffix=".epw", delete=False, newline="") as f:
+        f.writelines(header)
+        f.writelines(",".join(row) + newline for row in rows)
+    os.replace(f.name, output)
+    return compute_stats(months, temperature, humidity)
+
+
+class WeatherPool:
+    """Pool of weather files: the EPW files of a directory and synthetic variants of them.
+
+    Statistics of each file are computed once and cached in `cache_dir`, keyed by file content. Each
+    base file gets `variants_per_file` synthetic variants, whose perturbations are drawn uniformly in
+    ±`temperature_offset` °C, 1 ± `temperature_scale` and up to `temperature_noise` °C /
+    `humidity_noise` % noise standard deviations. Variants are named after the hash of their base file
+    content and perturbation, so they are generated once per cache directory. Generation runs in a
+    background thread started on the first `sample()`, which only samples files already available.
+
+    Files are stratified in `num_strata` quantile bins of their mean temperature: `sample()` picks a
+    stratum uniformly, then a file uniformly within it.
+    """
+
+    def __init__(
+        self,
+        weather_files: Union[Path, str, List[Union[Path, str]]],
+        cache_dir: Union[Path, str],
+        variants_per_file: int = 0,
+        temperature_offset: float = 2.0,
+        temperature_scale: float = 0.2,
+        temperature_noise: float = 1.0,
+        humidity_noise: float = 5.0,
+        num_strata: int = 3,
+        seed: int = 0,
+    ):
+        if isinstance(weather_files, (str, Path)) and os.path.isdir(weather_files):
+            weather_files = sorted(Path(weather_files).glob("*.epw"))
+        elif isinstance(weather_files, (str, Path)):
+            weather_files = [weather_files]
+        if len(weather_files) == 0:
+            raise ValueError("No weather file in pool")
+
+        self.cache_dir = Path(cache_dir)
+        self.variants_per_file = variants_per_file
+        self.perturbation_ranges = dict(
+            temperature_offset=temperature_offset,
+            temperature_scale=temperature_scale,
+            temperature_noise=temperature_noise,
+            humidity_noise=humidity_noise,
+        )
+        self.num_strata = num_strata
+        self.seed = seed
+
+        # files available for sampling, with their statistics. Appended to by the background thread
+        self.lock = threading.Lock()
+        self.files: List[str] = []
+        self.stats: List[WeatherStats] = []
+        self.base_files: List[Tuple[str, str]] = []
+        self.strata: Optional[List[List[int]]] = None
+        for weather_file in weather_files:
+            content_hash = file_hash(weather_file)
+            self._add(str(weather_file), self._cached_stats(weather_file, content_hash))
+            self.base_files.append((str(weather_file), content_hash))
+
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    def _stats_file(self, content_hash: str) -> Path:
+        return self.cache_dir / f"{content_hash[:16]}.json"
+
+    def _cached_stats(self, weather_file: Union[Path, str], content_hash: str) -> WeatherStats:
+        stats_file = self._stats_file(content_hash)
+        if stats_file.exists():
+            with open(stats_file) as f:
+                return WeatherStats(**json.load(f))
+        stats = read_epw_stats(weather_file)
+        self._write_stats(stats_file, stats)
+        return stats
+
+    def _write_stats(self, stats_file: Path, stats: WeatherStats) -> None:
+        stats_file.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=stats_file.parent, suffix=".json", delete=False) as f:
+            json.dump(asdict(stats), f)
+        os.replace(f.name, stats_file)
+
+    def _add(self, weather_file: str, stats: WeatherStats) -> None:
+        with self.lock:
+            self.files.append(weather_file)
+            self.stats.append(stats)
+            # recomputed on next sample()
+            self.strata = None
+
+    def perturbations(self, content_hash: str) -> List[Perturbation]:
+        """Perturbations of the variants of a base file, drawn deterministically from its content and the pool seed."""
+        rng = np.random.default_rng([self.seed, int(content_hash[:8], 16)])
+        ranges = self.perturbation_ranges
+        return [
+            Perturbation(
+                temperature_offset=round(float(rng.uniform(-1, 1) * ranges["temperature_offset"]), 3),
+                temperature_scale=round(float(1 + rng.uniform(-1, 1) * ranges["temperature_scale"]), 3),
+                temperature_noise=round(float(rng.uniform(0, ranges["temperature_noise"])), 3),
+                humidity_noise=round(float(rng.uniform(0, ranges["humidity_noise"])), 3),
+                seed=int(rng.integers(2**31)),
+            )
+            for _ in range(self.variants_per_file)
+        ]
+
+    def variant_file(self, content_hash: str, perturbation: Perturbation) -> Path:
+        key = json.dumps({"file": content_hash, **asdict(perturbation)}, sort_keys=True)
+        return self.cache_dir / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}.epw"
+
+    def generate_variants(self) -> None:
+        """Generates missing variants of all base files, making each one available as soon as it's ready."""
+        for weather_file, content_hash in self.base_files:
+            for perturbation in self.perturbations(content_hash):
+                output = self.variant_file(content_hash, perturbation)
+                stats_file = self._stats_file(file_hash(output)) if output.exists() else None
+                try:
+                    if stats_file is not None and stats_file.exists():
+                        with open(stats_file) as f:
+                            stats = WeatherStats(**json.load(f))
+                    else:
+                        stats = write_epw_variant(weather_file, perturbation, output)
+                        self._write_stats(self._stats_file(file_hash(output)), stats)
+                except ValueError as e:
+                    # e.g. an extreme perturbation giving values out of EPW ranges
+                    print(f"Skipping weather variant of {weather_file} ({perturbation}): {e}")
+                    continue
+                self._add(str(output), stats)
+
+    def start(self) -> None:
+        """Starts generating variants in the background, if not started yet."""
+        if self.executor is None and self.variants_per_file > 0:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="weather-pool")
+            self.executor.submit(self.generate_variants)
+
+    def wait(self) -> None:
+        """Waits for all variants to be generated."""
+        self.start()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def _make_strata(self) -> List[List[int]]:
+        temperatures = np.array([stats.mean_temperature for stats in self.stats])
+        num_strata = min(self.num_strata, len(temperatures))
+        edges = np.quantile(temperatures, np.linspace(0, 1, num_strata + 1)[1:-1])
+        labels = np.searchsorted(edges, temperatures, side="right")
+        return [
+            members.tolist() for members in (np.flatnonzero(labels == s) for s in range(num_strata)) if len(members)
+        ]
+
+    def sample(self, rng: np.random.Generator) -> str:
+        """Returns a weather file, sampled by climate stratum among the files available."""
+        self.start()
+        with self.lock:
+            if self.strata is None:
+                self.strata = self._make_strata()
+            stratum = self.strata[rng.integers(len(self.strata))]
+            return self.files[stratum[rng.integers(len(stratum))]]
+
+    def __getstate__(self) -> Dict:
+        # threads and locks can't be pickled, e.g. when Ray ships an env to a worker
+        state = self.__dict__.copy()
+        state.update(lock=None, executor=None)
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
@@ -0,0 +1,172 @@
+"""Rule-based baseline controllers, to benchmark learned policies against.
+
+Baselines have the same interface as evaluated policies (`reset()` and `compute_action(obs)`) and control any
+`EnergyPlusEnv` with a single setpoint actuator: they decide a setpoint (°C) on each step, which is converted to
+the env action whose post-processed value (see `EnergyPlusEnv.post_process_action()`) is the closest.
+
+- `fixed`: a constant setpoint.
+- `setback`: a comfort setpoint during occupied hours, a setback one otherwise.
+- `pmv`: the setpoint minimizing the predicted |PMV|, evaluated in one batch over all candidate setpoints.
+- `random`: actions sampled uniformly from the action space.
+
+Use `make_baseline()`, or `baseline:<name>` as a checkpoint of `rleplus.evaluation.evaluate`.
+"""
+import abc
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import gymnasium as gym
+import numpy as np
+
+from model.comfort import pmv_ppd_vectorized
+
+if TYPE_CHECKING:
+    # importing the env requires an E+ installation, not needed to evaluate exported policies
+    from rleplus.env.energyplus import EnergyPlusEnv
+
+# prefix of baselines given as checkpoints to evaluate
+BASELINE_PREFIX = "baseline:"
+# number of candidate actions of continuous action spaces
+NUM_CONTINUOUS_CANDIDATES = 161
+
+
+class SetpointActions:
+    """Candidate actions of an env and their setpoints, to convert setpoints to actions."""
+
+    def __init__(self, env: "EnergyPlusEnv", num_candidates: int = NUM_CONTINUOUS_CANDIDATES):
+        space = env.action_space
+        if isinstance(space, gym.spaces.Discrete):
+            self.actions: List[Any] = [int(space.start + i) for i in range(space.n)]
+        elif isinstance(space, gym.spaces.Box) and space.shape in [(), (1,)]:
+            self.actions = [
+                np.full(space.shape, value, dtype=space.dtype)
+                for value in np.linspace(space.low.item(), space.high.item(), num_candidates)
+            ]
+        else:
+            raise ValueError(f"Baselines only control a single setpoint, got action space {space}")
+        self.setpoints = np.array([float(env.post_process_action(action)) for action in self.actions])
+
+    def action(self, setpoint: float) -> Any:
+        """The candidate action whose setpoint is the closest to `setpoint`."""
+        return self.actions[int(np.argmin(np.abs(self.setpoints - setpoint)))]
+
+
+class BaselineController(abc.ABC):
+    """A controller deciding a setpoint (°C) on each step of an env."""
+
+    def __init__(self, env: "EnergyPlusEnv"):
+        self.env = env
+        self.setpoint_actions = SetpointActions(env)
+
+    def reset(self) -> None:
+        """Called at the start of each episode."""
+
+    def compute_action(self, obs: np.ndarray) -> Any:
+        return self.setpoint_actions.action(self.compute_setpoint(self.env.last_obs))
+
+    @abc.abstractmethod
+    def compute_setpoint(self, obs: Dict[str, float]) -> float:
+        """Setpoint of the next step, from the last observation (by variable and meter name)."""
+
+    def hour_of_day(self) -> float:
+        """Hour of the day of the next step. Episodes are one day, starting at midnight."""
+        steps = self.env.timestep - self.env.episode_start_timestep
+        return (steps * self.env.runner_config.eplus_timestep_duration) % 24
+
+
+class FixedSetpoint(BaselineController):
+    """A constant setpoint."""
+
+    def __init__(self, env: "EnergyPlusEnv", setpoint: float = 21.0):
+        super().__init__(env)
+        self.setpoint = setpoint
+
+    def compute_setpoint(self, obs: Dict[str, float]) -> float:
+        return self.setpoint
+
+
+class SetbackSchedule(BaselineController):
+    """`occupied` setpoint from `start` to `end` hour, `setback` setpoint otherwise."""
+
+    def __init__(
+        self, env: "EnergyPlusEnv", occupied: float = 21.0, setback: float = 16.0, start: float = 8.0, end: float = 18.0
+    ):
+        super().__init__(env)
+        self.occupied = occupied
+        self.setback = setback
+        self.start = start
+        self.end = end
+
+    def compute_setpoint(self, obs: Dict[str, float]) -> float:
+        return self.occupied if self.start <= self.hour_of_day() < self.end else self.setback
+
+
+class PMVTracking(BaselineController):
+    """The setpoint minimizing the predicted |PMV|.
+
+    The air temperature is predicted to reach the setpoint, with the radiant temperature keeping its current offset
+    to the air temperature and the relative humidity its current value (see `EnergyPlusEnv.get_comfort_inputs()`).
+    PMVs of all candidate setpoints are evaluated in a single vectorized call, ties go to the lowest setpoint.
+    Without comfort inputs or valid PMV, `default_setpoint` is used.
+    """
+
+    def __init__(self, env: "EnergyPlusEnv", default_setpoint: float = 21.0):
+        super().__init__(env)
+        self.default_setpoint = default_setpoint
+
+    def compute_setpoint(self, obs: Dict[str, float]) -> float:
+        inputs = self.env.get_comfort_inputs(obs)
+        if inputs is None:
+            return self.default_setpoint
+        tdb, tr, rh = inputs
+        setpoints = self.setpoint_actions.setpoints
+        pmvs = pmv_ppd_vectorized(tdb=setpoints, tr=setpoints + (tr - tdb), rh=rh, **self.env.get_comfort_params())[
+            "pmv"
+        ]
+        if np.isnan(pmvs).all():
+            return self.default_setpoint
+        return float(setpoints[np.nanargmin(np.abs(pmvs))])
+
+
+class RandomPolicy:
+    """Actions sampled uniformly from the action space."""
+
+    def __init__(self, env: "EnergyPlusEnv", seed: Optional[int] = None):
+        self.action_space = env.action_space
+        self.action_space.seed(seed)
+
+    def reset(self) -> None:
+        pass
+
+    def compute_action(self, obs: np.ndarray) -> Any:
+        return self.action_space.sample()
+
+
+BASELINES: Dict[str, Callable[..., Any]] = {
+    "fixed": FixedSetpoint,
+    "setback": SetbackSchedule,
+    "pmv": PMVTracking,
+    "random": RandomPolicy,
+}
+
+
+def parse_baseline(name: str) -> Tuple[str, Dict[str, float]]:
+    """Parses `name` or `name(param=value,...)`, e.g. `fixed(setpoint=22)`, into a baseline name and parameters."""
+    name = name[len(BASELINE_PREFIX) :] if name.startswith(BASELINE_PREFIX) else name
+    params: Dict[str, float] = {}
+    if "(" in name:
+        name, _, args = name.partition("(")
+        for arg in args.rstrip(")").split(","):
+            if arg.strip():
+                key, _, value = arg.partition("=")
+                params[key.strip()] = float(value)
+    if name not in BASELINES:
+        raise ValueError(f"Unknown baseline {name}, must be one of {list(BASELINES)}")
+    return name, params
+
+
+def make_baseline(name: str, env: "EnergyPlusEnv", seed: Optional[int] = None) -> Any:
+    """Makes a baseline controlling `env`, see `parse_baseline()` for names."""
+    name, params = parse_baseline(name)
+    if name == "random":
+        params["seed"] = seed
+    return BASELINES[name](env, **params)
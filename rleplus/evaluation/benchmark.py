@@ -0,0 +1,146 @@
+"""Benchmark baseline controllers (and optionally trained checkpoints) across weather files and seeds.
+
+Baselines (see `rleplus.evaluation.baselines`) are evaluated like checkpoints, on the same local process pool as
+`rleplus.evaluation.evaluate`, and summarized in the same CSV format. A KPI table, averaged over weather files and
+seeds, is then printed with one row per controller, so that learned policies can be compared to reference numbers.
+
+Example:
+
+    python3 rleplus/evaluation/benchmark.py --env BBrightEnv \
+        --baselines fixed "setback(occupied=21,setback=16)" pmv random \
+        --checkpoints "results/*/checkpoints" \
+        --epw rleplus/examples/bbright/NLD_Groningen.062800_IWEC.epw \
+        --seeds 0 1 2
+"""
+import argparse
+import csv
+import os
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List
+
+import numpy as np
+
+from rleplus.evaluation.baselines import BASELINE_PREFIX, BASELINES, parse_baseline
+from rleplus.evaluation.evaluate import expand_checkpoints, make_tasks, run_evaluations
+
+# KPIs of the printed table, averaged over weather files and seeds
+TABLE_FIELDS = ["reward_total", "pmv_abs_mean", "pmv_std", "complaint_rate", "energy", "wall_time"]
+
+
+def kpi_table(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Averages evaluation results by checkpoint (or baseline), sorted by mean |PMV|."""
+    by_checkpoint: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        by_checkpoint.setdefault(result["checkpoint"], []).append(result)
+
+    table = []
+    for checkpoint, rows in by_checkpoint.items():
+        row = {"controller": checkpoint, "evaluations": len(rows)}
+        for field in TABLE_FIELDS:
+            values = np.array([r[field] for r in rows], dtype=np.float64)
+            row[field] = float(np.nanmean(values)) if not np.isnan(values).all() else np.nan
+        table.append(row)
+    return sorted(table, key=lambda row: (np.isnan(row["pmv_abs_mean"]), row["pmv_abs_mean"]))
+
+
+def format_table(table: List[Dict[str, Any]]) -> str:
+    header = ["controller", "evaluations"] + TABLE_FIELDS
+    lines = [[str(row[h]) if h in ["controller", "evaluations"] else f"{row[h]:.4g}" for h in header] for row in table]
+    widths = [max(len(h), *(len(line[i]) for line in lines)) for i, h in enumerate(header)]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(line, widths)) for line in [header] + lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--env",
+        help="The gym environment to use.",
+        required=False,
+        default="BBrightEnv",
+    )
+    parser.add_argument(
+        "--baselines",
+        nargs="+",
+        default=list(BASELINES),
+        help=f"Baselines to benchmark, among {list(BASELINES)}. Parameters can be given as name(param=value,...), "
+        "e.g. fixed(setpoint=22). Default is all of them with default parameters",
+    )
+    parser.add_argument(
+        "--checkpoints",
+        nargs="*",
+        default=[],
+        help="Checkpoint directories or exported policies to benchmark against the baselines, as for evaluate",
+    )
+    parser.add_argument(
+        "--epw",
+        nargs="+",
+        default=None,
+        help="Weather files (.epw) to benchmark on. Default is the environment's weather file",
+    )
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0], help="Seeds to benchmark with")
+    parser.add_argument("--episodes", type=int, default=1, help="Number of episodes per evaluation")
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=None,
+        help="Number of worker processes. Default is the number of available cores",
+    )
+    parser.add_argument(
+        "--output",
+        help="EnergyPlus output directory. Default is a generated one in /tmp/",
+        required=False,
+        default=TemporaryDirectory().name,
+    )
+    parser.add_argument(
+        "--summary",
+        help="Path of the CSV summary file, with one row per evaluation",
+        required=False,
+        default="benchmark.csv",
+    )
+    parser.add_argument(
+        "--table",
+        help="Path of the CSV KPI table, with one row per controller. Default is not to save it",
+        required=False,
+        default=None,
+    )
+    built_args = parser.parse_args()
+    print(f"Running with following CLI args: {built_args}")
+    return built_args
+
+
+def main():
+    args = parse_args()
+
+    # fail early on unknown baselines
+    for baseline in args.baselines:
+        parse_baseline(baseline)
+    controllers = [f"{BASELINE_PREFIX}{baseline}" for baseline in args.baselines]
+    if args.checkpoints:
+        controllers += expand_checkpoints(args.checkpoints)
+
+    tasks = make_tasks(
+        checkpoints=controllers,
+        epws=[os.path.abspath(e) for e in args.epw] if args.epw else [None],
+        seeds=args.seeds,
+    )
+    results = run_evaluations(
+        tasks=tasks,
+        env_name=args.env,
+        env_config=dict(output=args.output, csv=False, verbose=False),
+        summary_file=args.summary,
+        num_workers=args.num_workers,
+        episodes=args.episodes,
+    )
+
+    table = kpi_table(results)
+    print(format_table(table))
+    if args.table is not None:
+        with open(args.table, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["controller", "evaluations"] + TABLE_FIELDS)
+            writer.writeheader()
+            writer.writerows(table)
+    print(f"Benchmark summary written to {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""Evaluate trained checkpoints in parallel across weather files and seeds.
+
+Each (checkpoint, weather file, seed) combination is evaluated on a local process pool. Policies
+are restored once per worker process and reused for every task scheduled on that worker. Results
+are streamed into a single CSV summary as evaluations complete.
+
+Example:
+
+    python3 rleplus/evaluation/evaluate.py --env BBrightEnv \
+        --checkpoints "results/*/checkpoints" \
+        --epw rleplus/examples/bbright/NLD_Groningen.062800_IWEC.epw \
+        --seeds 0 1 2
+"""
+import argparse
+import csv
+import glob
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from rleplus.deploy.inference import ExportedPolicy
+from rleplus.evaluation.baselines import BASELINE_PREFIX, make_baseline
+from rleplus.examples.registry import env_creator
+from rleplus.train.checkpoints import INDEX_FILE, read_index, select_checkpoints
+
+SUMMARY_FIELDS = [
+    "checkpoint",
+    "epw",
+    "seed",
+    "episodes",
+    "steps",
+    "reward_total",
+    "reward_mean",
+    "pmv_mean",
+    "pmv_std",
+    "pmv_abs_mean",
+    "pmv_min",
+    "pmv_max",
+    "complaint_rate",
+    "energy",
+    "wall_time",
+]
+
+
+@dataclass(frozen=True)
+class EvalTask:
+    """A single evaluation to run."""
+
+    # Path to the checkpoint to evaluate
+    checkpoint: str
+    # Path to the weather file (.epw), None to use the environment's default one
+    epw: Optional[str]
+    # Seed used for the environment and the policy
+    seed: int
+
+
+class CheckpointPolicy:
+    """Greedy policy restored from an RLlib checkpoint.
+
+    Both algorithm checkpoints (containing a `policies/` folder) and policy checkpoints are
+    supported. Recurrent state is carried over between calls and reset with `reset()`.
+    """
+
+    def __init__(self, checkpoint: str, policy_id: str = "default_policy"):
+        from ray.rllib.policy.policy import Policy
+
+        path = Path(checkpoint)
+        if (path / "policies" / policy_id).exists():
+            path = path / "policies" / policy_id
+
+        self.policy = Policy.from_checkpoint(str(path))
+        self.state: List[Any] = []
+
+    def reset(self) -> None:
+        self.state = self.policy.get_initial_state()
+
+    def compute_action(self, obs: np.ndarray) -> Any:
+        from ray.rllib.utils.spaces.space_utils import clip_action, unsquash_action
+
+        action, self.state, _ = self.policy.compute_single_action(obs, self.state, explore=False)
+        # Policy.compute_single_action() returns actions as sampled from the action distribution,
+        # they need the same post-processing as during rollouts before being sent to the env
+        if self.policy.config.get("normalize_actions", True):
+            return unsquash_action(action, self.policy.action_space_struct)
+        elif self.policy.config.get("clip_actions", False):
+            return clip_action(action, self.policy.action_space_struct)
+        return action
+
+
+# per-process state, set up once by the pool initializer
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(env_name: str, env_config: Dict[str, Any]) -> None:
+    _worker["env_cls"] = env_creator(env_name)
+    _worker["env_config"] = env_config
+    _worker["policies"] = {}
+
+
+def _get_policy(checkpoint: str) -> Union[CheckpointPolicy, ExportedPolicy]:
+    """Returns the policy for this checkpoint, restoring it only on first use in this worker.
+
+    Exported artifacts (see `rleplus.deploy.export`) are loaded without Ray.
+    """
+    policies = _worker["policies"]
+    if checkpoint not in policies:
+        if os.path.isfile(checkpoint):
+            policies[checkpoint] = ExportedPolicy(checkpoint)
+        else:
+            policies[checkpoint] = CheckpointPolicy(checkpoint)
+    return policies[checkpoint]
+
+
+def _seed_everything(seed: int) -> None:
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        import torch
+
+        torch.manual_seed(seed)
+    except ImportError:
+        pass
+
+
+def evaluate_task(task: EvalTask, episodes: int = 1) -> Dict[str, Any]:
+    """Runs `episodes` episodes of a checkpoint's policy and summarizes them."""
+    start = time.time()
+    _seed_everything(task.seed)
+
+    env_config = dict(_worker["env_config"])
+    # parent and own names, as checkpoints of an index share the same parent
+    checkpoint_name = f"{Path(task.checkpoint).parent.name}-{Path(task.checkpoint).name}"
+    env_config["output"] = os.path.join(
+        env_config["output"], f"{checkpoint_name}-{Path(task.epw or 'default').stem}-{task.seed}"
+    )
+    if task.epw is not None:
+        env_config["epw"] = task.epw
+    env = _worker["env_cls"](env_config)
+    if task.checkpoint.startswith(BASELINE_PREFIX):
+        # baselines control the env of the task, they're cheap to make
+        policy = make_baseline(task.checkpoint, env, seed=task.seed)
+    else:
+        policy = _get_policy(task.checkpoint)
+
+    rewards: List[float] = []
+    pmvs: List[float] = []
+    complaints = 0
+    energy = 0.0
+    meters = list(env.get_meters().keys())
+    try:
+        for episode in range(episodes):
+            obs, _ = env.reset(seed=task.seed + episode)
+            policy.reset()
+            done = False
+            while not done:
+                obs, reward, terminated, truncated, info = env.step(policy.compute_action(obs))
+                done = terminated or truncated
+                rewards.append(reward)
+                complaints += info.get("complaints", 0)
+            pmvs.extend(env.pmv_history)
+            energy += sum(obs_dict[meter] for obs_dict in env.obs_history for meter in meters)
+    finally:
+        env.close()
+
+    pmv_arr = np.asarray(pmvs, dtype=np.float64)
+    occupants = len(getattr(env, "humans", []))
+    complaint_reward = env.uses_complaints() and occupants > 0
+
+    return {
+        **asdict(task),
+        "episodes": episodes,
+        "steps": len(rewards),
+        "reward_total": float(np.sum(rewards)),
+        "reward_mean": float(np.mean(rewards)) if rewards else np.nan,
+        "pmv_mean": float(np.nanmean(pmv_arr)) if pmv_arr.size else np.nan,
+        "pmv_std": float(np.nanstd(pmv_arr)) if pmv_arr.size else np.nan,
+        "pmv_abs_mean": float(np.nanmean(np.abs(pmv_arr))) if pmv_arr.size else np.nan,
+        "pmv_min": float(np.nanmin(pmv_arr)) if pmv_arr.size else np.nan,
+        "pmv_max": float(np.nanmax(pmv_arr)) if pmv_arr.size else np.nan,
+        "complaint_rate": complaints / (len(rewards) * occupants) if complaint_reward and rewards else np.nan,
+        "energy": energy if meters else np.nan,
+        "wall_time": time.time() - start,
+    }
+
+
+def expand_checkpoints(
+    patterns: List[str], metric: Optional[str] = None, mode: str = "max", top: Optional[int] = None
+) -> List[str]:
+    """Expands glob patterns into a sorted list of checkpoint directories.
+
+    Checkpoints directories with an index (see `rleplus.train.checkpoints`) are expanded into their indexed
+    checkpoints, only the `top` best ones by `metric` if given, without deserializing them. Baselines
+    (`baseline:<name>`, see `rleplus.evaluation.baselines`) are kept as is.
+    """
+    checkpoints = set()
+    for pattern in patterns:
+        if pattern.startswith(BASELINE_PREFIX):
+            checkpoints.add(pattern)
+            continue
+        matches = glob.glob(pattern)
+        if len(matches) == 0:
+            raise FileNotFoundError(f"No checkpoint found matching: {pattern}")
+        for match in matches:
+            if os.path.isfile(os.path.join(match, INDEX_FILE)):
+                entries = read_index(match)
+                if metric is not None:
+                    entries = select_checkpoints(entries, metric, mode=mode, top=top)
+                checkpoints.update(entry.path for entry in entries)
+            else:
+                checkpoints.add(os.path.abspath(match))
+    return sorted(checkpoints)
+
+
+def make_tasks(checkpoints: List[str], epws: List[Optional[str]], seeds: List[int]) -> List[EvalTask]:
+    """Builds the (checkpoint x weather x seed) evaluation grid.
+
+    Tasks are ordered by checkpoint so that consecutive tasks picked up by a worker tend to reuse
+    the policy it already restored.
+    """
+    return [EvalTask(checkpoint=c, epw=e, seed=s) for c, e, s in itertools.product(checkpoints, epws, seeds)]
+
+
+def available_cpus() -> int:
+    """Number of cores this process is allowed to run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def run_evaluations(
+    tasks: List[EvalTask],
+    env_name: str,
+    env_config: Dict[str, Any],
+    summary_file: str,
+    num_workers: Optional[int] = None,
+    episodes: int = 1,
+) -> List[Dict[str, Any]]:
+    """Runs all tasks on a process pool and streams results into a CSV summary file."""
+    num_workers = max(1, min(num_workers or available_cpus(), len(tasks)))
+    results: List[Dict[str, Any]] = []
+
+    Path(summary_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(summary_file, "w", newline="") as f, ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(env_name, env_config),
+    ) as pool:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+
+        futures = [pool.submit(evaluate_task, task, episodes) for task in tasks]
+        for future in as_completed(futures):
+            result = future.result()
+            writer.writerow(result)
+            f.flush()
+            results.append(result)
+            print(
+                f"[{len(results)}/{len(tasks)}] {result['checkpoint']} {result['epw']} seed={result['seed']}: "
+                f"reward={result['reward_total']:.2f} pmv_abs_mean={result['pmv_abs_mean']:.3f}"
+            )
+
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--env",
+        help="The gym environment to use.",
+        required=False,
+        default="BBrightEnv",
+    )
+    parser.add_argument(
+        "--checkpoints",
+        nargs="+",
+        required=True,
+        help="Checkpoint directories or exported policies to evaluate. Glob patterns are expanded, and indexed "
+        "checkpoints directories are expanded to their checkpoints. Baselines are given as baseline:<name>, e.g. "
+        "baseline:pmv",
+    )
+    parser.add_argument(
+        "--metric",
+        default=None,
+        help="Only evaluate the --top best indexed checkpoints by this metric, e.g. pmv_abs_mean_mean",
+    )
+    parser.add_argument(
+        "--mode", choices=["min", "max"], default="max", help="Whether lower or higher --metric values are better"
+    )
+    parser.add_argument("--top", type=int, default=1, help="Number of best indexed checkpoints evaluated with --metric")
+    parser.add_argument(
+        "--epw",
+        nargs="+",
+        default=None,
+        help="Weather files (.epw) to evaluate on. Default is the environment's weather file",
+    )
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0], help="Seeds to evaluate with")
+    parser.add_argument("--episodes", type=int, default=1, help="Number of episodes per evaluation")
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=None,
+        help="Number of worker processes. Default is the number of available cores",
+    )
+    parser.add_argument(
+        "--output",
+        help="EnergyPlus output directory. Default is a generated one in /tmp/",
+        required=False,
+        default=TemporaryDirectory().name,
+    )
+    parser.add_argument(
+        "--summary",
+        help="Path of the CSV summary file",
+        required=False,
+        default="evaluation.csv",
+    )
+    built_args = parser.parse_args()
+    print(f"Running with following CLI args: {built_args}")
+    return built_args
+
+
+def main():
+    args = parse_args()
+
+    tasks = make_tasks(
+        checkpoints=expand_checkpoints(args.checkpoints, metric=args.metric, mode=args.mode, top=args.top),
+        epws=[os.path.abspath(e) for e in args.epw] if args.epw else [None],
+        seeds=args.seeds,
+    )
+    run_evaluations(
+        tasks=tasks,
+        env_name=args.env,
+        env_config=dict(output=args.output, csv=False, verbose=False),
+        summary_file=args.summary,
+        num_workers=args.num_workers,
+        episodes=args.episodes,
+    )
+    print(f"Evaluation summary written to {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict, List, Tuple, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 
 import gymnasium as gym
 import numpy as np
@@ -94,6 +94,20 @@ class AmphitheaterEnv(EnergyPlusEnv):
             "sat_spt": ("System Node Setpoint", "Temperature Setpoint", "Node 3")
         }
 
+    @override(EnergyPlusEnv)
+    def get_comfort_inputs(self, obs: Dict[str, float]) -> Optional[Tuple[float, float, float]]:
+        # no radiant temperature nor humidity sensor: air temperature and a constant humidity are used
+        return obs["iat"], obs["iat"], self.pmv_dict["rh"]
+
+    @override(EnergyPlusEnv)
+    def get_comfort_params(self) -> Dict[str, Any]:
+        return {"vr": self.pmv_dict["vr"], "met": self.pmv_dict["met"], "clo": self.pmv_dict["clo"], "standard": "ISO"}
+
+    @override(EnergyPlusEnv)
+    def uses_complaints(self) -> bool:
+        # the reward is always drawn from occupant complaints
+        return True
+
     @override(EnergyPlusEnv)
     def compute_reward(self, obs: Dict[str, float]) -> float:
         """A reward function that penalizes on human complaints and rewards no complaints."""
@@ -108,21 +122,19 @@ class AmphitheaterEnv(EnergyPlusEnv):
         step_cum_reward = 0
 
         # iterate over humans
-        for human in self.humans:
+        for human, rand in zip(self.humans, self.uniform_draws(len(self.humans))):
             # calculate pmv value for the current human
             temp_pmv = human.calcpmv(obs["iat"], obs["iat"], self.pmv_dict["vr"], rh=self.pmv_dict["rh"])
 
             # get probability of complaint
             prob = human.calcprobability(temp_pmv)
 
-            # generate random number between 0 and 1
-            rand = np.random.rand()
-
-            # check if the human complains
+            # check if the human complains (rand is uniform in [0, 1))
             complaint = rand < prob
 
             if complaint:
                 step_cum_reward += -1
+                self.complaints += 1
             else:
                 no_complaint += 1
             
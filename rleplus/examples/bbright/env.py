@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict, List, Tuple, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 
 import gymnasium as gym
 import numpy as np
@@ -115,6 +115,14 @@ class BBrightEnv(EnergyPlusEnv):
             "clg_spt": (component_type, cooling_control_type, actuator_key)
         }
 
+    @override(EnergyPlusEnv)
+    def get_comfort_inputs(self, obs: Dict[str, float]) -> Optional[Tuple[float, float, float]]:
+        return obs["air_tmp"], obs["rad_tmp"], obs["air_hum"]
+
+    @override(EnergyPlusEnv)
+    def get_comfort_params(self) -> Dict[str, Any]:
+        return {"vr": self.pmv_dict["vr"], "met": self.pmv_dict["met"], "clo": self.pmv_dict["clo"], "standard": "ISO"}
+
     @override(EnergyPlusEnv)
     def compute_reward(self, obs: Dict[str, float]) -> float:
         """A reward function that penalizes on human complaints and rewards no complaints."""
@@ -141,21 +149,19 @@ class BBrightEnv(EnergyPlusEnv):
 
             # iterate over humans
             
-            for human in self.humans:
+            for human, rand in zip(self.humans, self.uniform_draws(len(self.humans))):
                 # calculate pmv value for the current human
                 temp_pmv = human.calcpmv(obs["air_tmp"], obs["rad_tmp"], self.pmv_dict["vr"], obs["air_hum"])
 
                 # get probability of complaint
                 prob = human.calcprobability(temp_pmv)
 
-                # generate random number between 0 and 1
-                rand = np.random.rand()
-
-                # check if the human complains
+                # check if the human complains (rand is uniform in [0, 1))
                 complaint = rand < prob
 
                 if complaint:
                     step_cum_reward += -1
+                    self.complaints += 1
                 else:
                     no_complaint += 1
                 
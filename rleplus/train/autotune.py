@@ -0,0 +1,201 @@
+"""Rollout topology autotuning for RLlib training.
+
+A short calibration measures the environment step and reset costs, and the policy inference and
+learning costs. A simple throughput model then picks the number of rollout workers, environments
+per worker and rollout fragment length for the local cores.
+
+Throughput model: a rollout worker steps its environments one after the other (E+ runs each env's
+simulation synchronously with its step), then computes actions for all of them in a single batch.
+With E envs per worker, a sampling round takes E * (step + reset / episode_length) + inference(E)
+and yields E timesteps. Workers run in parallel, one per core, Ray reserving the remaining core for
+the driver / learner. PPO samples then learns synchronously, so learning time per timestep adds up
+to sampling time.
+"""
+import io
+import math
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import gymnasium as gym
+import numpy as np
+import torch
+
+# more envs per worker multiplies E+ memory, only worth it for a significant throughput gain
+MIN_ENVS_PER_WORKER_GAIN = 0.02
+
+
+@dataclass
+class Calibration:
+    """Measured costs, in seconds."""
+
+    # mean env step time
+    step_time: float
+    # mean env reset time (includes E+ start up, warmup and sizing)
+    reset_time: float
+    # number of steps per episode
+    episode_length: int
+    # policy inference time of a batch of n observations: inference_fixed + n * inference_per_obs
+    inference_fixed: float
+    inference_per_obs: float
+    # learning time per sampled timestep (all SGD epochs)
+    learn_time_per_timestep: float
+
+    def inference_time(self, batch_size: int) -> float:
+        return self.inference_fixed + batch_size * self.inference_per_obs
+
+
+@dataclass
+class RolloutPlan:
+    num_rollout_workers: int
+    num_envs_per_worker: int
+    rollout_fragment_length: int
+    train_batch_size: int
+    # predicted timesteps per second, sampling only and including learning
+    sample_throughput: float
+    predicted_throughput: float
+
+    def __str__(self) -> str:
+        return (
+            f"num_rollout_workers={self.num_rollout_workers}, num_envs_per_worker={self.num_envs_per_worker}, "
+            f"rollout_fragment_length={self.rollout_fragment_length}, train_batch_size={self.train_batch_size}, "
+            f"predicted throughput: {self.sample_throughput:.0f} sampled timesteps/s, "
+            f"{self.predicted_throughput:.0f} trained timesteps/s"
+        )
+
+
+def measure_env(env: gym.Env, steps: int = 200, resets: int = 2) -> Dict[str, float]:
+    """Times env resets and steps with random actions."""
+    env_steps, step_time, reset_times = 0, 0.0, []
+    # the env prints on each reset
+    with redirect_stdout(io.StringIO()):
+        for _ in range(resets):
+            start = time.perf_counter()
+            env.reset()
+            reset_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for _ in range(max(steps // resets, 1)):
+                _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+                env_steps += 1
+                if terminated or truncated:
+                    break
+            step_time += time.perf_counter() - start
+
+    return {"step_time": step_time / max(env_steps, 1), "reset_time": float(np.mean(reset_times))}
+
+
+def _time_call(fn: Callable[[], Any], repeats: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def measure_policy(
+    config, observation_space: gym.Space, action_space: gym.Space, repeats: int = 50
+) -> Dict[str, float]:
+    """Times the inference and training passes of the algorithm's default RLModule."""
+    spec = config.get_default_rl_module_spec()
+    spec.observation_space = observation_space
+    spec.action_space = action_space
+    spec.model_config_dict = config.model
+    module = spec.build()
+
+    def inference(batch_size: int) -> float:
+        obs = torch.as_tensor(np.stack([observation_space.sample() for _ in range(batch_size)]), dtype=torch.float32)
+
+        def _forward():
+            with torch.no_grad():
+                module.forward_exploration({"obs": obs})
+
+        return _time_call(_forward, repeats)
+
+    small, large = inference(1), inference(32)
+    inference_per_obs = max(large - small, 0.0) / 31
+
+    minibatch_size = config.sgd_minibatch_size
+    obs = torch.as_tensor(np.stack([observation_space.sample() for _ in range(minibatch_size)]), dtype=torch.float32)
+
+    def _train_step():
+        outputs = module.forward_train({"obs": obs})
+        (outputs["action_dist_inputs"].sum() + outputs["vf_preds"].sum()).backward()
+
+    minibatch_time = _time_call(_train_step, max(repeats // 5, 1))
+
+    return {
+        "inference_fixed": max(small - inference_per_obs, 0.0),
+        "inference_per_obs": inference_per_obs,
+        "learn_time_per_timestep": minibatch_time / minibatch_size * config.num_sgd_iter,
+    }
+
+
+def calibrate(env: gym.Env, config, steps: int = 200) -> Calibration:
+    env_costs = measure_env(env, steps=steps)
+    policy_costs = measure_policy(config, env.observation_space, env.action_space)
+    return Calibration(episode_length=getattr(env, "episode_length", steps), **env_costs, **policy_costs)
+
+
+def sample_throughput(calibration: Calibration, num_workers: int, num_envs: int) -> float:
+    """Predicted sampled timesteps per second."""
+    round_time = num_envs * (
+        calibration.step_time + calibration.reset_time / calibration.episode_length
+    ) + calibration.inference_time(num_envs)
+    return num_workers * num_envs / round_time
+
+
+def plan_rollouts(
+    calibration: Calibration,
+    num_cpus: int,
+    min_train_batch_size: int = 4000,
+    max_envs_per_worker: int = 8,
+) -> RolloutPlan:
+    """Picks the rollout topology maximizing predicted throughput on `num_cpus` cores."""
+    # Ray reserves one core for the driver / learner
+    num_workers = max(num_cpus - 1, 1)
+
+    throughputs = {n: sample_throughput(calibration, num_workers, n) for n in range(1, max_envs_per_worker + 1)}
+    best = max(throughputs.values())
+    # fewest envs per worker within reach of the best throughput
+    num_envs = min(n for n, throughput in throughputs.items() if throughput >= best * (1 - MIN_ENVS_PER_WORKER_GAIN))
+
+    # each env contributes one fragment per training iteration
+    rollout_fragment_length = math.ceil(min_train_batch_size / (num_workers * num_envs))
+    train_batch_size = rollout_fragment_length * num_workers * num_envs
+
+    sampled = throughputs[num_envs]
+    trained = 1.0 / (1.0 / sampled + calibration.learn_time_per_timestep)
+    return RolloutPlan(
+        num_rollout_workers=num_workers,
+        num_envs_per_worker=num_envs,
+        rollout_fragment_length=rollout_fragment_length,
+        train_batch_size=train_batch_size,
+        sample_throughput=sampled,
+        predicted_throughput=trained,
+    )
+
+
+def autotune(
+    env_creator: Callable[[Dict[str, Any]], gym.Env],
+    env_config: Dict[str, Any],
+    config,
+    num_cpus: int,
+    steps: int = 200,
+    min_train_batch_size: Optional[int] = None,
+) -> RolloutPlan:
+    """Calibrates on a local env instance and returns the rollout plan for `num_cpus` cores."""
+    env = env_creator(env_config)
+    try:
+        calibration = calibrate(env, config, steps=steps)
+    finally:
+        env.close()
+
+    print(
+        f"Calibration: step {calibration.step_time * 1e3:.2f} ms, reset {calibration.reset_time * 1e3:.0f} ms, "
+        f"episode length {calibration.episode_length}, inference {calibration.inference_fixed * 1e3:.2f} ms "
+        f"+ {calibration.inference_per_obs * 1e3:.3f} ms/obs, learn {calibration.learn_time_per_timestep * 1e3:.3f} "
+        f"ms/timestep"
+    )
+    return plan_rollouts(calibration, num_cpus, min_train_batch_size=min_train_batch_size or config.train_batch_size)
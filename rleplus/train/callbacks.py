@@ -0,0 +1,141 @@
+"""RLlib callbacks reporting EnergyPlus environments KPIs, scheduling their simulation fidelity and checkpointing."""
+import math
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from ray.rllib.algorithms import Algorithm
+from ray.rllib.algorithms.callbacks import DefaultCallbacks
+from ray.rllib.env import BaseEnv
+from ray.rllib.evaluation import Episode, RolloutWorker
+from ray.rllib.evaluation.episode_v2 import EpisodeV2
+from ray.rllib.policy import Policy
+from ray.rllib.utils.typing import PolicyID
+
+from rleplus.train.checkpoints import CheckpointManager
+
+
+class KPICallbacks(DefaultCallbacks):
+    """Surfaces the KPIs reported by `EnergyPlusEnv` at the end of each episode as custom metrics.
+
+    RLlib aggregates custom metrics over the episodes of each training iteration (mean, min, max),
+    so building KPIs can be followed live in Tensorboard. Memory metrics (see `env_config["memory_metrics"]`)
+    are surfaced too, prefixed with `memory_`.
+    """
+
+    def on_episode_end(
+        self,
+        *,
+        worker: RolloutWorker,
+        base_env: BaseEnv,
+        policies: Dict[PolicyID, Policy],
+        episode: Union[Episode, EpisodeV2],
+        env_index: Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        info = episode.last_info_for() or {}
+        for name, value in info.get("kpis", {}).items():
+            # NaN values (e.g. no meter, no valid PMV) would poison aggregated metrics
+            if not math.isnan(value):
+                episode.custom_metrics[name] = value
+        for name, value in info.get("memory", {}).items():
+            episode.custom_metrics[f"memory_{name}"] = value
+
+
+def fidelity_at(schedule: Sequence[Tuple[int, int]], timesteps: int) -> int:
+    """Returns the E+ timesteps per hour of the last schedule stage started at `timesteps`.
+
+    `schedule` is a list of (start timestep, timesteps per hour) stages, sorted by start timestep.
+    """
+    timesteps_per_hour = schedule[0][1]
+    for start, stage_timesteps_per_hour in schedule:
+        if timesteps >= start:
+            timesteps_per_hour = stage_timesteps_per_hour
+    return timesteps_per_hour
+
+
+class FidelityScheduleCallbacks(DefaultCallbacks):
+    """Switches environments from coarse to fine simulation fidelity along training.
+
+    Stages are read from `env_config["fidelity_schedule"]`, a list of (start timestep, E+ timesteps per hour).
+    When a stage starts, `set_fidelity()` is called on all environments of rollout workers, which takes effect
+    on their next episode.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.timesteps_per_hour: Optional[int] = None
+
+    def on_train_result(self, *, algorithm: Algorithm, result: dict, **kwargs) -> None:
+        schedule: List[Tuple[int, int]] = algorithm.config.env_config.get("fidelity_schedule") or []
+        if len(schedule) == 0:
+            return
+
+        timesteps_per_hour = fidelity_at(schedule, result["timesteps_total"])
+        if timesteps_per_hour != self.timesteps_per_hour:
+            algorithm.workers.foreach_env(lambda env: env.set_fidelity(timesteps_per_hour))
+            self.timesteps_per_hour = timesteps_per_hour
+        result["fidelity_timesteps_per_hour"] = timesteps_per_hour
+
+
+# metrics of RLlib results recorded in the checkpoint index, in addition to custom metrics (KPIs)
+CHECKPOINT_RESULT_METRICS = ["episode_reward_mean", "episode_reward_min", "episode_reward_max", "episode_len_mean"]
+
+
+def checkpoint_metrics(result: Dict[str, Any]) -> Dict[str, float]:
+    """Metrics of a training result recorded with its checkpoint, e.g. `episode_reward_mean` or KPIs aggregated
+    over the iteration's episodes such as `pmv_abs_mean_mean`."""
+    metrics = {name: result[name] for name in CHECKPOINT_RESULT_METRICS if name in result}
+    metrics.update(result.get("custom_metrics", {}))
+    return {name: float(value) for name, value in metrics.items() if isinstance(value, (int, float))}
+
+
+class CheckpointCallbacks(DefaultCallbacks):
+    """Checkpoints the algorithm with a `CheckpointManager`, off the training loop's critical path.
+
+    Configured by `env_config["checkpoints"]`, a dict with a `directory`, a `frequency` (in training iterations,
+    default 10), optional `stop_timesteps` and the other `CheckpointManager` arguments (`metric`, `mode`,
+    `keep_best`, `keep_last`).
+
+    The iteration reaching `stop_timesteps` is always checkpointed, then the manager is closed: pending checkpoints
+    are persisted before the result is reported, and the staging directory is removed. Otherwise, the manager is
+    closed when the algorithm is garbage collected, or at exit.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.manager: Optional[CheckpointManager] = None
+        self.frequency = 10
+        self.stop_timesteps: Optional[float] = None
+        self._finalizer: Optional[weakref.finalize] = None
+
+    def on_train_result(self, *, algorithm: Algorithm, result: dict, **kwargs) -> None:
+        checkpoints = algorithm.config.env_config.get("checkpoints")
+        if not checkpoints:
+            return
+        if self.manager is None:
+            checkpoints = dict(checkpoints)
+            self.frequency = checkpoints.pop("frequency", self.frequency)
+            self.stop_timesteps = checkpoints.pop("stop_timesteps", None)
+            self.manager = CheckpointManager(**checkpoints)
+            self._finalizer = weakref.finalize(algorithm, self.manager.close)
+
+        iteration = result["training_iteration"]
+        stopping = self.stop_timesteps is not None and result["timesteps_total"] >= self.stop_timesteps
+        if iteration % self.frequency == 0 or stopping:
+            path = self.manager.save(
+                algorithm.save_checkpoint,
+                iteration=iteration,
+                timesteps=result["timesteps_total"],
+                metrics=checkpoint_metrics(result),
+                config=algorithm.config.serialize(),
+            )
+            result["checkpoint_path"] = path
+        if stopping:
+            self.close()
+
+    def close(self) -> None:
+        """Waits for pending checkpoints and closes the manager. A later result opens a new one."""
+        if self._finalizer is not None:
+            self._finalizer()
+        self.manager = None
+        self._finalizer = None
@@ -0,0 +1,227 @@
+"""Checkpoint manager: background persistence, retention policy and a queryable checkpoint index.
+
+Saving a checkpoint is split in two steps:
+
+- the training loop serializes the checkpoint into a local staging directory (by default in `/dev/shm` when
+  available), which is fast as it doesn't touch the durable storage;
+- a background thread moves it into the checkpoints directory, records it in `index.json` and deletes the
+  checkpoints left out by the retention policy: the `keep_best` best ones by a metric, and the `keep_last` most
+  recent ones.
+
+The index records the iteration, timesteps, metrics and config hash of each checkpoint, so that checkpoints can
+be selected (e.g. the best one by mean PMV) without deserializing them, see `read_index()` and
+`select_checkpoints()`.
+"""
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+INDEX_FILE = "index.json"
+
+
+@dataclass
+class CheckpointEntry:
+    """A checkpoint recorded in the index."""
+
+    # directory name of the checkpoint, relative to the checkpoints directory
+    name: str
+    iteration: int
+    timesteps: int
+    metrics: Dict[str, float] = field(default_factory=dict)
+    # hash of the training config, see `config_hash()`
+    config_hash: Optional[str] = None
+    created: float = 0.0
+    # absolute path of the checkpoint, not stored in the index
+    path: str = ""
+
+    def metric(self, name: str) -> float:
+        value = self.metrics.get(name, math.nan)
+        return math.nan if value is None else float(value)
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """Stable short hash of a (json-like) config, values not serializable to json are hashed by their repr."""
+    dump = json.dumps(config, sort_keys=True, default=repr)
+    return hashlib.sha1(dump.encode()).hexdigest()[:12]
+
+
+def read_index(directory: Union[Path, str]) -> List[CheckpointEntry]:
+    """Reads the index of a checkpoints directory, ordered by iteration."""
+    directory = Path(directory).absolute()
+    with open(directory / INDEX_FILE) as f:
+        index = json.load(f)
+    entries = [CheckpointEntry(**entry) for entry in index["checkpoints"]]
+    for entry in entries:
+        entry.path = str(directory / entry.name)
+    return sorted(entries, key=lambda entry: entry.iteration)
+
+
+def select_checkpoints(
+    entries: List[CheckpointEntry], metric: str, mode: str = "max", top: Optional[int] = 1
+) -> List[CheckpointEntry]:
+    """Returns the `top` best checkpoints by a metric (all of them if `top` is None), best first.
+
+    Checkpoints without a value for the metric are never selected.
+    """
+    assert mode in ["min", "max"], f"mode must be min or max, got {mode}"
+    scored = [entry for entry in entries if not math.isnan(entry.metric(metric))]
+    scored.sort(key=lambda entry: entry.metric(metric), reverse=mode == "max")
+    return scored if top is None else scored[:top]
+
+
+def default_staging_dir() -> str:
+    """A staging directory in memory (/dev/shm) when available, so that serializing checkpoints is fast."""
+    return tempfile.mkdtemp(prefix="rleplus-checkpoints-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+
+class CheckpointManager:
+    """Persists checkpoints in the background, and keeps the best and most recent ones.
+
+    Args:
+        directory: checkpoints directory. An existing index in this directory is resumed.
+        metric: metric ranking checkpoints for `keep_best`. Without a metric, only the last checkpoints are kept.
+        mode: "max" or "min", whether higher or lower metric values are better.
+        keep_best: number of best checkpoints kept.
+        keep_last: number of most recent checkpoints kept (in addition to the best ones).
+        staging_dir: local directory checkpoints are first serialized into. Default is `default_staging_dir()`.
+        max_pending: maximum number of checkpoints staged but not persisted yet. When reached, `save()` waits
+            for the oldest one to be persisted, which bounds the staging disk usage.
+    """
+
+    def __init__(
+        self,
+        directory: Union[Path, str],
+        metric: Optional[str] = None,
+        mode: str = "max",
+        keep_best: int = 3,
+        keep_last: int = 2,
+        staging_dir: Optional[str] = None,
+        max_pending: int = 2,
+    ):
+        assert mode in ["min", "max"], f"mode must be min or max, got {mode}"
+        assert keep_best >= 0 and keep_last >= 1, "at least the last checkpoint must be kept"
+        assert max_pending >= 1, "max_pending must be >= 1"
+
+        self.directory = Path(directory).absolute()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.metric = metric
+        self.mode = mode
+        self.keep_best = keep_best
+        self.keep_last = keep_last
+        self.staging_dir = Path(staging_dir or default_staging_dir())
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+
+        self.entries: List[CheckpointEntry] = (
+            read_index(self.directory) if (self.directory / INDEX_FILE).exists() else []
+        )
+        self._lock = threading.Lock()
+        self._pending: List[Future] = []
+        self.max_pending = max_pending
+        # a single thread: checkpoints are persisted in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint-writer")
+
+    def save(
+        self,
+        write: Callable[[str], Any],
+        iteration: int,
+        timesteps: int,
+        metrics: Optional[Dict[str, float]] = None,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Serializes a checkpoint with `write(path)` into the staging directory, then persists it in the background.
+
+        Returns the path the checkpoint will have once persisted. Errors raised by the background thread are
+        raised by the next call to `save()` or `wait()`.
+        """
+        self._collect(block=len(self._pending) >= self.max_pending)
+
+        entry = CheckpointEntry(
+            name=f"checkpoint_{iteration:06d}",
+            iteration=iteration,
+            timesteps=timesteps,
+            metrics={name: float(value) for name, value in (metrics or {}).items()},
+            config_hash=config_hash(config) if config is not None else None,
+            created=time.time(),
+        )
+        entry.path = str(self.directory / entry.name)
+        staged = self.staging_dir / entry.name
+        shutil.rmtree(staged, ignore_errors=True)
+        staged.mkdir()
+        write(str(staged))
+
+        self._pending.append(self._executor.submit(self._persist, entry, staged))
+        return entry.path
+
+    def _collect(self, block: bool) -> None:
+        """Drops persisted checkpoints from the pending ones, re-raising their errors."""
+        if block:
+            self._pending.pop(0).result()
+        while self._pending and self._pending[0].done():
+            self._pending.pop(0).result()
+
+    def wait(self) -> None:
+        """Blocks until all saved checkpoints are persisted."""
+        while self._pending:
+            self._pending.pop(0).result()
+
+    def close(self) -> None:
+        self.wait()
+        self._executor.shutdown()
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+    def _persist(self, entry: CheckpointEntry, staged: Path) -> None:
+        # copied next to its final place first (staging is usually another file system), then renamed
+        tmp_path = self.directory / f".{entry.name}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        shutil.move(str(staged), str(tmp_path))
+        shutil.rmtree(entry.path, ignore_errors=True)
+        os.replace(tmp_path, entry.path)
+
+        with self._lock:
+            self.entries = [e for e in self.entries if e.name != entry.name] + [entry]
+            kept = self._retained()
+            removed = [e for e in self.entries if e.name not in kept]
+            self.entries = [e for e in self.entries if e.name in kept]
+            self._write_index()
+        # deleted once out of the index: the index never refers to a missing checkpoint
+        for e in removed:
+            shutil.rmtree(self.directory / e.name, ignore_errors=True)
+
+    def _retained(self) -> set:
+        """Names of the checkpoints kept by the retention policy."""
+        by_iteration = sorted(self.entries, key=lambda e: e.iteration)
+        kept = {e.name for e in by_iteration[-self.keep_last :]}
+        if self.metric is not None and self.keep_best > 0:
+            kept.update(e.name for e in select_checkpoints(self.entries, self.metric, self.mode, self.keep_best))
+        return kept
+
+    def _write_index(self) -> None:
+        index = {
+            "metric": self.metric,
+            "mode": self.mode,
+            "checkpoints": [
+                {k: v for k, v in asdict(e).items() if k != "path"}
+                for e in sorted(self.entries, key=lambda e: e.iteration)
+            ],
+        }
+        tmp_file = self.directory / f"{INDEX_FILE}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_file, self.directory / INDEX_FILE)
+
+    def best(self) -> Optional[CheckpointEntry]:
+        """The best persisted checkpoint by the manager's metric, or the last one without a metric."""
+        with self._lock:
+            if self.metric is None:
+                return max(self.entries, key=lambda e: e.iteration, default=None)
+            best = select_checkpoints(self.entries, self.metric, self.mode, top=1)
+            return best[0] if best else None
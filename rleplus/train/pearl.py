@@ -1,6 +1,9 @@
 """An example of how to use Pearl to train a Bootstrapped DQN agent on the Amphitheater
 environment.
 
+With `--num-actors N`, N actor processes collect experience with their own EnergyPlus environment,
+while the main process trains continuously on their transitions (see `rleplus.train.pearl_async`).
+
 See https://github.com/facebookresearch/Pearl for more configuration options.
 """
 import argparse
@@ -25,6 +28,11 @@ from pearl.utils.instantiations.environments.gym_environment import GymEnvironme
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
 from rleplus.examples.registry import env_creator
+from rleplus.train.pearl_async import async_learning
+from rleplus.train.pearl_replay import CompactBootstrapReplayBuffer
+
+# Bootstrapped DQN ensemble size
+ENSEMBLE_SIZE = 10
 
 
 def parse_args() -> argparse.Namespace:
@@ -52,26 +60,46 @@ def parse_args() -> argparse.Namespace:
         default=TemporaryDirectory().name,
     )
     parser.add_argument("--timesteps", "-t", help="Number of timesteps to train", required=False, default=1e6)
+    parser.add_argument(
+        "--replay-capacity", type=int, help="Replay buffer capacity, in transitions", required=False, default=100_000
+    )
+    parser.add_argument(
+        "--replay-path",
+        help="Directory of a memory-mapped replay buffer, so that capacity can exceed RAM and transitions survive "
+        "restarts. Default is an in-memory replay buffer.",
+        required=False,
+        default=None,
+    )
+    parser.add_argument(
+        "--num-actors",
+        type=int,
+        help="Number of actor processes collecting experience for an asynchronous learner. "
+        "Default is 0: a single environment, stepped and trained in turn.",
+        required=False,
+        default=0,
+    )
+    parser.add_argument(
+        "--sync-every",
+        type=int,
+        help="Number of learning steps between two policy syncs to actors (with --num-actors)",
+        required=False,
+        default=10,
+    )
+    parser.add_argument(
+        "--steps-per-learn",
+        type=int,
+        help="Number of transitions received from actors per learning step (with --num-actors)",
+        required=False,
+        default=96,
+    )
 
     built_args = parser.parse_args()
     print(f"Running with following CLI args: {built_args}")
     return built_args
 
 
-def main():
-    args = parse_args()
-
-    # build the environment: we need to wrap the original gym environment in a Pearl environment
-    env_cls = env_creator(args.env)
-    env = GymEnvironment(
-        env_or_env_name=env_cls(
-            env_config=dict(
-                csv=args.csv,
-                verbose=args.verbose,
-                output=args.output,
-            )
-        )
-    )
+def make_agent(env: GymEnvironment, replay_buffer: BootstrapReplayBuffer) -> PearlAgent:
+    """Builds the Bootstrapped DQN agent for the given environment."""
     assert isinstance(env.action_space, DiscreteActionSpace)
 
     # declare some variables about environment dimensions
@@ -87,12 +115,11 @@ def main():
     # The main idea is to keep an ensemble of k Q-value networks and on each episode, one of them is sampled and the
     # greedy policy associated with that network is used for exploration.
     # See: https://arxiv.org/abs/1602.04621
-    k = 10
     policy_learner = BootstrappedDQN(
         q_ensemble_network=EnsembleQValueNetwork(
             state_dim=state_dim,
             action_dim=act_dim,
-            ensemble_size=k,
+            ensemble_size=ENSEMBLE_SIZE,
             output_dim=1,
             hidden_dims=[64, 64],
             prior_scale=0.3,
@@ -114,13 +141,47 @@ def main():
     )
 
     # Pearl agent
-    agent = PearlAgent(
+    return PearlAgent(
         policy_learner=policy_learner,
         history_summarization_module=history_summarization_module,
-        replay_buffer=BootstrapReplayBuffer(100_000, 1.0, k),
+        replay_buffer=replay_buffer,
         device_id=-1,
     )
 
+
+def main():
+    args = parse_args()
+
+    env_config = dict(
+        csv=args.csv,
+        verbose=args.verbose,
+        output=args.output,
+    )
+    # build the environment: we need to wrap the original gym environment in a Pearl environment
+    env_cls = env_creator(args.env)
+    gym_env = env_cls(env_config=env_config)
+    env = GymEnvironment(env_or_env_name=gym_env)
+    replay_buffer = CompactBootstrapReplayBuffer(args.replay_capacity, 1.0, ENSEMBLE_SIZE, path=args.replay_path)
+    agent = make_agent(env, replay_buffer)
+
+    if args.num_actors > 0:
+        # actors run their own environments, the local one is only used to build the learner agent
+        gym_env.close()
+        async_learning(
+            agent=agent,
+            replay_buffer=replay_buffer,
+            make_agent=make_agent,
+            env_name=args.env,
+            env_config=env_config,
+            num_actors=args.num_actors,
+            number_of_steps=int(args.timesteps),
+            ensemble_size=ENSEMBLE_SIZE,
+            sync_every=args.sync_every,
+            steps_per_learn=args.steps_per_learn,
+        )
+        replay_buffer.flush()
+        return
+
     # run the online learning loop
     online_learning(
         agent=agent,
@@ -130,6 +191,7 @@ def main():
         record_period=10000,
         learn_after_episode=True,
     )
+    replay_buffer.flush()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,271 @@
+"""Asynchronous actor-learner training loop for Pearl agents.
+
+Several actor processes each run their own EnergyPlus environment and a copy of the agent. Their
+transitions stream into the replay buffer of a central learner, which trains continuously and
+periodically sends its network weights back to the actors. E+ simulations and learning no longer
+wait for each other, and sampling throughput scales with the number of actors: learning is throttled
+to the rate of incoming transitions, and the learner's torch threads are limited to the cores left by
+the actors.
+"""
+import multiprocessing as mp
+import pickle
+import time
+import traceback
+from queue import Empty, Full
+from typing import Any, Callable, Dict, List, Optional
+
+import torch
+from pearl.pearl_agent import PearlAgent
+from pearl.replay_buffers.sequential_decision_making.bootstrap_replay_buffer import (
+    BootstrapReplayBuffer,
+)
+from pearl.utils.instantiations.environments.gym_environment import GymEnvironment
+
+from rleplus.examples.registry import env_creator
+
+# builds an agent for the given environment and replay buffer
+AgentFactory = Callable[[GymEnvironment, BootstrapReplayBuffer], PearlAgent]
+# builds an actor's environment from the env name and config
+EnvFactory = Callable[[str, Dict[str, Any]], GymEnvironment]
+
+
+class TransitionQueueReplayBuffer(BootstrapReplayBuffer):
+    """Actor-side replay buffer: forwards pushed transitions to the learner instead of storing them.
+
+    Push arguments are forwarded as is, and replayed by the learner on its own buffer, so bootstrap
+    masks are drawn by the learner. Messages are pickled by value: torch's multiprocessing reductions
+    would otherwise move each small tensor to its own shared memory segment.
+    """
+
+    def __init__(self, queue: mp.Queue, stop_event, ensemble_size: int):
+        super().__init__(1, 1.0, ensemble_size)
+        self.queue = queue
+        self.stop_event = stop_event
+
+    def push(self, *args, **kwargs) -> None:
+        put(self.queue, ("transition", args, kwargs), self.stop_event)
+
+
+def put(queue: mp.Queue, message: Any, stop_event) -> None:
+    """Puts a message on a bounded queue, giving up once training is stopped."""
+    data = pickle.dumps(message)
+    while not stop_event.is_set():
+        try:
+            queue.put(data, timeout=0.1)
+            return
+        except Full:
+            continue
+
+
+def policy_weights(agent: PearlAgent) -> bytes:
+    # parameters only: buffers hold per-episode state, e.g. the observation history of the LSTM
+    # history summarization module, which must not be overwritten in running actors
+    return pickle.dumps({name: p.detach().cpu().clone() for name, p in agent.policy_learner.named_parameters()})
+
+
+def load_policy_weights(agent: PearlAgent, weights: bytes) -> None:
+    agent.policy_learner.load_state_dict(pickle.loads(weights), strict=False)
+
+
+def make_gym_environment(env_name: str, env_config: Dict[str, Any]) -> GymEnvironment:
+    """Default actor environment: the registered EnergyPlus env, wrapped in a Pearl environment."""
+    return GymEnvironment(env_or_env_name=env_creator(env_name)(env_config))
+
+
+def run_actor(
+    actor_id: int,
+    env_name: str,
+    env_config: Dict[str, Any],
+    make_agent: AgentFactory,
+    make_env: EnvFactory,
+    ensemble_size: int,
+    transitions: mp.Queue,
+    weights: mp.Queue,
+    stop_event,
+) -> None:
+    """Actor process: runs episodes with the latest policy weights received from the learner.
+
+    Errors are reported to the learner, with their traceback, before the process exits.
+    """
+    # actors share the machine's cores with E+ and the learner
+    torch.set_num_threads(1)
+
+    env = None
+    try:
+        env = make_env(env_name, env_config)
+        agent = make_agent(env, TransitionQueueReplayBuffer(transitions, stop_event, ensemble_size))
+        while not stop_event.is_set():
+            observation, action_space = env.reset()
+            agent.reset(observation, action_space)
+            episode_return, episode_steps, done = 0.0, 0, False
+            while not done and not stop_event.is_set():
+                try:
+                    load_policy_weights(agent, weights.get_nowait())
+                except Empty:
+                    pass
+                action_result = env.step(agent.act(exploit=False))
+                agent.observe(action_result)
+                episode_return += float(action_result.reward)
+                episode_steps += 1
+                done = action_result.terminated or action_result.truncated
+            if done:
+                put(transitions, ("episode", actor_id, episode_steps, episode_return), stop_event)
+    except Exception:
+        put(transitions, ("error", actor_id, traceback.format_exc()), stop_event)
+        raise
+    finally:
+        if env is not None:
+            # Pearl's GymEnvironment wraps the gym env
+            getattr(env, "env", env).close()
+
+
+def broadcast(weights_queues: List[mp.Queue], weights: bytes) -> None:
+    """Sends weights to all actors, replacing those they did not pick up yet."""
+    for queue in weights_queues:
+        try:
+            queue.get_nowait()
+        except Empty:
+            pass
+        try:
+            queue.put_nowait(weights)
+        except Full:
+            # the actor is loading the previous weights, it will get the next ones
+            pass
+
+
+def async_learning(
+    agent: PearlAgent,
+    replay_buffer: BootstrapReplayBuffer,
+    make_agent: AgentFactory,
+    env_name: str,
+    env_config: Dict[str, Any],
+    num_actors: int,
+    number_of_steps: int,
+    ensemble_size: int,
+    sync_every: int = 10,
+    steps_per_learn: int = 96,
+    learner_threads: Optional[int] = None,
+    make_env: EnvFactory = make_gym_environment,
+    max_queued_transitions: int = 10_000,
+    print_every_x_steps: int = 1000,
+    stop_timeout: float = 30.0,
+) -> Dict[str, List[float]]:
+    """Trains `agent`, whose replay buffer is `replay_buffer`, on transitions collected by `num_actors`
+    actor processes.
+
+    `make_agent` (and `make_env`) build each actor's copy of the agent (and its environment), they must be
+    module-level functions so that they can be sent to spawned processes. Each actor writes its E+ output
+    to its own sub-directory of `env_config["output"]`. Actor weights are synced every `sync_every`
+    learning steps.
+
+    The agent learns once per `steps_per_learn` received transitions (by default, once per simulated day
+    of 15 minutes timesteps, as the synchronous loop learning after each episode), and waits for
+    transitions otherwise. The learner runs `learner_threads` torch threads, by default the cores not used
+    by actors. Training fails as soon as an actor fails.
+
+    Returns episode returns and lengths, in order of completion.
+    """
+    from rleplus.evaluation.evaluate import available_cpus
+
+    ctx = mp.get_context("spawn")
+    stop_event = ctx.Event()
+    # bounded: actors wait for the learner rather than piling up transitions in memory
+    transitions = ctx.Queue(maxsize=max_queued_transitions)
+    weights_queues = [ctx.Queue(maxsize=1) for _ in range(num_actors)]
+    broadcast(weights_queues, policy_weights(agent))
+
+    actors = [
+        ctx.Process(
+            target=run_actor,
+            args=(
+                actor_id,
+                env_name,
+                {**env_config, "output": f"{env_config['output']}/actor-{actor_id}"},
+                make_agent,
+                make_env,
+                ensemble_size,
+                transitions,
+                weights_queues[actor_id],
+                stop_event,
+            ),
+            daemon=True,
+        )
+        for actor_id in range(num_actors)
+    ]
+    for actor in actors:
+        actor.start()
+
+    num_threads = torch.get_num_threads()
+    torch.set_num_threads(learner_threads or max(available_cpus() - num_actors, 1))
+
+    info: Dict[str, List[float]] = {"return": [], "episode_steps": []}
+    steps, learn_steps, next_print = 0, 0, print_every_x_steps
+    start = time.perf_counter()
+
+    def handle(messages: List[Any]) -> None:
+        nonlocal steps
+        for message in messages:
+            if message[0] == "transition":
+                _, args, kwargs = message
+                replay_buffer.push(*args, **kwargs)
+                steps += 1
+            elif message[0] == "episode":
+                _, actor_id, episode_steps, episode_return = message
+                info["return"].append(episode_return)
+                info["episode_steps"].append(episode_steps)
+                print(f"actor {actor_id}: episode {len(info['return'])}, return {episode_return:.2f}")
+            else:
+                _, actor_id, error = message
+                raise RuntimeError(f"Actor {actor_id} failed:\n{error}")
+
+    def can_learn() -> bool:
+        # throttled to incoming transitions, the first learning step waits for one
+        return steps > 0 and learn_steps < steps / steps_per_learn
+
+    try:
+        while steps < number_of_steps:
+            # wait for data only while there is nothing to learn
+            handle(drain(transitions, block=not can_learn()))
+
+            for actor_id, actor in enumerate(actors):
+                if actor.exitcode is not None:
+                    # the actor's error report, if sent before it exited
+                    handle(drain(transitions, block=True))
+                    raise RuntimeError(f"Actor {actor_id} exited with code {actor.exitcode}")
+
+            if can_learn():
+                agent.learn()
+                learn_steps += 1
+                if learn_steps % sync_every == 0:
+                    broadcast(weights_queues, policy_weights(agent))
+
+            if steps >= next_print:
+                elapsed = time.perf_counter() - start
+                print(f"steps {steps}, learning steps {learn_steps}, {steps / elapsed:.1f} env steps/s")
+                next_print += print_every_x_steps
+    finally:
+        stop_event.set()
+        # actors may be blocked on a full queue: keep draining until they exit
+        deadline = time.monotonic() + stop_timeout
+        while any(actor.is_alive() for actor in actors) and time.monotonic() < deadline:
+            drain(transitions, block=True)
+        for actor in actors:
+            if actor.is_alive():
+                actor.terminate()
+            actor.join()
+        torch.set_num_threads(num_threads)
+
+    return info
+
+
+def drain(queue: mp.Queue, block: bool, max_items: int = 1000) -> List[Any]:
+    """Gets up to `max_items` messages, waiting briefly for the first one if `block`."""
+    messages = []
+    try:
+        if block:
+            messages.append(pickle.loads(queue.get(timeout=0.1)))
+        while len(messages) < max_items:
+            messages.append(pickle.loads(queue.get_nowait()))
+    except Empty:
+        pass
+    return messages
@@ -0,0 +1,177 @@
+"""Compact replay buffer for Pearl agents.
+
+Pearl's `BootstrapReplayBuffer` keeps one Python object per transition, holding a dozen small
+tensors (including per-transition copies of the available actions). `CompactBootstrapReplayBuffer`
+stores transitions in preallocated float32 / uint8 ring arrays instead, optionally memory-mapped, and
+samples batches with vectorized index gathers. `benchmarks/replay_memory.py` measures the memory per
+transition of both.
+
+It depends on a few Pearl internals which changed across versions: the tensor device attribute of
+replay buffers (`device` then `device_for_tensors`) and the fields of `TransitionWithBootstrapMaskBatch`
+(e.g. `truncated`, added later). Both are looked up at runtime.
+"""
+import dataclasses
+import os
+from typing import Optional
+
+import numpy as np
+import torch
+from pearl.replay_buffers.sequential_decision_making.bootstrap_replay_buffer import (
+    BootstrapReplayBuffer,
+)
+from pearl.replay_buffers.transition import TransitionWithBootstrapMaskBatch
+
+from rleplus.train.ring_buffer import RingArrays
+
+# action space of a memory-mapped buffer, saved next to its ring metadata
+ACTIONS_FILE = "actions.pt"
+
+
+def _to_numpy(value, dtype) -> np.ndarray:
+    if isinstance(value, torch.Tensor):
+        value = value.detach().cpu().numpy()
+    return np.asarray(value, dtype=dtype)
+
+
+def _actions_tensor(action_space) -> torch.Tensor:
+    # (number of actions, action dim) tensor of a discrete action space
+    actions = getattr(action_space, "actions_batch", None)
+    return actions if actions is not None else action_space.elements_batch
+
+
+class CompactBootstrapReplayBuffer(BootstrapReplayBuffer):
+    """Drop-in replacement of `BootstrapReplayBuffer`, for agents with a fixed discrete action space.
+
+    Per transition, states and next states are stored as float32, reward as float32, terminated flag
+    and the bootstrap mask of each ensemble member as uint8. Available actions are stored once.
+    With `path`, the ring arrays are memory-mapped files in that directory: capacity is bounded by
+    disk space rather than RAM, and transitions survive restarts (see `RingArrays`), with the action
+    space, so that a re-opened buffer can be sampled before the next push.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        p: float,
+        ensemble_size: int,
+        path: Optional[str] = None,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(capacity, p, ensemble_size)
+        self.p = p
+        self.ensemble_size = ensemble_size
+        self.storage = RingArrays(capacity, path)
+        self.rng = np.random.default_rng(seed)
+
+        self.action_dtype: Optional[torch.dtype] = None
+        self.available_actions: Optional[torch.Tensor] = None
+        self.unavailable_actions_mask: Optional[torch.Tensor] = None
+        if path is not None and len(self.storage) > 0 and os.path.exists(os.path.join(path, ACTIONS_FILE)):
+            actions = torch.load(os.path.join(path, ACTIONS_FILE))
+            self.available_actions = actions["available_actions"]
+            self.unavailable_actions_mask = actions["unavailable_actions_mask"]
+            self.action_dtype = actions["action_dtype"]
+
+    def _set_action_space(self, action_space, max_number_actions: Optional[int]) -> None:
+        actions = _actions_tensor(action_space)
+        max_number_actions = max_number_actions or actions.shape[0]
+        # padded as in Pearl's tensor based replay buffers
+        available_actions = torch.zeros((max_number_actions, actions.shape[1]), dtype=actions.dtype)
+        available_actions[: actions.shape[0]] = actions
+        unavailable_actions_mask = torch.ones(max_number_actions, dtype=torch.bool)
+        unavailable_actions_mask[: actions.shape[0]] = False
+
+        if self.available_actions is None:
+            self.available_actions = available_actions
+            self.unavailable_actions_mask = unavailable_actions_mask
+        elif not torch.equal(self.available_actions, available_actions):
+            raise ValueError("CompactBootstrapReplayBuffer only supports a fixed action space")
+
+    def push(
+        self,
+        state,
+        action,
+        reward,
+        next_state,
+        curr_available_actions,
+        next_available_actions,
+        terminated,
+        max_number_actions: Optional[int] = None,
+        cost=None,
+        **kwargs,
+    ) -> None:
+        if self.available_actions is None:
+            self._set_action_space(curr_available_actions, max_number_actions)
+            self.action_dtype = torch.as_tensor(action).dtype
+            self._save_action_space()
+
+        self.storage.append(
+            state=_to_numpy(state, np.float32),
+            action=_to_numpy(action, np.float32),
+            reward=np.float32(reward),
+            next_state=_to_numpy(next_state, np.float32),
+            terminated=np.uint8(terminated),
+            bootstrap_mask=(self.rng.random(self.ensemble_size) < self.p).astype(np.uint8),
+        )
+
+    def _save_action_space(self) -> None:
+        if self.storage.path is None:
+            return
+        tmp_file = os.path.join(self.storage.path, f"{ACTIONS_FILE}.tmp")
+        torch.save(
+            {
+                "available_actions": self.available_actions,
+                "unavailable_actions_mask": self.unavailable_actions_mask,
+                "action_dtype": self.action_dtype,
+            },
+            tmp_file,
+        )
+        os.replace(tmp_file, os.path.join(self.storage.path, ACTIONS_FILE))
+
+    @property
+    def tensor_device(self) -> torch.device:
+        """Device of sampled batches, as set by the agent on its replay buffer."""
+        # renamed from `device` to `device_for_tensors` in later Pearl versions
+        for name in ["device_for_tensors", "device"]:
+            device = getattr(self, name, None)
+            if device is not None:
+                return torch.device(device)
+        return torch.device("cpu")
+
+    def sample(self, batch_size: int) -> TransitionWithBootstrapMaskBatch:
+        if batch_size > len(self):
+            raise ValueError(f"Can't get a batch of size {batch_size} from a replay buffer with {len(self)} elements")
+        if self.available_actions is None:
+            # re-opened from disk without its action space (saved by older versions)
+            raise ValueError("Can't sample before a transition has been pushed")
+
+        rows = self.storage.sample(self.rng, batch_size)
+        available_actions = self.available_actions.expand(batch_size, -1, -1)
+        unavailable_actions_mask = self.unavailable_actions_mask.expand(batch_size, -1)
+        terminated = torch.from_numpy(rows["terminated"]).bool()
+        fields = {
+            "state": torch.from_numpy(rows["state"]),
+            "action": torch.from_numpy(rows["action"]).to(self.action_dtype),
+            "reward": torch.from_numpy(rows["reward"]),
+            "next_state": torch.from_numpy(rows["next_state"]),
+            "curr_available_actions": available_actions,
+            "curr_unavailable_actions_mask": unavailable_actions_mask,
+            "next_available_actions": available_actions,
+            "next_unavailable_actions_mask": unavailable_actions_mask,
+            "terminated": terminated,
+            # truncation is not stored: only terminated transitions stop bootstrapping
+            "truncated": torch.zeros_like(terminated),
+            "bootstrap_mask": torch.from_numpy(rows["bootstrap_mask"]).float(),
+        }
+        names = {field.name for field in dataclasses.fields(TransitionWithBootstrapMaskBatch)}
+        batch = TransitionWithBootstrapMaskBatch(**{name: value for name, value in fields.items() if name in names})
+        return batch.to(self.tensor_device)
+
+    def flush(self) -> None:
+        self.storage.flush()
+
+    def clear(self) -> None:
+        self.storage.clear()
+
+    def __len__(self) -> int:
+        return len(self.storage)
@@ -0,0 +1,109 @@
+"""Fixed-capacity ring of preallocated numpy arrays, optionally memory-mapped."""
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+METADATA_FILE = "ring.json"
+
+
+class RingArrays:
+    """Named arrays holding the last `capacity` appended rows.
+
+    Arrays are allocated on the first append, from the shapes and dtypes of its values. When `path`
+    is given, each array is a `.npy` file memory-mapped from that directory, so capacity can exceed
+    RAM. Write position and size are saved to `ring.json` every `flush_every` appends and on
+    `flush()`: a ring re-opened from the same directory resumes where it was last flushed.
+    """
+
+    def __init__(self, capacity: int, path: Optional[str] = None, flush_every: int = 1000):
+        assert capacity > 0, "capacity must be > 0"
+        self.capacity = capacity
+        self.path = path
+        self.flush_every = flush_every
+        self.arrays: Dict[str, np.ndarray] = {}
+        # next write index, and number of valid rows
+        self.position = 0
+        self.size = 0
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(os.path.join(path, METADATA_FILE)):
+                self._open()
+
+    def _open(self) -> None:
+        with open(os.path.join(self.path, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        if metadata["capacity"] != self.capacity:
+            raise ValueError(
+                f"Ring buffer in {self.path} has capacity {metadata['capacity']}, expected {self.capacity}"
+            )
+        self.position, self.size = metadata["position"], metadata["size"]
+        self.arrays = {
+            name: np.lib.format.open_memmap(os.path.join(self.path, f"{name}.npy"), mode="r+")
+            for name in metadata["fields"]
+        }
+
+    def _allocate(self, row: Dict[str, np.ndarray]) -> None:
+        for name, value in row.items():
+            shape = (self.capacity, *value.shape)
+            if self.path is None:
+                self.arrays[name] = np.zeros(shape, dtype=value.dtype)
+            else:
+                self.arrays[name] = np.lib.format.open_memmap(
+                    os.path.join(self.path, f"{name}.npy"), mode="w+", dtype=value.dtype, shape=shape
+                )
+
+    def append(self, **row) -> None:
+        row = {name: np.asarray(value) for name, value in row.items()}
+        if not self.arrays:
+            self._allocate(row)
+        elif row.keys() != self.arrays.keys():
+            raise ValueError(f"Expected fields {sorted(self.arrays)}, got {sorted(row)}")
+
+        for name, value in row.items():
+            self.arrays[name][self.position] = value
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+        if self.path is not None and self.position % self.flush_every == 0:
+            self.flush()
+
+    def gather(self, indices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Rows at `indices`, each in [0, len(self))."""
+        return {name: array[indices] for name, array in self.arrays.items()}
+
+    def sample(self, rng: np.random.Generator, batch_size: int) -> Dict[str, np.ndarray]:
+        """Uniformly sampled rows, with replacement."""
+        return self.gather(rng.integers(0, self.size, batch_size))
+
+    def clear(self) -> None:
+        self.position = 0
+        self.size = 0
+        if self.path is not None:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes memory-mapped arrays and the ring metadata to disk."""
+        if self.path is None:
+            return
+        for array in self.arrays.values():
+            array.flush()
+        metadata = {
+            "capacity": self.capacity,
+            "position": self.position,
+            "size": self.size,
+            "fields": list(self.arrays),
+        }
+        tmp_file = os.path.join(self.path, f"{METADATA_FILE}.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(metadata, f)
+        os.replace(tmp_file, os.path.join(self.path, METADATA_FILE))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def __len__(self) -> int:
+        return self.size
@@ -1,18 +1,36 @@
 """An example of using Ray RLlib to train a PPO agent on EnergyPlus."""
 
 import argparse
+import os
 from tempfile import TemporaryDirectory
-from typing import List
+from typing import List, Tuple
 
 import ray
 from ray import air, tune
+from ray.rllib.algorithms.callbacks import make_multi_callbacks
 from ray.rllib.algorithms.ppo import PPOConfig
 from ray.tune.experiment import Trial
 
-from rleplus.examples.registry import register_all
+from rleplus.env.bundle import make_bundle
+from rleplus.examples.registry import env_creator, register_all
+from rleplus.train.callbacks import (
+    CheckpointCallbacks,
+    FidelityScheduleCallbacks,
+    KPICallbacks,
+)
 
 
-def parse_args() -> argparse.Namespace:
+def parse_fidelity_schedule(value: str) -> List[Tuple[int, int]]:
+    """Parses a "start:timesteps_per_hour,..." schedule, e.g. "0:1,200000:4"."""
+    stages = []
+    for stage in value.split(","):
+        start, timesteps_per_hour = stage.split(":")
+        stages.append((int(float(start)), int(timesteps_per_hour)))
+    return sorted(stages)
+
+
+def make_arg_parser() -> argparse.ArgumentParser:
+    """CLI arguments of experiments, also used as env config."""
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--env",
@@ -60,7 +78,157 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Whether to auto-wrap the model with an LSTM. Only valid option for " "--run=[IMPALA|PPO|R2D2]",
     )
-    built_args = parser.parse_args()
+    parser.add_argument(
+        "--frame-stack",
+        type=int,
+        default=None,
+        metavar="K",
+        help="Observe the last K observations stacked, a cheaper alternative to --use-lstm to see recent dynamics. "
+        "Default is to observe the last observation only",
+    )
+    parser.add_argument(
+        "--frame-stack-actions",
+        action="store_true",
+        help="With --frame-stack, also stack the action that led to each observation",
+    )
+    parser.add_argument(
+        "--timesteps-per-hour",
+        type=int,
+        default=None,
+        help="Simulation fidelity: number of E+ timesteps per hour. Default is the IDF's own Timestep",
+    )
+    parser.add_argument(
+        "--fidelity-schedule",
+        type=parse_fidelity_schedule,
+        default=None,
+        help="Coarse to fine fidelity schedule, as start_timestep:timesteps_per_hour stages. E.g. 0:1,200000:4 "
+        "trains with hourly timesteps first, then with 15 minutes timesteps from 200k timesteps",
+    )
+    parser.add_argument(
+        "--start-date-curriculum",
+        choices=["return", "discomfort", "complaints"],
+        default=None,
+        help="Start episodes on the days of the run period where the policy performs worst, as measured by this "
+        "episode metric. Default is to always start on the first day of the run period",
+    )
+    parser.add_argument(
+        "--weather-pool",
+        default=None,
+        help="Directory of EPW weather files to sample from on each episode (domain randomization)",
+    )
+    parser.add_argument(
+        "--weather-variants",
+        type=int,
+        default=0,
+        help="Number of synthetic variants (perturbed temperature and humidity) of each --weather-pool file, "
+        "generated in the background",
+    )
+    parser.add_argument(
+        "--model-bundle",
+        action="store_true",
+        help="Put the IDF and weather files in the Ray object store, materialized by each node in a local cache, "
+        "and write outputs in a directory per worker: nodes of a multi-node cluster need no shared storage",
+    )
+    parser.add_argument(
+        "--autotune",
+        action="store_true",
+        help="Measure env and policy costs with a short calibration rollout, then choose the number of workers, "
+        "envs per worker, rollout fragment length and train batch size for the local cores (overrides --num-workers)",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=None,
+        help="Directory of checkpoints, saved in the background every --checkpoint-frequency iterations and indexed "
+        "with their metrics in index.json. Default is to not checkpoint",
+    )
+    parser.add_argument(
+        "--checkpoint-frequency", type=int, default=10, help="Number of training iterations between checkpoints"
+    )
+    parser.add_argument(
+        "--checkpoint-metric",
+        default="episode_reward_mean",
+        help="Metric ranking checkpoints, e.g. episode_reward_mean or a KPI such as pmv_abs_mean_mean",
+    )
+    parser.add_argument(
+        "--checkpoint-mode", choices=["min", "max"], default="max", help="Whether lower or higher metrics are better"
+    )
+    parser.add_argument("--keep-best", type=int, default=3, help="Number of best checkpoints kept, by metric")
+    parser.add_argument("--keep-last", type=int, default=2, help="Number of most recent checkpoints kept")
+    parser.add_argument(
+        "--max-episode-retries",
+        type=int,
+        default=3,
+        help="Number of consecutive EnergyPlus failures after which training stops. Failed episodes are ended and "
+        "restarted on a fresh simulation, their output directory is kept with a -failed suffix. 0 to fail on the "
+        "first EnergyPlus failure",
+    )
+    parser.add_argument(
+        "--memory-metrics",
+        dest="memory_metrics_every",
+        type=int,
+        default=None,
+        metavar="EVERY",
+        help="Report memory metrics (RSS, live runners and threads, history sizes, output size) every EVERY "
+        "episodes, as memory_* custom metrics. Default is no memory metrics",
+    )
+    parser.add_argument(
+        "--tracemalloc-top",
+        type=int,
+        default=0,
+        help="With --memory-metrics, also report the memory traced by tracemalloc of the top N project modules",
+    )
+    return parser
+
+
+def process_args(built_args: argparse.Namespace) -> argparse.Namespace:
+    """Turns parsed CLI arguments into env config entries (e.g. `fault_tolerance`, `checkpoints`)."""
+    if built_args.fidelity_schedule:
+        # envs start with the first stage fidelity
+        built_args.timesteps_per_hour = built_args.fidelity_schedule[0][1]
+    if built_args.weather_pool:
+        built_args.weather_pool = {
+            "weather_files": built_args.weather_pool,
+            "variants_per_file": built_args.weather_variants,
+        }
+    built_args.fault_tolerance = (
+        {"max_retries": built_args.max_episode_retries} if built_args.max_episode_retries > 0 else None
+    )
+    if built_args.frame_stack:
+        built_args.frame_stack = {"num_frames": built_args.frame_stack, "actions": built_args.frame_stack_actions}
+    built_args.memory_metrics = None
+    if built_args.memory_metrics_every:
+        built_args.memory_metrics = {
+            "every": built_args.memory_metrics_every,
+            "tracemalloc_top": built_args.tracemalloc_top,
+        }
+    built_args.checkpoints = None
+    if built_args.checkpoint_dir:
+        built_args.checkpoints = {
+            "directory": os.path.abspath(built_args.checkpoint_dir),
+            "frequency": built_args.checkpoint_frequency,
+            "metric": built_args.checkpoint_metric,
+            "mode": built_args.checkpoint_mode,
+            "keep_best": built_args.keep_best,
+            "keep_last": built_args.keep_last,
+            "stop_timesteps": float(built_args.timesteps),
+        }
+    return built_args
+
+
+def bundle_env_model(args: argparse.Namespace) -> argparse.Namespace:
+    """With `--model-bundle`, replaces it with a bundle of the env's model files. Ray must be initialized."""
+    if args.model_bundle:
+        env = env_creator(args.env)({**vars(args), "model_bundle": None})
+        try:
+            args.model_bundle = make_bundle(env.get_model_files())
+        finally:
+            env.close()
+        print(f"Model bundle {args.model_bundle.digest}: {args.model_bundle.files}")
+    return args
+
+
+def parse_args() -> argparse.Namespace:
+    built_args = process_args(make_arg_parser().parse_args())
     print(f"Running with following CLI args: {built_args}")
     return built_args
 
@@ -69,17 +237,13 @@ class CustomCallback(tune.Callback):
         return super().on_step_begin(iteration, trials, **info)
     
 
-def main():
-    args = parse_args()
-
-    ray.init()
-
-    register_all()
-
+def make_ppo_config(args: argparse.Namespace) -> PPOConfig:
+    """PPO configuration of an experiment, the env config being the CLI args."""
     # Ray configuration. See Ray docs for tuning
-    config = (
+    return (
         PPOConfig()
         # .callbacks(CustomCallback)
+        .callbacks(make_multi_callbacks([KPICallbacks, FidelityScheduleCallbacks, CheckpointCallbacks]))
         .environment(
             env=args.env,
             env_config=vars(args),
@@ -112,6 +276,29 @@ def main():
         )
     )
 
+
+def main():
+    args = parse_args()
+
+    ray.init()
+
+    register_all()
+
+    args = bundle_env_model(args)
+    config = make_ppo_config(args)
+
+    if args.autotune:
+        from rleplus.evaluation.evaluate import available_cpus
+        from rleplus.train.autotune import autotune
+
+        plan = autotune(env_creator(args.env), vars(args), config, num_cpus=available_cpus())
+        print(f"Autotuned rollout plan: {plan}")
+        config = config.rollouts(
+            num_rollout_workers=plan.num_rollout_workers,
+            num_envs_per_worker=plan.num_envs_per_worker,
+            rollout_fragment_length=plan.rollout_fragment_length,
+        ).training(train_batch_size=plan.train_batch_size)
+
     print("PPO config:", config.to_dict())
 
     tune.Tuner(
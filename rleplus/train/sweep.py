@@ -0,0 +1,267 @@
+"""Multi-fidelity hyperparameter sweep of PPO or DQN, with an ASHA scheduler.
+
+Trials sample their hyperparameters from a search space (see `search_space()`) and are stopped early by ASHA
+(asynchronous successive halving): at each rung (`--grace-period` timesteps, then multiplied by
+`--reduction-factor`), only the best `1 / reduction factor` of the trials continue, up to `--timesteps`. Most trials
+are thus evaluated at a low fidelity, with few timesteps. With `--coarse-timesteps-per-hour`, the simulation is also
+coarser until the last rung: only the trials reaching it train with the IDF's (or `--timesteps-per-hour`) timestep,
+see `FidelityScheduleCallbacks`.
+
+Trials are packed on the local cores: a short calibration (see `rleplus.train.autotune`) measures the env step and
+policy costs, and the number of rollout workers per trial maximizing the total throughput of concurrent trials is
+chosen. Other CLI arguments are the ones of `rleplus.train.rllib` (env config).
+
+Example:
+
+    python3 rleplus/train/sweep.py --env AmphitheaterEnv --alg PPO --num-samples 32 --timesteps 1e6 \
+        --grace-period 2e4 --reduction-factor 3 --coarse-timesteps-per-hour 1
+"""
+import argparse
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import ray
+from ray import air, tune
+from ray.rllib.algorithms.callbacks import make_multi_callbacks
+from ray.rllib.algorithms.dqn import DQNConfig
+from ray.tune.schedulers import ASHAScheduler
+
+from rleplus.examples.registry import env_creator, register_all
+from rleplus.train.autotune import Calibration, calibrate, sample_throughput
+from rleplus.train.callbacks import FidelityScheduleCallbacks, KPICallbacks
+from rleplus.train.rllib import (
+    bundle_env_model,
+    make_arg_parser,
+    make_ppo_config,
+    process_args,
+)
+
+SWEEP_ALGORITHMS = ["PPO", "DQN"]
+
+
+def search_space(alg: str) -> Dict[str, Any]:
+    """Hyperparameters sampled by the sweep, around the settings used by `rleplus.train.rllib`."""
+    if alg == "PPO":
+        return {
+            "lr": tune.loguniform(1e-5, 1e-2),
+            "gamma": tune.choice([0.9, 0.95, 0.99]),
+            "lambda": tune.uniform(0.9, 1.0),
+            "kl_coeff": tune.uniform(0.0, 0.5),
+            "clip_param": tune.choice([0.1, 0.2, 0.3]),
+            "entropy_coeff": tune.loguniform(1e-5, 1e-2),
+            "vf_loss_coeff": tune.loguniform(1e-3, 1.0),
+            "train_batch_size": tune.choice([2000, 4000, 8000]),
+            "sgd_minibatch_size": tune.choice([64, 128, 256]),
+            "num_sgd_iter": tune.choice([5, 10, 30]),
+        }
+    elif alg == "DQN":
+        return {
+            "lr": tune.loguniform(1e-5, 1e-2),
+            "gamma": tune.choice([0.9, 0.95, 0.99]),
+            "n_step": tune.choice([1, 3, 5]),
+            "target_network_update_freq": tune.choice([500, 2000, 8000]),
+            "train_batch_size": tune.choice([32, 64, 128]),
+            "double_q": tune.choice([True, False]),
+            "dueling": tune.choice([True, False]),
+            "num_steps_sampled_before_learning_starts": tune.choice([1000, 5000]),
+        }
+    raise ValueError(f"Unsupported algorithm {alg}, must be one of {SWEEP_ALGORITHMS}")
+
+
+def make_dqn_config(args: argparse.Namespace) -> DQNConfig:
+    """DQN configuration of a sweep, the env config being the CLI args."""
+    return (
+        DQNConfig()
+        .callbacks(make_multi_callbacks([KPICallbacks, FidelityScheduleCallbacks]))
+        .environment(env=args.env, env_config=vars(args))
+        .training(gamma=0.95, lr=1e-3)
+        .framework(framework="torch")
+        .resources(num_gpus=args.num_gpus)
+        .rollouts(num_rollout_workers=args.num_workers)
+    )
+
+
+def asha_milestones(max_t: int, grace_period: int, reduction_factor: float) -> List[int]:
+    """Timesteps of the ASHA rungs, in increasing order (as computed by Ray's single bracket)."""
+    num_rungs = int(math.log(max_t / grace_period) / math.log(reduction_factor) + 1)
+    return [int(grace_period * reduction_factor**k) for k in range(num_rungs)]
+
+
+def sweep_fidelity_schedule(
+    max_t: int,
+    grace_period: int,
+    reduction_factor: float,
+    coarse_timesteps_per_hour: Optional[int],
+    timesteps_per_hour: Optional[int],
+) -> Optional[List[Tuple[int, Optional[int]]]]:
+    """Fidelity schedule of trials: coarse until the last rung before `max_t`, then `timesteps_per_hour`.
+
+    All trials compared at a rung ran at the same fidelity. None without coarse fidelity.
+    """
+    if coarse_timesteps_per_hour is None:
+        return None
+    milestones = [
+        milestone for milestone in asha_milestones(max_t, grace_period, reduction_factor) if milestone < max_t
+    ]
+    if not milestones:
+        return None
+    return [(0, coarse_timesteps_per_hour), (milestones[-1], timesteps_per_hour)]
+
+
+@dataclass
+class TrialPlan:
+    num_rollout_workers: int
+    max_concurrent_trials: int
+    # predicted trained timesteps per second, of a trial and of all concurrent trials
+    trial_throughput: float
+    total_throughput: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.max_concurrent_trials} concurrent trials with {self.num_rollout_workers} rollout workers each, "
+            f"predicted throughput: {self.trial_throughput:.0f} timesteps/s per trial, "
+            f"{self.total_throughput:.0f} timesteps/s in total"
+        )
+
+
+def plan_trials(calibration: Calibration, num_cpus: int, max_workers_per_trial: Optional[int] = None) -> TrialPlan:
+    """Picks the number of rollout workers per trial maximizing the total throughput of concurrent trials.
+
+    A trial takes one core per rollout worker plus one for its driver / learner. More workers per trial sample
+    faster, but leave fewer cores for other trials and spend relatively more time learning.
+    """
+    max_workers = max(min(max_workers_per_trial or num_cpus, num_cpus - 1), 1)
+    best: Optional[TrialPlan] = None
+    for num_workers in range(1, max_workers + 1):
+        concurrent = max(num_cpus // (num_workers + 1), 1)
+        sampled = sample_throughput(calibration, num_workers, num_envs=1)
+        trial = 1.0 / (1.0 / sampled + calibration.learn_time_per_timestep)
+        plan = TrialPlan(num_workers, concurrent, trial_throughput=trial, total_throughput=concurrent * trial)
+        # ties go to fewer workers: more trials run concurrently
+        if best is None or plan.total_throughput > best.total_throughput:
+            best = plan
+    return best
+
+
+def parse_args() -> argparse.Namespace:
+    parser = make_arg_parser()
+    parser.set_defaults(alg="PPO")
+    parser.add_argument("--num-samples", type=int, default=32, help="Number of sampled hyperparameter configurations")
+    parser.add_argument(
+        "--grace-period",
+        type=float,
+        default=2e4,
+        help="Timesteps of the first ASHA rung: trials are trained at least this long before being stopped",
+    )
+    parser.add_argument(
+        "--reduction-factor",
+        type=float,
+        default=3,
+        help="Only the best 1/reduction-factor trials of each ASHA rung continue to the next one",
+    )
+    parser.add_argument(
+        "--coarse-timesteps-per-hour",
+        type=int,
+        default=None,
+        help="E+ timesteps per hour of trials until the last ASHA rung. Default is to always train with "
+        "--timesteps-per-hour (or the IDF's own Timestep)",
+    )
+    parser.add_argument(
+        "--metric",
+        default="episode_reward_mean",
+        help="Metric comparing trials, e.g. episode_reward_mean or a KPI such as custom_metrics/pmv_abs_mean_mean",
+    )
+    parser.add_argument("--mode", choices=["min", "max"], default="max", help="Whether lower or higher is better")
+    parser.add_argument(
+        "--trial-workers",
+        type=int,
+        default=None,
+        help="Rollout workers per trial. Default is to choose them from a calibration of env and policy costs "
+        "(made with the PPO model, also for DQN)",
+    )
+    parser.add_argument(
+        "--summary",
+        default="sweep.csv",
+        help="Path of the CSV summary file, with the last result and hyperparameters of each trial",
+    )
+    built_args = parser.parse_args()
+    if built_args.alg not in SWEEP_ALGORITHMS:
+        parser.error(f"--alg must be one of {SWEEP_ALGORITHMS} for sweeps")
+    built_args.timesteps = int(float(built_args.timesteps))
+    built_args.grace_period = int(built_args.grace_period)
+    built_args.fidelity_schedule = sweep_fidelity_schedule(
+        built_args.timesteps,
+        built_args.grace_period,
+        built_args.reduction_factor,
+        built_args.coarse_timesteps_per_hour,
+        built_args.timesteps_per_hour,
+    )
+    # concurrent trials would share the checkpoints directory
+    built_args.checkpoint_dir = None
+    built_args = process_args(built_args)
+    print(f"Running with following CLI args: {built_args}")
+    return built_args
+
+
+def main():
+    args = parse_args()
+
+    ray.init()
+
+    register_all()
+
+    from rleplus.evaluation.evaluate import available_cpus
+
+    num_cpus = available_cpus()
+    args = bundle_env_model(args)
+    ppo_config = make_ppo_config(args)
+    if args.trial_workers is not None:
+        plan = TrialPlan(args.trial_workers, max(num_cpus // (args.trial_workers + 1), 1), math.nan, math.nan)
+    else:
+        env = env_creator(args.env)(vars(args))
+        try:
+            calibration = calibrate(env, ppo_config)
+        finally:
+            env.close()
+        plan = plan_trials(calibration, num_cpus)
+    print(f"Trial plan: {plan}")
+
+    config = ppo_config if args.alg == "PPO" else make_dqn_config(args)
+    config = config.rollouts(num_rollout_workers=plan.num_rollout_workers)
+
+    results = tune.Tuner(
+        args.alg,
+        tune_config=tune.TuneConfig(
+            metric=args.metric,
+            mode=args.mode,
+            num_samples=args.num_samples,
+            max_concurrent_trials=plan.max_concurrent_trials,
+            scheduler=ASHAScheduler(
+                time_attr="timesteps_total",
+                max_t=args.timesteps,
+                grace_period=args.grace_period,
+                reduction_factor=args.reduction_factor,
+            ),
+        ),
+        run_config=air.RunConfig(
+            stop={"timesteps_total": args.timesteps},
+            failure_config=air.FailureConfig(max_failures=1),
+        ),
+        param_space={**config.to_dict(), **search_space(args.alg)},
+    ).fit()
+
+    hyperparameters = list(search_space(args.alg))
+    summary = results.get_dataframe()
+    summary.to_csv(args.summary, index=False)
+    best = results.get_best_result()
+    print(f"Best trial ({args.metric}={best.metrics.get(args.metric)}):")
+    for name in hyperparameters:
+        print(f"  {name}: {best.config.get(name)}")
+    print(f"Sweep summary written to {args.summary}")
+
+    ray.shutdown()
+
+
+if __name__ == "__main__":
+    main()
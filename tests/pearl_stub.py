@@ -0,0 +1,104 @@
+"""Minimal stand-in for the parts of Pearl used by `rleplus.train.pearl_async` and `pearl_replay`.
+
+Pearl is installed from git and often missing from test environments. When it can't be imported,
+`install()` writes this stub package into a temporary directory put first on `sys.path`, which spawned
+processes inherit. Signatures and field names follow Pearl's main branch: replay buffers take
+`(capacity, p, ensemble_size)` and expose `device_for_tensors`, and transition batches are dataclasses
+with an optional `truncated` field.
+"""
+import atexit
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+
+STUB_MODULES = {
+    "pearl/__init__.py": "",
+    "pearl/pearl_agent.py": """
+class PearlAgent:
+    pass
+""",
+    "pearl/replay_buffers/__init__.py": "",
+    "pearl/replay_buffers/sequential_decision_making/__init__.py": "",
+    "pearl/replay_buffers/sequential_decision_making/bootstrap_replay_buffer.py": """
+import torch
+
+
+class BootstrapReplayBuffer:
+    def __init__(self, capacity, p, ensemble_size):
+        self.capacity = capacity
+        self._device_for_tensors = torch.device("cpu")
+
+    @property
+    def device_for_tensors(self):
+        return self._device_for_tensors
+
+    @device_for_tensors.setter
+    def device_for_tensors(self, device):
+        self._device_for_tensors = torch.device(device)
+""",
+    "pearl/replay_buffers/transition.py": """
+from dataclasses import dataclass, fields
+from typing import Optional
+
+import torch
+
+
+@dataclass(frozen=False)
+class TransitionBatch:
+    state: torch.Tensor
+    action: torch.Tensor
+    reward: torch.Tensor
+    next_state: Optional[torch.Tensor] = None
+    next_action: Optional[torch.Tensor] = None
+    curr_available_actions: Optional[torch.Tensor] = None
+    curr_unavailable_actions_mask: Optional[torch.Tensor] = None
+    next_available_actions: Optional[torch.Tensor] = None
+    next_unavailable_actions_mask: Optional[torch.Tensor] = None
+    terminated: torch.Tensor = None
+    truncated: Optional[torch.Tensor] = None
+    cost: Optional[torch.Tensor] = None
+
+    def to(self, device):
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, torch.Tensor):
+                setattr(self, field.name, value.to(device))
+        return self
+
+
+@dataclass(frozen=False)
+class TransitionWithBootstrapMaskBatch(TransitionBatch):
+    bootstrap_mask: Optional[torch.Tensor] = None
+""",
+    "pearl/utils/__init__.py": "",
+    "pearl/utils/instantiations/__init__.py": "",
+    "pearl/utils/instantiations/environments/__init__.py": "",
+    "pearl/utils/instantiations/environments/gym_environment.py": """
+class GymEnvironment:
+    def __init__(self, env_or_env_name):
+        self.env = env_or_env_name
+""",
+}
+
+
+def install() -> bool:
+    """Makes `pearl` importable, with the stub if Pearl isn't installed. Returns whether the stub is used."""
+    try:
+        importlib.import_module("pearl.replay_buffers.transition")
+        return False
+    except ImportError:
+        pass
+
+    stub_dir = tempfile.mkdtemp(prefix="pearl-stub-")
+    atexit.register(shutil.rmtree, stub_dir, ignore_errors=True)
+    for name, source in STUB_MODULES.items():
+        path = os.path.join(stub_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(source)
+    sys.path.insert(0, stub_dir)
+    for name in [name for name in sys.modules if name == "pearl" or name.startswith("pearl.")]:
+        del sys.modules[name]
+    return True
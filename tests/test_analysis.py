@@ -0,0 +1,139 @@
+import pickle as pkl
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from rleplus.analysis.aggregates import (
+    _segment_stats,
+    episode_energy,
+    episode_stats,
+    histogram,
+)
+from rleplus.analysis.store import (
+    HistoryStore,
+    convert_history,
+    convert_training_results,
+    flatten_result,
+)
+
+
+def append_episodes(path: Path, episodes):
+    with open(path, "ab") as f:
+        for episode in episodes:
+            pkl.dump(episode, f)
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.episodes = [
+            {
+                "reward": rng.normal(size=n).tolist(),
+                "pmv": np.where(rng.random(n) < 0.2, np.nan, rng.normal(size=n)).tolist(),
+                "elec": rng.random(n).tolist(),
+            }
+            for n in [5, 1, 7, 3]
+        ]
+
+    def test_convert_history(self):
+        with TemporaryDirectory() as tmp:
+            source, path = Path(tmp) / "history.pkl", Path(tmp) / "store"
+            append_episodes(source, self.episodes[:2])
+            store = convert_history(source, path)
+            self.assertEqual(2, store.num_episodes)
+            self.assertEqual(6, store.num_rows)
+
+            # only appended episodes are read when converting again, columns appearing later are backfilled
+            append_episodes(source, self.episodes[2:] + [{"reward": [1.0, 2.0], "dh": [3.0]}])
+            store = convert_history(source, path, commit_every=1)
+            self.assertEqual(5, store.num_episodes)
+            np.testing.assert_array_equal([5, 1, 7, 3, 2], store.episode_lengths)
+            for i, episode in enumerate(self.episodes):
+                for name, values in episode.items():
+                    np.testing.assert_array_equal(values, store.episode(i)[name])
+                self.assertTrue(np.isnan(store.episode(i)["dh"]).all())
+            last = store.episode(4)
+            np.testing.assert_array_equal([3.0, np.nan], last["dh"])
+            self.assertTrue(np.isnan(last["pmv"]).all())
+
+            # re-opening and rebuilding give the same store
+            self.assertEqual(store.num_rows, HistoryStore(path).num_rows)
+            rebuilt = convert_history(source, path, rebuild=True)
+            np.testing.assert_array_equal(store.column("reward"), rebuilt.column("reward"))
+
+    def test_aggregates(self):
+        with TemporaryDirectory() as tmp:
+            source = Path(tmp) / "history.pkl"
+            append_episodes(source, self.episodes)
+            store = convert_history(source, Path(tmp) / "store")
+
+            for chunk_episodes in [1, 3, 1024]:
+                stats = episode_stats(store, "pmv", absolute=True, chunk_episodes=chunk_episodes)
+                for i, episode in enumerate(self.episodes):
+                    pmv = np.abs(np.array(episode["pmv"]))
+                    self.assertAlmostEqual(np.nansum(pmv), stats["sum"][i])
+                    self.assertEqual(np.sum(~np.isnan(pmv)), stats["count"][i])
+                    if np.isnan(pmv).all():
+                        self.assertTrue(np.isnan(stats["mean"][i]))
+                    else:
+                        self.assertAlmostEqual(np.nanmean(pmv), stats["mean"][i])
+                        self.assertAlmostEqual(np.nanmax(pmv), stats["max"][i])
+
+            energy = episode_energy(store, ["elec"], chunk_episodes=2)
+            np.testing.assert_allclose([np.sum(episode["elec"]) for episode in self.episodes], energy)
+
+            bins = np.linspace(-3, 3, 7)
+            distribution = histogram(store, "pmv", bins, chunk_episodes=2)
+            pmv = np.concatenate([episode["pmv"] for episode in self.episodes])
+            np.testing.assert_array_equal(np.histogram(pmv[~np.isnan(pmv)], bins)[0], distribution["counts"])
+            self.assertEqual(np.isnan(pmv).sum(), distribution["nan"])
+
+    def test_empty_episodes(self):
+        # an empty trailing episode doesn't truncate the previous one
+        stats = _segment_stats(np.array([1.0, 2.0, 3.0, 4.0]), np.array([0, 2, 4, 4]))
+        np.testing.assert_array_equal([3.0, 7.0, 0.0], stats["sum"])
+        np.testing.assert_array_equal([2, 2, 0], stats["count"])
+        np.testing.assert_array_equal([1.0, 3.0, np.nan], stats["min"])
+        np.testing.assert_array_equal([2.0, 4.0, np.nan], stats["max"])
+        np.testing.assert_array_equal([1.5, 3.5, np.nan], stats["mean"])
+
+        stats = _segment_stats(np.array([1.0, 2.0]), np.array([0, 0, 2, 2]))
+        np.testing.assert_array_equal([0.0, 3.0, 0.0], stats["sum"])
+        np.testing.assert_array_equal([np.nan, 2.0, np.nan], stats["max"])
+
+        with TemporaryDirectory() as tmp:
+            source = Path(tmp) / "history.pkl"
+            empty = {"reward": [], "pmv": [], "elec": []}
+            episodes = [self.episodes[0], empty, self.episodes[2], empty]
+            append_episodes(source, episodes)
+            store = convert_history(source, Path(tmp) / "store")
+
+            for chunk_episodes in [1, 2, 1024]:
+                energy = episode_energy(store, ["elec"], chunk_episodes=chunk_episodes)
+                np.testing.assert_allclose([np.sum(episode["elec"]) for episode in episodes], energy)
+                stats = episode_stats(store, "elec", chunk_episodes=chunk_episodes)
+                np.testing.assert_allclose(
+                    [np.max(self.episodes[0]["elec"]), np.max(self.episodes[2]["elec"])], stats["max"][[0, 2]]
+                )
+                self.assertTrue(np.isnan(stats["max"][[1, 3]]).all())
+
+    def test_convert_training_results(self):
+        results = [
+            {
+                "episode_reward_mean": float(i),
+                "info": {"learner": {"default_policy": {"total_loss": 1.0 / (i + 1)}}},
+                "config": {"lr": 0.1},
+                "trial_id": "abc",
+            }
+            for i in range(4)
+        ]
+        with TemporaryDirectory() as tmp:
+            source = Path(tmp) / "training-results.pkl"
+            append_episodes(source, [results[:3], results[3]])
+            store = convert_training_results(source, Path(tmp) / "store")
+            self.assertEqual(4, store.num_episodes)
+            self.assertEqual(["episode_reward_mean", "info/learner/default_policy/total_loss"], store.columns)
+            np.testing.assert_array_equal([0, 1, 2, 3], store.column("episode_reward_mean"))
+            self.assertNotIn("config/lr", flatten_result(results[0]))
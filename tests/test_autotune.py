@@ -0,0 +1,46 @@
+import unittest
+
+from rleplus.train.autotune import Calibration, plan_rollouts, sample_throughput
+
+
+def make_calibration(**kwargs) -> Calibration:
+    costs = dict(
+        step_time=1e-3,
+        reset_time=0.5,
+        episode_length=96,
+        inference_fixed=1e-3,
+        inference_per_obs=1e-5,
+        learn_time_per_timestep=1e-4,
+    )
+    costs.update(kwargs)
+    return Calibration(**costs)
+
+
+class TestAutotune(unittest.TestCase):
+    def test_sample_throughput(self):
+        calibration = make_calibration()
+        # one env: step + amortized reset + inference of a single observation
+        expected = 1.0 / (1e-3 + 0.5 / 96 + 1e-3 + 1e-5)
+        self.assertAlmostEqual(expected, sample_throughput(calibration, num_workers=1, num_envs=1))
+        self.assertAlmostEqual(4 * expected, sample_throughput(calibration, num_workers=4, num_envs=1))
+
+    def test_plan_rollouts(self):
+        plan = plan_rollouts(make_calibration(), num_cpus=8, min_train_batch_size=4000)
+        self.assertEqual(7, plan.num_rollout_workers)
+        self.assertGreaterEqual(plan.train_batch_size, 4000)
+        self.assertEqual(
+            plan.train_batch_size, plan.rollout_fragment_length * plan.num_rollout_workers * plan.num_envs_per_worker
+        )
+        self.assertLess(plan.predicted_throughput, plan.sample_throughput)
+
+        # inference overhead is amortized over more envs per worker when it dominates env steps
+        expensive_inference = plan_rollouts(make_calibration(inference_fixed=1e-2), num_cpus=8)
+        self.assertGreater(expensive_inference.num_envs_per_worker, plan.num_envs_per_worker)
+        cheap_inference = plan_rollouts(make_calibration(inference_fixed=0.0), num_cpus=8)
+        self.assertEqual(1, cheap_inference.num_envs_per_worker)
+
+        self.assertEqual(1, plan_rollouts(make_calibration(), num_cpus=1).num_rollout_workers)
+
+
+if __name__ == "__main__":
+    unittest.main()
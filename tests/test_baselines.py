@@ -0,0 +1,85 @@
+import unittest
+from types import SimpleNamespace
+
+import gymnasium as gym
+import numpy as np
+
+from rleplus.evaluation.baselines import (
+    FixedSetpoint,
+    PMVTracking,
+    SetbackSchedule,
+    SetpointActions,
+    make_baseline,
+    parse_baseline,
+)
+from rleplus.evaluation.benchmark import kpi_table
+
+
+class SetpointEnv:
+    """The part of EnergyPlusEnv used by baselines: a discrete action rescaled to a 15-30°C setpoint."""
+
+    def __init__(self, action_space: gym.Space = gym.spaces.Discrete(31)):
+        self.action_space = action_space
+        self.timestep = 0
+        self.episode_start_timestep = 0
+        self.runner_config = SimpleNamespace(eplus_timestep_duration=0.25)
+        self.last_obs = {"iat": 18.0}
+
+    def post_process_action(self, action):
+        if isinstance(self.action_space, gym.spaces.Discrete):
+            return 15.0 + 0.5 * int(action)
+        return float(action[0])
+
+    def get_comfort_inputs(self, obs):
+        return obs["iat"], obs["iat"] - 1.0, 50.0
+
+    def get_comfort_params(self):
+        return {"vr": 0.1, "met": 1.2, "clo": 1.0, "standard": "ISO"}
+
+
+class TestBaselines(unittest.TestCase):
+    def test_parse_baseline(self):
+        self.assertEqual(("pmv", {}), parse_baseline("pmv"))
+        self.assertEqual(("fixed", {"setpoint": 22.5}), parse_baseline("baseline:fixed(setpoint=22.5)"))
+        with self.assertRaises(ValueError):
+            parse_baseline("missing")
+
+    def test_setpoint_actions(self):
+        actions = SetpointActions(SetpointEnv())
+        self.assertEqual(12, actions.action(21.1))
+        self.assertEqual(0, actions.action(10.0))
+
+        box = SetpointActions(SetpointEnv(gym.spaces.Box(low=0.0, high=40.0, shape=(1,))), num_candidates=81)
+        np.testing.assert_array_equal([21.0], box.action(21.1))
+
+    def test_baselines(self):
+        env = SetpointEnv()
+        self.assertEqual(14, FixedSetpoint(env, setpoint=22.0).compute_action(np.zeros(1)))
+
+        setback = SetbackSchedule(env, occupied=21.0, setback=16.0)
+        self.assertEqual(2, setback.compute_action(np.zeros(1)))
+        # 10:00
+        env.timestep = 40
+        self.assertEqual(12, setback.compute_action(np.zeros(1)))
+
+        # the chosen setpoint has the lowest predicted |PMV| of all candidates
+        pmv = PMVTracking(env)
+        setpoint = pmv.compute_setpoint(env.last_obs)
+        self.assertTrue(15.0 < setpoint < 30.0)
+        self.assertEqual(setpoint, PMVTracking(env).compute_setpoint({"iat": 25.0}))
+
+        random_actions = [make_baseline("random", env, seed=0).compute_action(np.zeros(1)) for _ in range(2)]
+        self.assertEqual(random_actions[0], random_actions[1])
+
+    def test_kpi_table(self):
+        results = [
+            {"checkpoint": "baseline:fixed", "reward_total": 1.0, "pmv_abs_mean": 0.5, "pmv_std": 0.1},
+            {"checkpoint": "baseline:fixed", "reward_total": 3.0, "pmv_abs_mean": 0.7, "pmv_std": 0.1},
+            {"checkpoint": "baseline:pmv", "reward_total": 0.0, "pmv_abs_mean": 0.2, "pmv_std": 0.1},
+        ]
+        for result in results:
+            result.update(complaint_rate=np.nan, energy=np.nan, wall_time=1.0)
+        table = kpi_table(results)
+        self.assertEqual(["baseline:pmv", "baseline:fixed"], [row["controller"] for row in table])
+        self.assertEqual((2, 2.0, 0.6), (table[1]["evaluations"], table[1]["reward_total"], table[1]["pmv_abs_mean"]))
+        self.assertTrue(np.isnan(table[1]["energy"]))
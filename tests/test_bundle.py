@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import ray
+from ray.cluster_utils import Cluster
+
+from rleplus.env.bundle import make_bundle, materialize_bundle, worker_output_dir
+
+
+@ray.remote(num_cpus=0)
+def materialize_on_node(bundle, cache_dir):
+    # the cache of each simulated node is a sub-directory named after the node
+    files = materialize_bundle(bundle, os.path.join(cache_dir, ray.get_runtime_context().get_node_id()))
+    return ray.get_runtime_context().get_node_id(), {role: Path(path).read_text() for role, path in files.items()}
+
+
+class TestBundle(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # local simulation of a 2-node cluster, each node with its own resource to pin tasks to it
+        cls.cluster = Cluster(initialize_head=True, head_node_args={"num_cpus": 1, "resources": {"node0": 1}})
+        cls.cluster.add_node(num_cpus=1, resources={"node1": 1})
+        ray.init(address=cls.cluster.address)
+        cls.cluster.wait_for_nodes()
+
+    @classmethod
+    def tearDownClass(cls):
+        ray.shutdown()
+        cls.cluster.shutdown()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.model_dir = Path(self.tmp_dir.name) / "model"
+        self.model_dir.mkdir()
+        (self.model_dir / "model.idf").write_text("Timestep,4;")
+        (self.model_dir / "weather.epw").write_text("LOCATION,Groningen")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_digest(self):
+        bundle = make_bundle({"idf": self.model_dir / "model.idf", "epw": self.model_dir / "weather.epw"})
+        same = make_bundle({"epw": self.model_dir / "weather.epw", "idf": str(self.model_dir / "model.idf")})
+        self.assertEqual(bundle.digest, same.digest)
+
+        (self.model_dir / "model.idf").write_text("Timestep,1;")
+        changed = make_bundle({"idf": self.model_dir / "model.idf", "epw": self.model_dir / "weather.epw"})
+        self.assertNotEqual(bundle.digest, changed.digest)
+
+        other_dir = Path(self.tmp_dir.name) / "other"
+        other_dir.mkdir()
+        (other_dir / "weather.epw").write_text("LOCATION,Amsterdam")
+        with self.assertRaises(ValueError):
+            make_bundle({"epw": self.model_dir / "weather.epw", "weather_pool": [other_dir / "weather.epw"]})
+
+    def test_materialize(self):
+        bundle = make_bundle({"idf": self.model_dir / "model.idf", "weather_pool": [self.model_dir / "weather.epw"]})
+        cache_dir = Path(self.tmp_dir.name) / "cache"
+        files = materialize_bundle(bundle, cache_dir)
+        self.assertEqual(str(cache_dir / bundle.digest / "model.idf"), files["idf"])
+        self.assertEqual([str(cache_dir / bundle.digest / "weather.epw")], files["weather_pool"])
+        self.assertEqual("Timestep,4;", Path(files["idf"]).read_text())
+
+        # already materialized: files aren't written again
+        mtime = os.path.getmtime(files["idf"])
+        self.assertEqual(files, materialize_bundle(bundle, cache_dir))
+        self.assertEqual(mtime, os.path.getmtime(files["idf"]))
+        self.assertEqual([bundle.digest], os.listdir(cache_dir))
+
+    def test_multi_node(self):
+        bundle = make_bundle({"idf": self.model_dir / "model.idf", "epw": self.model_dir / "weather.epw"})
+        cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        results = ray.get(
+            [materialize_on_node.options(resources={f"node{i % 2}": 0.01}).remote(bundle, cache_dir) for i in range(6)]
+        )
+
+        node_ids = {node_id for node_id, _ in results}
+        self.assertEqual(2, len(node_ids))
+        for _, contents in results:
+            self.assertEqual({"idf": "Timestep,4;", "epw": "LOCATION,Groningen"}, contents)
+        # one materialization per node
+        for node_id in node_ids:
+            self.assertEqual([bundle.digest], os.listdir(os.path.join(cache_dir, node_id)))
+
+    def test_worker_output_dir(self):
+        directory = worker_output_dir(os.path.join(self.tmp_dir.name, "output"), vector_index=1)
+        self.assertTrue(os.path.isdir(directory))
+        self.assertTrue(directory.endswith(f"-{os.getpid()}-1"))
+        self.assertNotEqual(directory, worker_output_dir(os.path.join(self.tmp_dir.name, "output"), vector_index=0))
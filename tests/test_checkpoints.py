@@ -0,0 +1,121 @@
+import gc
+import json
+import os
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from rleplus.train.callbacks import CheckpointCallbacks
+from rleplus.train.checkpoints import (
+    INDEX_FILE,
+    CheckpointManager,
+    config_hash,
+    read_index,
+    select_checkpoints,
+)
+
+
+def write_checkpoint(value):
+    def write(path):
+        with open(os.path.join(path, "state.json"), "w") as f:
+            json.dump({"value": value}, f)
+
+    return write
+
+
+class StubAlgorithm:
+    """The parts of an RLlib algorithm used by `CheckpointCallbacks`."""
+
+    def __init__(self, checkpoints):
+        self.config = SimpleNamespace(env_config={"checkpoints": checkpoints}, serialize=lambda: {"lr": 0.1})
+
+    def save_checkpoint(self, path):
+        write_checkpoint(0)(path)
+
+
+class TestCheckpointManager(unittest.TestCase):
+    def test_retention(self):
+        rewards = [1.0, 5.0, 2.0, 4.0, 0.0, 3.0]
+        with TemporaryDirectory() as tmp:
+            directory, staging = os.path.join(tmp, "checkpoints"), os.path.join(tmp, "staging")
+            manager = CheckpointManager(
+                directory, metric="reward", mode="max", keep_best=2, keep_last=1, staging_dir=staging
+            )
+            for i, reward in enumerate(rewards):
+                path = manager.save(
+                    write_checkpoint(i),
+                    iteration=i + 1,
+                    timesteps=(i + 1) * 100,
+                    metrics={"reward": reward},
+                    config={"lr": 0.1},
+                )
+                self.assertEqual(os.path.join(directory, f"checkpoint_{i + 1:06d}"), path)
+            manager.close()
+
+            # best 2 by reward (iterations 2 and 4) and the last one
+            entries = read_index(directory)
+            self.assertEqual([2, 4, 6], [entry.iteration for entry in entries])
+            self.assertEqual(
+                sorted(e.name for e in entries), sorted(p for p in os.listdir(directory) if p != INDEX_FILE)
+            )
+            with open(Path(entries[0].path) / "state.json") as f:
+                self.assertEqual({"value": 1}, json.load(f))
+            self.assertEqual(config_hash({"lr": 0.1}), entries[0].config_hash)
+            self.assertEqual(400, entries[1].timesteps)
+            self.assertEqual(2, manager.best().iteration)
+            self.assertFalse(os.path.exists(staging))
+
+            self.assertEqual([6, 4], [e.iteration for e in select_checkpoints(entries, "reward", mode="min", top=2)])
+            self.assertEqual([], select_checkpoints(entries, "missing"))
+
+            # the index is resumed
+            manager = CheckpointManager(directory, metric="reward", keep_best=2, keep_last=1)
+            manager.save(write_checkpoint(7), iteration=7, timesteps=700, metrics={"reward": 10.0})
+            manager.close()
+            self.assertEqual([2, 7], [entry.iteration for entry in read_index(directory)])
+
+    def test_background_errors(self):
+        with TemporaryDirectory() as directory:
+            manager = CheckpointManager(directory, keep_last=1, max_pending=1)
+            persisting = threading.Event()
+            original_persist = manager._persist
+
+            def failing_persist(entry, staged):
+                persisting.set()
+                raise OSError("disk full")
+
+            manager._persist = failing_persist
+            manager.save(write_checkpoint(0), iteration=1, timesteps=1)
+            persisting.wait()
+            # errors are raised back in the training loop
+            with self.assertRaises(OSError):
+                manager.save(write_checkpoint(1), iteration=2, timesteps=2)
+            manager._persist = original_persist
+            manager.close()
+
+    def test_callbacks_close_manager(self):
+        with TemporaryDirectory() as tmp:
+            directory, staging = os.path.join(tmp, "checkpoints"), os.path.join(tmp, "staging")
+            checkpoints = {"directory": directory, "frequency": 2, "stop_timesteps": 300, "staging_dir": staging}
+            algorithm, callbacks = StubAlgorithm(checkpoints), CheckpointCallbacks()
+            for iteration in range(1, 4):
+                result = {"training_iteration": iteration, "timesteps_total": iteration * 100}
+                callbacks.on_train_result(algorithm=algorithm, result=result)
+
+            # the last iteration is checkpointed, persisted and the staging directory removed
+            self.assertIsNone(callbacks.manager)
+            self.assertFalse(os.path.exists(staging))
+            self.assertTrue(os.path.exists(os.path.join(result["checkpoint_path"], "state.json")))
+            self.assertEqual([2, 3], [entry.iteration for entry in read_index(directory)])
+
+            # without stop timesteps, the manager is closed with the algorithm
+            checkpoints = {"directory": directory, "frequency": 1, "staging_dir": staging}
+            algorithm, callbacks = StubAlgorithm(checkpoints), CheckpointCallbacks()
+            callbacks.on_train_result(algorithm=algorithm, result={"training_iteration": 4, "timesteps_total": 400})
+            self.assertTrue(os.path.exists(staging))
+            del algorithm
+            gc.collect()
+            self.assertFalse(os.path.exists(staging))
+            self.assertEqual(4, read_index(directory)[-1].iteration)
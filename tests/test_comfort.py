@@ -0,0 +1,87 @@
+import math
+import unittest
+import warnings
+
+import numpy as np
+from pythermalcomfort.models import pmv_ppd
+from pythermalcomfort.utilities import clo_dynamic, v_relative
+
+from model.comfort import pmv_ppd_vectorized
+from model.human import Human
+
+
+class TestComfort(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.tdb = rng.uniform(10.0, 40.0, 200)
+        self.tr = rng.uniform(10.0, 40.0, 200)
+        self.rh = rng.uniform(10.0, 90.0, 200)
+
+    def assert_same_pmv(self, expected, actual):
+        np.testing.assert_array_equal(np.isnan(expected), np.isnan(actual))
+        np.testing.assert_array_equal(expected[~np.isnan(expected)], actual[~np.isnan(actual)])
+
+    def test_pmv_ppd_vectorized(self):
+        for standard in ["ISO", "ASHRAE"]:
+            # still air, then elevated air speed (ASHRAE cooling effect)
+            for vr in [0.05, 0.22, 0.8]:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    expected = [
+                        pmv_ppd(a, b, vr, c, 1.4, 0.974, standard=standard)
+                        for a, b, c in zip(self.tdb, self.tr, self.rh)
+                    ]
+                results = pmv_ppd_vectorized(self.tdb, self.tr, vr, self.rh, 1.4, 0.974, standard=standard)
+                self.assert_same_pmv(np.array([r["pmv"] for r in expected]), results["pmv"])
+                self.assert_same_pmv(np.array([r["ppd"] for r in expected]), results["ppd"])
+
+    def test_pmv_ppd_vectorized_broadcast(self):
+        results = pmv_ppd_vectorized(self.tdb[:, None], 25.0, 0.1, 50.0, np.array([1.0, 1.2, 1.4]), 0.5)
+        self.assertEqual((200, 3), results["pmv"].shape)
+        with self.assertRaises(ValueError):
+            pmv_ppd_vectorized(25.0, 25.0, 0.1, 50.0, 1.2, 0.5, standard="EN")
+
+    def test_human_sweeps(self):
+        human = Human()
+        pmvs = human.temp2pmv()
+        # a few sweep points, against the scalar reference model
+        vr = v_relative(v=0.1, met=human.met)
+        clo = clo_dynamic(clo=human.icl, met=human.met)
+        for tdb, pmv in list(zip(pmvs["tdb"], pmvs["pmv"]))[::10]:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                expected = pmv_ppd(tdb=tdb, tr=25, vr=vr, rh=50, met=human.met, clo=clo, standard="ASHRAE")["pmv"]
+            self.assert_same_pmv(np.array([expected]), np.array([pmv]))
+
+        probabilities = human.temp2prob()
+        self.assertTrue(np.all((probabilities["probability"] >= 0.0) & (probabilities["probability"] <= 1.0)))
+        # ASHRAE 55 does not bound PMV, so the whole default sweep is defined
+        self.assertFalse(np.isnan(probabilities["pmv"]).any())
+
+        # against the scalar complaint probability formulas
+        for prob_func in ["exp", "sigmoid"]:
+            human.prob_func = prob_func
+            probabilities = human.pmv2prob()
+            for pmv, probability in list(zip(probabilities["pmv"], probabilities["probability"]))[::6]:
+                pmv = float(pmv)
+                if prob_func == "exp":
+                    expected = math.exp(human.exp_a * pmv - human.exp_b) + math.exp(-human.exp_c * pmv - human.exp_d)
+                else:
+                    rising_side = 1 / (1 + math.exp(-human.k1 * (pmv - human.T1)))
+                    falling_side = 1 / (1 + math.exp(-human.k2 * (pmv - human.T2)))
+                    expected = rising_side + falling_side
+                self.assertAlmostEqual(max(0.0, min(1.0, human.normalizer * expected)), probability)
+        self.assertEqual(1.0, human.calcprobability(float("nan")))
+
+    def test_human_scalar_pmv(self):
+        human = Human()
+        # scalar inputs (the per-step reward path) take the scalar model, and agree with array inputs
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            pmvs = [human.calcpmv(float(a), float(b), 0.1, float(c)) for a, b, c in zip(self.tdb, self.tr, self.rh)]
+        self.assertTrue(all(np.ndim(pmv) == 0 for pmv in pmvs))
+        self.assert_same_pmv(human.calcpmv(self.tdb, self.tr, 0.1, self.rh), np.array(pmvs))
+
+
+if __name__ == "__main__":
+    unittest.main()
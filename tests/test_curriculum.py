@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from rleplus.env.curriculum import StartDateCurriculum
+
+
+class TestStartDateCurriculum(unittest.TestCase):
+    def test_curriculum_probabilities(self):
+        curriculum = StartDateCurriculum(num_days=4, num_weather_files=2, temperature=1.0, staleness_coef=0.0)
+        probs = curriculum.probabilities()
+        self.assertEqual((2, 4), probs.shape)
+        np.testing.assert_allclose(np.full((2, 4), 1 / 8), probs)
+
+        # scored pairs are ranked, unscored ones keep the top priority
+        curriculum.update(day=1, weather_file=0, score=-10.0)
+        curriculum.update(day=2, weather_file=1, score=5.0)
+        probs = curriculum.probabilities()
+        self.assertAlmostEqual(1.0, probs.sum())
+        self.assertAlmostEqual(probs[0, 0], probs[1, 2])
+        self.assertAlmostEqual(probs[1, 2] / 2, probs[0, 1])
+
+        # scores are moving averages
+        curriculum.update(day=2, weather_file=1, score=-25.0)
+        self.assertEqual(-10.0, curriculum.scores[1, 2])
+        # nan scores (e.g. no valid PMV) are ignored
+        curriculum.update(day=3, weather_file=1, score=float("nan"))
+        self.assertFalse(curriculum.visited[1, 3])
+
+    def test_curriculum_sampling(self):
+        rng = np.random.default_rng(0)
+        curriculum = StartDateCurriculum(num_days=10, temperature=0.3, staleness_coef=0.1)
+        # the policy does badly on day 7 only
+        days = []
+        for _ in range(300):
+            day, weather_file = curriculum.sample(rng)
+            self.assertEqual(0, weather_file)
+            curriculum.update(day, weather_file, score=1.0 if day == 7 else 0.0)
+            days.append(day)
+
+        # all days are explored first, then day 7 is prioritized
+        self.assertEqual(set(range(10)), set(days[:30]))
+        counts = np.bincount(days[30:], minlength=10)
+        self.assertEqual(7, counts.argmax())
+        self.assertGreater(counts[7], len(days[30:]) / 2)
+        # staleness keeps other days sampled
+        self.assertTrue((counts > 0).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import gymnasium as gym
+import numpy as np
+import torch
+
+from rleplus.deploy.export import GreedyPolicy, save_artifact
+from rleplus.deploy.inference import ExportedPolicy
+
+
+class TestDeploy(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.obs = np.random.uniform(0.0, 30.0, size=(16, 9)).astype(np.float32)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _export(self, actor, action_space, **kwargs):
+        greedy_policy = GreedyPolicy(actor, action_space, normalize_actions=True, clip_actions=False, **kwargs)
+        metadata = {"observation_shape": [9], "action_space": {"type": "discrete" if greedy_policy.discrete else "box"}}
+        path = save_artifact(greedy_policy, metadata, str(Path(self.tmp_dir.name) / "policy.pt"))
+        return greedy_policy, ExportedPolicy(path)
+
+    def test_box_policy_export(self):
+        action_space = gym.spaces.Box(low=0, high=40, shape=(1,), dtype=np.float32)
+        greedy_policy, exported = self._export(torch.nn.Linear(9, 2), action_space)
+
+        actions = exported.compute_actions(self.obs)
+        self.assertEqual((16, 1), actions.shape)
+        self.assertTrue(np.all((actions >= 0.0) & (actions <= 40.0)))
+        with torch.no_grad():
+            expected = greedy_policy(torch.from_numpy(self.obs)).numpy()
+        np.testing.assert_allclose(expected, actions, rtol=1e-5)
+
+        # unsquashed mean of the gaussian
+        with torch.no_grad():
+            mean = greedy_policy.actor(torch.from_numpy(self.obs))[:, :1].clamp(-1, 1).numpy()
+        np.testing.assert_allclose((mean + 1.0) * 20.0, actions, rtol=1e-5)
+
+    def test_discrete_policy_export(self):
+        actor = torch.nn.Linear(9, 100)
+        obs_filter = (np.full(9, 10.0), np.full(9, 5.0), 10.0)
+        _, exported = self._export(actor, gym.spaces.Discrete(100), obs_filter=obs_filter)
+
+        with torch.no_grad():
+            expected = actor((torch.from_numpy(self.obs) - 10.0) / 5.0).argmax(dim=-1).numpy()
+        np.testing.assert_array_equal(expected, exported.compute_actions(self.obs))
+        self.assertIsInstance(exported.compute_action(self.obs[0]), int)
+
+    def test_policy_keeps_process_threads(self):
+        num_threads = torch.get_num_threads()
+        try:
+            # loading a policy leaves the embedding process's torch threads alone
+            torch.set_num_threads(2)
+            self._export(torch.nn.Linear(9, 2), gym.spaces.Box(low=0, high=40, shape=(1,)))
+            self.assertEqual(2, torch.get_num_threads())
+
+            ExportedPolicy(str(Path(self.tmp_dir.name) / "policy.pt"), num_threads=1)
+            self.assertEqual(1, torch.get_num_threads())
+        finally:
+            torch.set_num_threads(num_threads)
@@ -1,9 +1,14 @@
 import unittest
+from datetime import date, timedelta
 from pathlib import Path
 from unittest.mock import patch
 
-from rleplus.env.energyplus import RunnerConfig
+import numpy as np
+
+from rleplus.env.energyplus import EnergyPlusAPI, RunnerConfig
+from rleplus.env.utils import read_idf_run_period
 from rleplus.examples.amphitheater.env import AmphitheaterEnv
+from rleplus.examples.bbright.env import BBrightEnv
 
 
 class TestEnv(unittest.TestCase):
@@ -22,12 +27,297 @@ class TestEnv(unittest.TestCase):
 
         env.close()
 
+    def test_env_seeding(self):
+        from ray.rllib.env import EnvContext
+
+        def make_env(seed, worker_index=0):
+            return AmphitheaterEnv(EnvContext({"output": "/tmp/tests_output", "seed": seed}, worker_index=worker_index))
+
+        env1, env2, env3 = make_env(42), make_env(42), make_env(42, worker_index=1)
+        self.assertEqual(env1.default_action, env2.default_action)
+        np.testing.assert_array_equal(env1.uniform_draws(3), env2.uniform_draws(3))
+        self.assertFalse(np.array_equal(env1.uniform_draws(3), env3.uniform_draws(3)))
+
+        # draws come from episode-sized blocks
+        self.assertEqual(3 * env1.episode_length, len(env1.uniforms))
+
+        # reseeding restarts the random stream
+        env1.seed_rng(7)
+        env2.seed_rng(7)
+        np.testing.assert_array_equal(env1.uniform_draws(1), env2.uniform_draws(1))
+
+    def test_env_deferred_comfort_metrics(self):
+        from pythermalcomfort.models import pmv
+
+        env = BBrightEnv({"output": "/tmp/tests_output"})
+        conditions = [(21.0, 20.5, 45.0), (25.0, 26.0, 60.0), (40.0, 40.0, 50.0)]
+        env.comfort_inputs.extend(conditions)
+        self.assertEqual(0, env.kpis.pmv_count + env.kpis.pmv_invalid)
+
+        # reading history evaluates pending inputs, once
+        expected = [pmv(tdb=tdb, tr=tr, vr=0.1, rh=rh, met=1.1, clo=1.4) for tdb, tr, rh in conditions]
+        np.testing.assert_array_equal(expected, env.pmv_history)
+        np.testing.assert_array_equal(expected, env.pmv_history)
+        self.assertEqual(2, env.kpis.pmv_count)
+        self.assertEqual(1, env.kpis.pmv_invalid)
+
+        with self.assertRaises(ValueError):
+            BBrightEnv({"output": "/tmp/tests_output", "comfort_metrics": "never"})
+
+    def test_env_pipeline(self):
+        histories = []
+        for pipeline in [False, True]:
+            env = AmphitheaterEnv({"output": "/tmp/tests_output", "pipeline": pipeline, "seed": 0})
+            env.reset()
+            for _ in range(3):
+                env.step(50)
+            # in pipeline mode, last step is recorded during the next one, or when history is read
+            self.assertEqual(2 if pipeline else 3, env.kpis.steps)
+            histories.append((list(env.pmv_history), list(env.reward_history)))
+            self.assertEqual(3, env.kpis.steps)
+            env.close()
+
+        np.testing.assert_array_equal(histories[0], histories[1])
+
+    def test_env_runner_reuse(self):
+        env = AmphitheaterEnv({"output": "/tmp/tests_output"})
+        env.reset()
+        runner, state = env.energyplus_runner, env.energyplus_runner.energyplus_state
+        env.step(0)
+
+        # E+ API instance and state are kept across episodes
+        obs, _ = env.reset()
+        self.assertEqual((7,), obs.shape)
+        self.assertIs(runner, env.energyplus_runner)
+        self.assertIs(state, env.energyplus_runner.energyplus_state)
+        self.assertEqual(1, env.energyplus_runner.episode)
+        obs, _, done, _, _ = env.step(0)
+        self.assertFalse(done)
+
+        env.close()
+        self.assertIsNone(runner.energyplus_state)
+
+    def test_env_fidelity(self):
+        env = AmphitheaterEnv({"output": "/tmp/tests_output", "timesteps_per_hour": 1})
+        self.assertEqual(1.0, env.runner_config.eplus_timestep_duration)
+        self.assertEqual(24, env.episode_length)
+        env.reset()
+        runner = env.energyplus_runner
+
+        # switching to the IDF's own fidelity takes effect on next episode, with a new runner
+        env.set_fidelity(None)
+        self.assertEqual(24, env.episode_length)
+        env.reset()
+        self.assertEqual(0.25, env.energyplus_runner.zone_timestep_duration)
+        self.assertEqual(96, env.episode_length)
+        self.assertIsNot(runner, env.energyplus_runner)
+        env.close()
+
+    def test_env_start_date_curriculum(self):
+        env = AmphitheaterEnv(
+            {"output": "/tmp/tests_output", "seed": 0, "start_date_curriculum": {"metric": "discomfort"}}
+        )
+        self.assertEqual(366, env.curriculum.num_days)
+        env.reset()
+        runner = env.energyplus_runner
+        day, weather_file = env.curriculum_choice
+        self.assertEqual(0, weather_file)
+        start = date(2020, 1, 1) + timedelta(days=day)
+        self.assertEqual((start, start), read_idf_run_period(runner.runner_config.idf))
+
+        done = False
+        while not done:
+            _, _, done, _, _ = env.step(0)
+        self.assertTrue(env.curriculum.visited[0, day])
+        self.assertIsNone(env.curriculum_choice)
+
+        # the runner is kept across start days
+        env.reset()
+        self.assertIs(runner, env.energyplus_runner)
+        env.close()
+
+    def test_env_weather_pool(self):
+        weather_dir = Path(__file__).parent.parent / "rleplus" / "examples" / "bbright"
+        env = BBrightEnv({"output": "/tmp/tests_output", "weather_pool": str(weather_dir)})
+        weather_files = set()
+        for _ in range(4):
+            env.reset()
+            weather_files.add(env.energyplus_runner.runner_config.epw)
+            env.step(env.action_space.sample())
+        self.assertEqual({str(f) for f in weather_dir.glob("*.epw")}, weather_files)
+        env.close()
+
+        # an explicit weather file takes precedence
+        epw = env.runner_config.epw
+        env = BBrightEnv({"output": "/tmp/tests_output", "weather_pool": str(weather_dir), "epw": epw})
+        self.assertIsNone(env.weather_pool)
+
+    def test_env_generic_callbacks(self):
+        for specialize in [True, False]:
+            env = AmphitheaterEnv({"output": "/tmp/tests_output", "specialize_callbacks": specialize})
+            env.reset()
+            env.step(0)
+            runner = env.energyplus_runner
+            # disabled from the first episode on
+            self.assertEqual(specialize, runner.collect_obs_callback != runner._collect_obs)
+            env.close()
+
+    def test_env_complaint_rate(self):
+        from rleplus.evaluation.evaluate import EvalTask, _init_worker, evaluate_task
+
+        # AmphitheaterEnv always draws complaints, BBrightEnv only with the "human" reward
+        self.assertTrue(AmphitheaterEnv({"output": "/tmp/tests_output"}).uses_complaints())
+        self.assertFalse(BBrightEnv({"output": "/tmp/tests_output"}).uses_complaints())
+        self.assertTrue(BBrightEnv({"output": "/tmp/tests_output"}, reward_type="human").uses_complaints())
+
+        _init_worker("AmphitheaterEnv", {"output": "/tmp/tests_output"})
+        result = evaluate_task(EvalTask(checkpoint="baseline:fixed", epw=None, seed=0))
+        self.assertGreaterEqual(result["complaint_rate"], 0.0)
+
+    def test_env_frame_stack(self):
+        env = BBrightEnv({"output": "/tmp/tests_output", "frame_stack": {"num_frames": 4, "actions": True}})
+        self.assertEqual((4 * 10,), env.observation_space.shape)
+
+        obs, _ = env.reset()
+        self.assertEqual(env.observation_space.shape, obs.shape)
+        first = np.array(list(env.last_obs.values()), dtype=np.float32)
+        np.testing.assert_array_equal(np.tile(np.append(first, 0.0), 4), obs)
+
+        obs, _, _, _, _ = env.step(np.array([21.0], dtype=np.float32))
+        frames = obs.reshape(4, 10)
+        np.testing.assert_array_equal(np.array(list(env.last_obs.values()), dtype=np.float32), frames[-1, :9])
+        self.assertEqual(21.0, frames[-1, 9])
+        np.testing.assert_array_equal(first, frames[-2, :9])
+        env.close()
+
+    def test_env_model_bundle(self):
+        import ray
+
+        from rleplus.env.bundle import make_bundle
+
+        weather_dir = Path(__file__).parent.parent / "rleplus" / "examples" / "bbright"
+        ray.init(num_cpus=1, include_dashboard=False)
+        try:
+            env = BBrightEnv({"output": "/tmp/tests_output", "weather_pool": str(weather_dir)})
+            bundle = make_bundle(env.get_model_files())
+            env.close()
+
+            env_config = {"output": "/tmp/tests_output", "weather_pool": str(weather_dir), "model_bundle": bundle}
+            env = BBrightEnv(env_config)
+        finally:
+            ray.shutdown()
+        bundle_dir = Path(env.bundle_files["idf"]).parent
+        self.assertEqual(Path(env.get_idf_file()).read_bytes(), Path(env.runner_config.idf).read_bytes())
+        self.assertEqual(bundle_dir, Path(env.runner_config.idf).parent)
+        self.assertEqual(bundle_dir, Path(env.runner_config.epw).parent)
+        self.assertEqual({str(bundle_dir / f.name) for f in weather_dir.glob("*.epw")}, set(env.weather_pool.files))
+        # outputs of the worker, the shared config is left untouched
+        self.assertTrue(env.runner_config.output.startswith("/tmp/tests_output/"))
+        self.assertEqual("/tmp/tests_output", env_config["output"])
+        env.reset()
+        env.step(env.action_space.sample())
+        env.close()
+
     def test_demo_env_serializable(self):
         import ray
 
         serializable, _ = ray.util.inspect_serializability(AmphitheaterEnv({"output": "/tmp/tests_output"}))
         self.assertTrue(serializable)
 
+    def test_env_fault_tolerance(self):
+        env = AmphitheaterEnv({"output": "/tmp/tests_output", "fault_tolerance": {"max_retries": 2, "backoff": 0.0}})
+        env.reset()
+        env.step(50)
+
+        # E+ fails during the episode: the episode is truncated, its output kept
+        output_dir = Path(env.energyplus_runner.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        (output_dir / "eplusout.err").write_text("   **  Fatal  ** Solver failed to converge\n")
+        env.energyplus_runner.sim_results["exit_code"] = 1
+        _, reward, terminated, truncated, info = env.step(50)
+        self.assertEqual((0.0, False, True), (reward, terminated, truncated))
+        self.assertEqual("fatal_error", info["failure"]["kind"])
+        self.assertEqual(1, info["kpis"]["episode_failed"])
+        self.assertIsNone(env.energyplus_runner)
+        self.assertTrue(Path(f"{output_dir}-failed/eplusout.err").exists())
+
+        # the next episode fails to start once, then is restarted on a fresh runner
+        runtime_cls = type(EnergyPlusAPI().runtime)
+        run_energyplus = runtime_cls.run_energyplus
+        calls = []
+
+        def flaky_run_energyplus(runtime, state, args):
+            calls.append(args)
+            return 1 if len(calls) == 1 else run_energyplus(runtime, state, args)
+
+        with patch.object(runtime_cls, "run_energyplus", flaky_run_energyplus):
+            env.reset()
+        self.assertEqual(2, len(calls))
+        self.assertEqual(2, env.num_failures)
+        done = False
+        while not done:
+            _, _, done, truncated, info = env.step(50)
+        self.assertFalse(truncated)
+        self.assertEqual((0, 1), (info["kpis"]["episode_failed"], info["kpis"]["start_failures"]))
+        self.assertEqual(0, env.consecutive_failures)
+
+        # out of retries
+        with patch.object(runtime_cls, "run_energyplus", lambda runtime, state, args: 1):
+            with self.assertRaises(RuntimeError):
+                env.reset()
+        self.assertEqual(3, env.consecutive_failures)
+        env.close()
+
+        # without fault tolerance, failures raise
+        env = AmphitheaterEnv({"output": "/tmp/tests_output"})
+        env.reset()
+        env.energyplus_runner.sim_results["exit_code"] = 1
+        with self.assertRaises(RuntimeError):
+            env.step(50)
+        env.close()
+
+    def test_env_memory_metrics(self):
+        env = AmphitheaterEnv({"output": "/tmp/tests_output", "memory_metrics": {"collect": True}})
+        env.reset()
+        done, info = False, {}
+        while not done:
+            _, _, done, _, info = env.step(50)
+        env.close()
+
+        memory = info["memory"]
+        self.assertEqual((1, 1, 0), (memory["live_runners"], memory["live_states"], memory["queued"]))
+        self.assertGreater(memory["rss_mb"], 0.0)
+        self.assertEqual(3 * env.episode_length, memory["history_items"])
+
+    def test_env_episode_outputs(self):
+        env = AmphitheaterEnv({"output": "/tmp/tests_output", "episode_outputs": {"cache": False}})
+        runtime_cls = type(EnergyPlusAPI().runtime)
+        run_energyplus = runtime_cls.run_energyplus
+
+        def run_energyplus_with_outputs(runtime, state, args):
+            exit_code = run_energyplus(runtime, state, args)
+            output_dir = Path(args[args.index("-d") + 1])
+            output_dir.mkdir(parents=True, exist_ok=True)
+            (output_dir / "eplusout.csv").write_text(
+                "Date/Time,TZ_AMPHITHEATER:Zone Mean Air Temperature [C](TimeStep),Electricity:HVAC [J](TimeStep)\n"
+                " 01/01  00:15:00,21.0,100.0\n"
+            )
+            return exit_code
+
+        with patch.object(runtime_cls, "run_energyplus", run_energyplus_with_outputs):
+            env.reset()
+            done = False
+            while not done:
+                _, _, done, _, _ = env.step(50)
+            self.assertIsNone(env.episode_outputs)
+            env.reset()
+        outputs = env.episode_outputs
+        env.close()
+
+        self.assertEqual(set(env.get_variables()) | set(env.get_meters()), set(outputs.columns))
+        self.assertEqual([21.0], outputs["iat"].tolist())
+        self.assertEqual([100.0], outputs["elec"].tolist())
+
     def test_env_runner_config(self):
         idf = Path(__file__).parent / "model.idf"
         epw = Path(__file__).parent / "LUX_LU_Luxembourg.AP.065900_TMYx.2004-2018.epw"
@@ -47,6 +337,17 @@ class TestEnv(unittest.TestCase):
         with self.assertRaises(FileNotFoundError):
             RunnerConfig(idf=idf, epw=epw, output=output, variables=variables, meters=meters, actuators=actuators)
 
+        with self.assertRaises(ValueError):
+            RunnerConfig(
+                idf=Path(__file__).parent.parent / "rleplus" / "examples" / "amphitheater" / "model.idf",
+                epw=Path(__file__).parent.parent / "rleplus" / "examples" / "amphitheater" / epw.name,
+                output=output,
+                variables=variables,
+                meters=meters,
+                actuators=actuators,
+                eplus_timestep_duration=1.0,
+            )
+
         with self.assertRaises(ValueError) as e, patch("os.path.exists", return_value=True):
             RunnerConfig(idf=idf, epw=epw, output=output, variables={}, meters={}, actuators=actuators)
             self.assertEqual("No variables/meters provided", str(e.exception))
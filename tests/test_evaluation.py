@@ -0,0 +1,38 @@
+import unittest
+from pathlib import Path
+
+from rleplus.evaluation.evaluate import EvalTask, expand_checkpoints, make_tasks
+
+RESULTS_DIR = Path(__file__).parent.parent / "results"
+
+
+class TestEvaluation(unittest.TestCase):
+    def test_make_tasks_grid(self):
+        tasks = make_tasks(checkpoints=["a", "b"], epws=["x.epw", None], seeds=[0, 1, 2])
+        self.assertEqual(12, len(tasks))
+        self.assertEqual(EvalTask(checkpoint="a", epw="x.epw", seed=0), tasks[0])
+        # tasks are grouped by checkpoint
+        self.assertEqual(["a"] * 6 + ["b"] * 6, [t.checkpoint for t in tasks])
+
+    def test_expand_checkpoints(self):
+        checkpoints = expand_checkpoints([str(RESULTS_DIR / "*" / "checkpoints")])
+        self.assertEqual(2, len(checkpoints))
+        self.assertEqual(sorted(checkpoints), checkpoints)
+
+        with self.assertRaises(FileNotFoundError):
+            expand_checkpoints([str(RESULTS_DIR / "missing-*")])
+
+    def test_expand_indexed_checkpoints(self):
+        from tempfile import TemporaryDirectory
+
+        from rleplus.train.checkpoints import CheckpointManager
+
+        with TemporaryDirectory() as directory:
+            manager = CheckpointManager(directory, metric="pmv_abs_mean_mean", mode="min", keep_best=3, keep_last=1)
+            for i, pmv in enumerate([0.8, 0.3, 0.5]):
+                manager.save(lambda path: None, iteration=i + 1, timesteps=i + 1, metrics={"pmv_abs_mean_mean": pmv})
+            manager.close()
+
+            self.assertEqual(3, len(expand_checkpoints([directory])))
+            best = expand_checkpoints([directory], metric="pmv_abs_mean_mean", mode="min", top=1)
+            self.assertEqual([str(Path(directory).absolute() / "checkpoint_000002")], best)
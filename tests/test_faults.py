@@ -0,0 +1,45 @@
+import errno
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from rleplus.env.faults import (
+    DISK_FULL,
+    EXIT_CODE,
+    FATAL_ERROR,
+    IO_ERROR,
+    NO_OUTPUT,
+    RetryPolicy,
+    classify_failure,
+    keep_failed_output,
+)
+
+
+class TestFaults(unittest.TestCase):
+    def test_classify_failure(self):
+        with TemporaryDirectory() as tmp:
+            output_dir = os.path.join(tmp, "episode-00000003-00001")
+            os.makedirs(output_dir)
+            self.assertEqual(EXIT_CODE, classify_failure(3, 1, output_dir).kind)
+            self.assertEqual(NO_OUTPUT, classify_failure(3, 0, output_dir).kind)
+            self.assertEqual(DISK_FULL, classify_failure(3, None, None, OSError(errno.ENOSPC, "No space")).kind)
+            self.assertEqual(IO_ERROR, classify_failure(3, None, None, OSError(errno.EACCES, "Denied")).kind)
+
+            with open(os.path.join(output_dir, "eplusout.err"), "w") as f:
+                f.write("   ** Warning ** Some warning\n")
+                f.write("   ** Severe  ** Node connection error\n")
+                f.write("   **  Fatal  ** Program terminated\n")
+            failure = classify_failure(3, 1, output_dir)
+            self.assertEqual(FATAL_ERROR, failure.kind)
+            self.assertEqual(2, len(failure.message.splitlines()))
+
+            keep_failed_output(failure)
+            self.assertEqual(f"{output_dir}-failed", failure.output_dir)
+            self.assertTrue(os.path.exists(os.path.join(failure.output_dir, "eplusout.err")))
+
+    def test_retry_policy(self):
+        policy = RetryPolicy(max_retries=2, backoff=0.5, max_backoff=1.5, max_failures=3)
+        self.assertEqual([0.5, 1.0, 1.5], [policy.delay(n) for n in [1, 2, 3]])
+        self.assertTrue(policy.allows(consecutive_failures=2, total_failures=2))
+        self.assertFalse(policy.allows(consecutive_failures=3, total_failures=3))
+        self.assertFalse(policy.allows(consecutive_failures=1, total_failures=4))
@@ -0,0 +1,49 @@
+import unittest
+
+import gymnasium as gym
+import numpy as np
+
+from rleplus.env.frame_stack import FrameStack, stacked_space
+
+
+class TestFrameStack(unittest.TestCase):
+    def test_frame_stack(self):
+        stack = FrameStack(num_frames=3, observation_size=2, action_size=1)
+        stack.reset(np.array([0.0, 0.5]))
+        np.testing.assert_array_equal([0, 0.5, 0] * 3, stack.stacked())
+
+        for t in range(1, 6):
+            stack.push(np.array([t, t + 0.5]), action=10 * t)
+            frames = stack.stacked().reshape(3, 3)
+            # oldest first, the first observation repeated until enough steps
+            expected = [max(t - 2, 0), max(t - 1, 0), t]
+            np.testing.assert_array_equal(expected, frames[:, 0])
+            np.testing.assert_array_equal([10 * i if i > 0 else 0 for i in expected], frames[:, 2])
+
+    def test_frame_stack_views(self):
+        stack = FrameStack(num_frames=4, observation_size=3)
+        stack.reset(np.zeros(3))
+        for t in range(1, 7):
+            stack.push(np.full(3, t))
+            view = stack.stacked(copy=False)
+            # a view of the ring buffer
+            self.assertTrue(np.shares_memory(view, stack.buffer))
+            self.assertFalse(view.flags.writeable)
+            np.testing.assert_array_equal(np.repeat(np.arange(t - 3, t + 1).clip(0), 3), view)
+            self.assertFalse(np.shares_memory(stack.stacked(), stack.buffer))
+
+    def test_stacked_space(self):
+        observation_space = gym.spaces.Box(low=np.array([-40.0, 0.0]), high=np.array([40.0, 100.0]), dtype=np.float32)
+        space = stacked_space(observation_space, 2)
+        self.assertEqual((4,), space.shape)
+        np.testing.assert_array_equal([-40, 0, -40, 0], space.low)
+
+        space = stacked_space(observation_space, 2, gym.spaces.Discrete(100))
+        np.testing.assert_array_equal([-40, 0, 0, -40, 0, 0], space.low)
+        np.testing.assert_array_equal([40, 100, 99, 40, 100, 99], space.high)
+        self.assertEqual(np.float32, space.dtype)
+
+        space = stacked_space(observation_space, 3, gym.spaces.Box(low=0, high=40, shape=(1,), dtype=np.float32))
+        self.assertEqual((9,), space.shape)
+        with self.assertRaises(ValueError):
+            stacked_space(observation_space, 2, gym.spaces.MultiBinary(2))
@@ -0,0 +1,47 @@
+import math
+import unittest
+
+import numpy as np
+
+from rleplus.env.kpi import EpisodeKPIs, P2Quantile
+
+
+class TestKPI(unittest.TestCase):
+    def test_p2_quantile(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(0.0, 1.0, size=20_000)
+        for p in [0.05, 0.5, 0.95]:
+            quantile = P2Quantile(p)
+            for v in values:
+                quantile.update(v)
+            self.assertAlmostEqual(np.quantile(values, p), quantile.value(), delta=0.05)
+
+    def test_p2_quantile_few_values(self):
+        quantile = P2Quantile(0.5)
+        self.assertTrue(math.isnan(quantile.value()))
+        for v in [3.0, 1.0, 2.0]:
+            quantile.update(v)
+        self.assertEqual(2.0, quantile.value())
+
+    def test_episode_kpis(self):
+        kpis = EpisodeKPIs(meters=["elec", "dh"], timestep_hours=0.25)
+        for step, (pmv, setpoint) in enumerate([(0.1, 20.0), (-0.7, 20.0), (float("nan"), 21.0), (0.9, 22.0)]):
+            kpis.update({"elec": 1.0, "dh": float(step)}, reward=-1.0, complaints=step % 2)
+            kpis.update_pmv(pmv)
+            kpis.update_setpoint(setpoint)
+
+        results = kpis.as_dict()
+        self.assertEqual(4, results["steps"])
+        self.assertEqual(-4.0, results["reward_total"])
+        self.assertEqual(10.0, results["energy_total"])
+        self.assertEqual(4.0, results["energy_total_elec"])
+        self.assertEqual(4.0, results["energy_peak"])
+        self.assertAlmostEqual(0.1, results["pmv_mean"])
+        self.assertAlmostEqual(1.7 / 3, results["pmv_abs_mean"])
+        self.assertEqual(1, results["pmv_invalid"])
+        self.assertEqual(0.75, results["discomfort_hours"])
+        self.assertEqual(2, results["complaints"])
+        self.assertEqual(2, results["setpoint_changes"])
+
+        kpis.reset()
+        self.assertEqual(0, kpis.as_dict()["steps"])
@@ -0,0 +1,37 @@
+import os
+import tracemalloc
+import unittest
+from tempfile import TemporaryDirectory
+
+from rleplus.env.memory import MemoryTracker, dir_size_mb, module_name
+
+
+class TestMemory(unittest.TestCase):
+    def test_module_name(self):
+        import rleplus.env.kpi
+
+        self.assertEqual("rleplus.env.kpi", module_name(rleplus.env.kpi.__file__))
+        self.assertIsNone(module_name(os.__file__))
+
+    def test_memory_tracker(self):
+        with TemporaryDirectory() as output:
+            with open(os.path.join(output, "eplusout.csv"), "wb") as f:
+                f.write(b"0" * 1024**2)
+            self.assertAlmostEqual(1.0, dir_size_mb(output))
+
+            tracing = tracemalloc.is_tracing()
+            tracker = MemoryTracker(every=2, tracemalloc_top=2, output_dir=output)
+            try:
+                self.assertEqual([True, False, True], [tracker.due(episode) for episode in range(3)])
+                metrics = tracker.report(live_runners=1)
+            finally:
+                if not tracing:
+                    tracemalloc.stop()
+
+            self.assertEqual(1.0, metrics["live_runners"])
+            self.assertAlmostEqual(1.0, metrics["output_mb"])
+            self.assertGreater(metrics["rss_mb"], 0.0)
+            self.assertGreaterEqual(metrics["threads"], 1.0)
+            traced = [name for name in metrics if name.startswith("traced_") and name != "traced_mb"]
+            self.assertIn("traced_other_mb", traced)
+            self.assertLessEqual(len(traced), 3)
@@ -0,0 +1,129 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from rleplus.env.outputs import (
+    EpisodeOutputs,
+    output_columns,
+    read_csv_outputs,
+    read_episode_outputs,
+    read_eso_outputs,
+)
+
+COLUMNS = output_columns(
+    variables={
+        "oat": ("Site Outdoor Air DryBulb Temperature", "Environment"),
+        "iat": ("Zone Mean Air Temperature", "TZ_Amphitheater"),
+    },
+    meters={"elec": "Electricity:HVAC"},
+)
+
+# a design day of 2 timesteps, then a run period of 3 timesteps, with an hourly variable not selected
+CSV = """Date/Time,Environment:Site Outdoor Air Drybulb Temperature [C](TimeStep),\
+TZ_AMPHITHEATER:Zone Mean Air Temperature [C](TimeStep),TZ_AMPHITHEATER:Zone Air CO2 Concentration [ppm](Hourly),\
+Electricity:HVAC [J](TimeStep)
+ 01/21  00:30:00,-5.0,20.0,,100.0
+ 01/21  01:00:00,-6.0,20.5,400.0,110.0
+ 01/01  23:30:00,1.0,21.0,,200.0
+ 01/01  24:00:00,2.0,21.5,410.0,210.0
+ 01/02  00:30:00,3.0,22.0,,220.0
+"""
+
+ESO = """Program Version,EnergyPlus, Version 23.2.0
+1,5,Environment Title[],Latitude[deg],Longitude[deg],Time Zone[],Elevation[m]
+2,8,Day of Simulation[],Month[],Day of Month[],DST Indicator[1=yes 0=no],Hour[],StartMinute[],EndMinute[],DayType
+7,1,Environment,Site Outdoor Air Drybulb Temperature [C] !TimeStep
+8,1,TZ_AMPHITHEATER,Zone Mean Air Temperature [C] !TimeStep
+9,1,TZ_AMPHITHEATER,Zone Air CO2 Concentration [ppm] !Hourly
+13,1,Electricity:HVAC [J] !TimeStep
+End of Data Dictionary
+1,WINTER DESIGN DAY, 49.62,   6.20,   1.00, 379.00
+2,1, 1,21, 0, 1, 0.00,30.00,WinterDesignDay
+7,-5.0
+8,20.0
+13,100.0
+2,1, 1,21, 0, 1,30.00,60.00,WinterDesignDay
+7,-6.0
+8,20.5
+13,110.0
+2,1, 1,21, 0, 1, 0.00,60.00,WinterDesignDay
+9,400.0
+1,RUN PERIOD 1, 49.62,   6.20,   1.00, 379.00
+2,1, 1, 1, 0,24, 0.00,30.00,Monday
+7,1.0
+8,21.0
+13,200.0
+2,1, 1, 1, 0,24,30.00,60.00,Monday
+7,2.0
+8,21.5
+13,210.0
+2,1, 1, 1, 0,24, 0.00,60.00,Monday
+9,410.0
+2,2, 1, 2, 0, 1, 0.00,30.00,Tuesday
+7,3.0
+8,22.0
+13,220.0
+End of Data
+"""
+
+
+class TestOutputs(unittest.TestCase):
+    def check_outputs(self, outputs: EpisodeOutputs):
+        self.assertEqual(5, len(outputs))
+        self.assertEqual(2, outputs.num_environments)
+        np.testing.assert_array_equal([0, 0, 1, 1, 1], outputs.environments)
+        np.testing.assert_array_equal([-5.0, -6.0, 1.0, 2.0, 3.0], outputs["oat"])
+        np.testing.assert_array_equal([20.0, 20.5, 21.0, 21.5, 22.0], outputs["iat"])
+        np.testing.assert_array_equal([100.0, 110.0, 200.0, 210.0, 220.0], outputs["elec"])
+
+        run_period = outputs.environment()
+        np.testing.assert_array_equal([1.0, 2.0, 3.0], run_period["oat"])
+        np.testing.assert_array_equal(
+            np.array(["2001-01-01T23:30", "2001-01-02T00:00", "2001-01-02T00:30"], dtype="datetime64[m]"),
+            run_period.timestamps(),
+        )
+
+    def test_read_csv_outputs(self):
+        with TemporaryDirectory() as output:
+            csv_file = Path(output) / "eplusout.csv"
+            csv_file.write_text(CSV)
+            self.check_outputs(read_csv_outputs(csv_file, COLUMNS))
+
+            # hourly outputs, and labels missing from the file
+            outputs = read_csv_outputs(
+                csv_file, {"co2": "TZ_Amphitheater:Zone Air CO2 Concentration", **COLUMNS}, "Hourly"
+            )
+            np.testing.assert_array_equal([400.0, 410.0], outputs["co2"])
+            self.assertTrue(np.isnan(outputs["oat"]).all())
+
+    def test_read_eso_outputs(self):
+        with TemporaryDirectory() as output:
+            eso_file = Path(output) / "eplusout.eso"
+            eso_file.write_text(ESO)
+            outputs = read_eso_outputs(eso_file, COLUMNS, dtype=np.float32)
+            self.assertEqual(np.float32, outputs["oat"].dtype)
+            self.check_outputs(outputs)
+
+    def test_read_episode_outputs(self):
+        with TemporaryDirectory() as output:
+            episode_dir = Path(output) / "episode-00000001"
+            self.assertIsNone(read_episode_outputs(episode_dir, COLUMNS))
+            episode_dir.mkdir()
+            (episode_dir / "eplusout.eso").write_text(ESO)
+            self.check_outputs(read_episode_outputs(episode_dir, COLUMNS))
+            cache_file = Path(f"{episode_dir}.npz")
+            self.assertTrue(cache_file.exists())
+
+            # read from the cache, unless the output file changed or columns are missing
+            cached, _ = EpisodeOutputs.load(cache_file)
+            cached.columns["oat"][:] = 0.0
+            cached.save(cache_file, source_stamp=(os.stat(episode_dir / "eplusout.eso").st_mtime, len(ESO)))
+            self.assertEqual(0.0, read_episode_outputs(episode_dir, {"oat": COLUMNS["oat"]})["oat"].sum())
+            self.assertEqual(-5.0, read_episode_outputs(episode_dir, {**COLUMNS, "other": "OTHER"})["oat"][0])
+
+            # CSV outputs are preferred
+            (episode_dir / "eplusout.csv").write_text(CSV.replace("-5.0", "-7.0"))
+            self.assertEqual(-7.0, read_episode_outputs(episode_dir, COLUMNS, cache=False)["oat"][0])
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import torch
+
+from tests import pearl_stub
+
+pearl_stub.install()
+
+from rleplus.train.pearl_async import async_learning  # noqa: E402
+
+EPISODE_STEPS = 5
+
+
+class StubEnv:
+    """Pearl-like environment of `EPISODE_STEPS` steps, failing (or crashing) after `fail_after` steps."""
+
+    def __init__(self, env_config):
+        self.fail_after = env_config.get("fail_after")
+        self.crash = env_config.get("crash", False)
+        self.steps = 0
+        self.episode_steps = 0
+
+    def reset(self):
+        self.episode_steps = 0
+        return torch.zeros(2), None
+
+    def step(self, action):
+        self.steps += 1
+        self.episode_steps += 1
+        if self.fail_after is not None and self.steps > self.fail_after:
+            if self.crash:
+                os._exit(3)
+            raise RuntimeError("EnergyPlus failed")
+        done = self.episode_steps == EPISODE_STEPS
+        return SimpleNamespace(reward=1.0, terminated=done, truncated=False)
+
+    def close(self):
+        pass
+
+
+class StubAgent:
+    def __init__(self, replay_buffer):
+        self.replay_buffer = replay_buffer
+        self.policy_learner = torch.nn.Linear(2, 1)
+        self.learn_calls = 0
+
+    def reset(self, observation, action_space):
+        self.observation = observation
+
+    def act(self, exploit):
+        return torch.tensor([0])
+
+    def observe(self, action_result):
+        self.replay_buffer.push(
+            state=self.observation,
+            action=torch.tensor([0]),
+            reward=action_result.reward,
+            next_state=self.observation,
+            curr_available_actions=None,
+            next_available_actions=None,
+            terminated=action_result.terminated,
+        )
+
+    def learn(self):
+        self.learn_calls += 1
+
+
+class ListReplayBuffer:
+    def __init__(self):
+        self.transitions = []
+
+    def push(self, **kwargs):
+        self.transitions.append(kwargs)
+
+    def __len__(self):
+        return len(self.transitions)
+
+
+def make_stub_env(env_name, env_config):
+    return StubEnv(env_config)
+
+
+def make_stub_agent(env, replay_buffer):
+    return StubAgent(replay_buffer)
+
+
+class TestPearlAsync(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.replay_buffer = ListReplayBuffer()
+        self.agent = StubAgent(self.replay_buffer)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _learn(self, env_config=None, **kwargs):
+        return async_learning(
+            agent=self.agent,
+            replay_buffer=self.replay_buffer,
+            make_agent=make_stub_agent,
+            env_name="StubEnv",
+            env_config={"output": self.tmp_dir.name, **(env_config or {})},
+            num_actors=2,
+            ensemble_size=1,
+            make_env=make_stub_env,
+            **kwargs,
+        )
+
+    def test_async_learning(self):
+        num_threads = torch.get_num_threads()
+        info = self._learn(number_of_steps=100, steps_per_learn=10, learner_threads=1)
+
+        self.assertGreaterEqual(len(self.replay_buffer), 100)
+        self.assertTrue(all(steps == EPISODE_STEPS for steps in info["episode_steps"]))
+        self.assertGreater(len(info["return"]), 0)
+        # learning is throttled to incoming transitions
+        self.assertGreater(self.agent.learn_calls, 0)
+        self.assertLessEqual(self.agent.learn_calls, len(self.replay_buffer) / 10 + 1)
+        self.assertEqual(num_threads, torch.get_num_threads())
+
+    def test_actor_failure(self):
+        with self.assertRaisesRegex(RuntimeError, "EnergyPlus failed"):
+            self._learn({"fail_after": 3}, number_of_steps=1000)
+        self.assertLess(len(self.replay_buffer), 1000)
+
+    def test_actor_crash(self):
+        with self.assertRaisesRegex(RuntimeError, "exited with code 3"):
+            self._learn({"fail_after": 3, "crash": True}, number_of_steps=1000)
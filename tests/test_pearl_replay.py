@@ -0,0 +1,77 @@
+import unittest
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+import torch
+
+from tests import pearl_stub
+
+pearl_stub.install()
+
+from pearl.replay_buffers.transition import (  # noqa: E402
+    TransitionWithBootstrapMaskBatch,
+)
+
+from rleplus.train.pearl_replay import CompactBootstrapReplayBuffer  # noqa: E402
+
+NUM_ACTIONS = 4
+
+
+def push_transitions(replay_buffer, count: int, start: int = 0) -> None:
+    action_space = SimpleNamespace(actions_batch=torch.arange(NUM_ACTIONS).reshape(NUM_ACTIONS, 1))
+    for i in range(start, start + count):
+        # keyword arguments, as pushed by PearlAgent.observe()
+        replay_buffer.push(
+            state=torch.full((3,), float(i)),
+            action=torch.tensor([i % NUM_ACTIONS]),
+            reward=float(i),
+            next_state=torch.full((3,), float(i + 1)),
+            curr_available_actions=action_space,
+            next_available_actions=action_space,
+            terminated=i % 5 == 4,
+            truncated=False,
+            max_number_actions=NUM_ACTIONS,
+        )
+
+
+class TestPearlReplay(unittest.TestCase):
+    def assert_valid_batch(self, batch, batch_size: int):
+        self.assertIsInstance(batch, TransitionWithBootstrapMaskBatch)
+        self.assertEqual((batch_size, 3), batch.state.shape)
+        self.assertEqual(torch.float32, batch.state.dtype)
+        self.assertEqual(torch.int64, batch.action.dtype)
+        # transitions are consistent across fields
+        torch.testing.assert_close(batch.state[:, 0], batch.reward)
+        torch.testing.assert_close(batch.state + 1, batch.next_state)
+        torch.testing.assert_close(batch.action[:, 0], batch.reward.long() % NUM_ACTIONS)
+        self.assertEqual((batch_size, NUM_ACTIONS, 1), batch.curr_available_actions.shape)
+        self.assertFalse(batch.curr_unavailable_actions_mask.any())
+        self.assertEqual(torch.bool, batch.terminated.dtype)
+        self.assertEqual((batch_size, 2), batch.bootstrap_mask.shape)
+
+    def test_push_sample(self):
+        replay_buffer = CompactBootstrapReplayBuffer(capacity=16, p=0.5, ensemble_size=2, seed=0)
+        push_transitions(replay_buffer, 20)
+        self.assertEqual(16, len(replay_buffer))
+        batch = replay_buffer.sample(16)
+        self.assert_valid_batch(batch, 16)
+        # oldest transitions were overwritten
+        self.assertGreaterEqual(batch.reward.min().item(), 4.0)
+
+        with self.assertRaises(ValueError):
+            replay_buffer.sample(17)
+
+    def test_reopen(self):
+        with TemporaryDirectory() as path:
+            replay_buffer = CompactBootstrapReplayBuffer(capacity=16, p=0.5, ensemble_size=2, path=path, seed=0)
+            push_transitions(replay_buffer, 10)
+            replay_buffer.flush()
+            del replay_buffer
+
+            # a re-opened buffer is sampled before any new push (e.g. by a resumed asynchronous learner)
+            replay_buffer = CompactBootstrapReplayBuffer(capacity=16, p=0.5, ensemble_size=2, path=path, seed=1)
+            self.assertEqual(10, len(replay_buffer))
+            self.assert_valid_batch(replay_buffer.sample(8), 8)
+
+            push_transitions(replay_buffer, 2, start=10)
+            self.assertEqual(12, len(replay_buffer))
@@ -0,0 +1,59 @@
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from rleplus.train.ring_buffer import RingArrays
+
+
+class TestRingArrays(unittest.TestCase):
+    def test_ring_arrays(self):
+        ring = RingArrays(capacity=4)
+        self.assertEqual(0, len(ring))
+        for i in range(6):
+            ring.append(state=np.full(3, i, dtype=np.float32), terminated=np.uint8(i % 2))
+
+        # last 4 rows are kept, oldest ones overwritten in place
+        self.assertEqual(4, len(ring))
+        self.assertEqual(2, ring.position)
+        np.testing.assert_array_equal([4, 5, 2, 3], ring.arrays["state"][:, 0])
+        self.assertEqual(np.float32, ring.arrays["state"].dtype)
+        self.assertEqual(np.uint8, ring.arrays["terminated"].dtype)
+        self.assertEqual(4 * 3 * 4 + 4, ring.nbytes)
+
+        rows = ring.gather(np.array([0, 3, 3]))
+        np.testing.assert_array_equal([[4, 4, 4], [3, 3, 3], [3, 3, 3]], rows["state"])
+        np.testing.assert_array_equal([0, 1, 1], rows["terminated"])
+
+        samples = ring.sample(np.random.default_rng(0), 100)
+        self.assertEqual((100, 3), samples["state"].shape)
+        self.assertTrue(set(samples["state"][:, 0]) <= {2, 3, 4, 5})
+
+        with self.assertRaises(ValueError):
+            ring.append(state=np.zeros(3, dtype=np.float32))
+
+        ring.clear()
+        self.assertEqual(0, len(ring))
+
+    def test_ring_arrays_memmap(self):
+        with TemporaryDirectory() as path:
+            ring = RingArrays(capacity=8, path=path, flush_every=2)
+            for i in range(5):
+                ring.append(state=np.full(2, i, dtype=np.float32))
+            ring.flush()
+            self.assertIsInstance(ring.arrays["state"], np.memmap)
+            del ring
+
+            # re-opened ring resumes after the last flushed row
+            ring = RingArrays(capacity=8, path=path)
+            self.assertEqual(5, len(ring))
+            np.testing.assert_array_equal([0, 1, 2, 3, 4], ring.gather(np.arange(5))["state"][:, 0])
+            ring.append(state=np.full(2, 5, dtype=np.float32))
+            self.assertEqual(6, len(ring))
+
+            with self.assertRaises(ValueError):
+                RingArrays(capacity=16, path=path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from rleplus.deploy.server import InferenceServer, MicroBatcher, request_setpoint
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.batch_sizes = []
+
+        def compute_actions(obs_batch):
+            self.batch_sizes.append(len(obs_batch))
+            # failing and slow policies, on special observation values
+            if np.any(obs_batch[:, 1] == -1.0):
+                raise RuntimeError("policy failed")
+            if np.any(obs_batch[:, 1] == -2.0):
+                time.sleep(0.5)
+            # action in [-1, 1] from first observation value
+            return obs_batch[:, :1] / 100.0
+
+        self.server = InferenceServer(
+            ("127.0.0.1", 0),
+            batcher=MicroBatcher(compute_actions, max_batch_size=16, max_wait_ms=200.0),
+            post_process_action=lambda action: 20.0 + 10.0 * float(action[0]),
+            obs_keys=["air_tmp", "air_hum"],
+        )
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_concurrent_requests_are_batched(self):
+        observations = [[float(i), 50.0] for i in range(32)]
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            setpoints = list(pool.map(lambda obs: request_setpoint(self.url, obs), observations))
+
+        np.testing.assert_allclose([20.0 + 0.1 * i for i in range(32)], setpoints, rtol=1e-5)
+        self.assertEqual(32, sum(self.batch_sizes))
+        self.assertLess(len(self.batch_sizes), 32)
+        self.assertTrue(all(size <= 16 for size in self.batch_sizes))
+
+        with urllib.request.urlopen(f"{self.url}/metrics") as response:
+            metrics = json.loads(response.read())
+        self.assertEqual(32, metrics["requests"])
+        self.assertEqual(len(self.batch_sizes), metrics["batches"])
+        self.assertGreater(metrics["batch_size_mean"], 1.0)
+
+    def test_dict_observation(self):
+        self.assertAlmostEqual(22.0, request_setpoint(self.url, {"air_hum": 50.0, "air_tmp": 20.0}), places=5)
+
+        with self.assertRaises(urllib.error.HTTPError) as e:
+            request_setpoint(self.url, {"air_tmp": 20.0})
+        self.assertEqual(400, e.exception.code)
+
+    def test_malformed_observation_in_batch(self):
+        observations = [[float(i), 50.0] for i in range(7)] + [[20.0], [1.0, 2.0, 3.0], [[1.0, 2.0]]]
+
+        def request(obs):
+            try:
+                return request_setpoint(self.url, obs)
+            except urllib.error.HTTPError as e:
+                return e.code
+
+        with ThreadPoolExecutor(max_workers=len(observations)) as pool:
+            replies = list(pool.map(request, observations))
+
+        # malformed observations are rejected alone, before they reach the batcher
+        np.testing.assert_allclose([20.0 + 0.1 * i for i in range(7)], replies[:7], rtol=1e-5)
+        self.assertEqual([400, 400, 400], replies[7:])
+        self.assertEqual(7, sum(self.batch_sizes))
+
+    def test_inference_errors(self):
+        with self.assertRaises(urllib.error.HTTPError) as e:
+            request_setpoint(self.url, [20.0, -1.0])
+        self.assertEqual(500, e.exception.code)
+        self.assertIn("policy failed", json.loads(e.exception.read())["error"])
+
+        self.server.request_timeout = 0.1
+        with self.assertRaises(urllib.error.HTTPError) as e:
+            request_setpoint(self.url, [20.0, -2.0])
+        self.assertEqual(504, e.exception.code)
+        self.assertIn("timed out", json.loads(e.exception.read())["error"])
+
+        # the server keeps serving
+        self.server.request_timeout = 5.0
+        self.assertAlmostEqual(22.0, request_setpoint(self.url, [20.0, 50.0]), places=5)
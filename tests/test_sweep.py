@@ -0,0 +1,47 @@
+import unittest
+
+from ray.rllib.algorithms.dqn import DQNConfig
+from ray.rllib.algorithms.ppo import PPOConfig
+from ray.tune.schedulers.async_hyperband import _Bracket
+
+from rleplus.train.sweep import (
+    asha_milestones,
+    plan_trials,
+    search_space,
+    sweep_fidelity_schedule,
+)
+from tests.test_autotune import make_calibration
+
+
+class TestSweep(unittest.TestCase):
+    def test_asha_milestones(self):
+        milestones = asha_milestones(max_t=1_000_000, grace_period=20_000, reduction_factor=3)
+        self.assertEqual([20_000, 60_000, 180_000, 540_000], milestones)
+        # same rungs as Ray's scheduler
+        bracket = _Bracket(min_t=20_000, max_t=1_000_000, reduction_factor=3, s=0)
+        self.assertEqual(milestones, sorted(int(milestone) for milestone, _ in bracket._rungs))
+
+    def test_sweep_fidelity_schedule(self):
+        self.assertIsNone(sweep_fidelity_schedule(1_000_000, 20_000, 3, None, 4))
+        self.assertEqual([(0, 1), (540_000, 4)], sweep_fidelity_schedule(1_000_000, 20_000, 3, 1, 4))
+        self.assertEqual([(0, 1), (540_000, None)], sweep_fidelity_schedule(1_000_000, 20_000, 3, 1, None))
+
+    def test_plan_trials(self):
+        # sampling dominates: more workers per trial, fewer concurrent trials
+        plan = plan_trials(make_calibration(learn_time_per_timestep=1e-5), num_cpus=8)
+        self.assertGreater(plan.num_rollout_workers, 1)
+        self.assertLessEqual(plan.max_concurrent_trials * (plan.num_rollout_workers + 1), 8)
+        self.assertAlmostEqual(plan.max_concurrent_trials * plan.trial_throughput, plan.total_throughput)
+
+        # learning dominates: one worker per trial, as many concurrent trials as possible
+        plan = plan_trials(make_calibration(learn_time_per_timestep=1e-1), num_cpus=8)
+        self.assertEqual((1, 4), (plan.num_rollout_workers, plan.max_concurrent_trials))
+
+        plan = plan_trials(make_calibration(), num_cpus=1)
+        self.assertEqual((1, 1), (plan.num_rollout_workers, plan.max_concurrent_trials))
+
+    def test_search_space(self):
+        self.assertLessEqual(set(search_space("PPO")), set(PPOConfig().to_dict()))
+        self.assertLessEqual(set(search_space("DQN")), set(DQNConfig().to_dict()))
+        with self.assertRaises(ValueError):
+            search_space("APEX")
@@ -12,3 +12,12 @@ class TestTrain(unittest.TestCase):
         self.assertEqual(args.num_gpus, 0)
         self.assertEqual(args.alg, "PPO")
         self.assertFalse(args.use_lstm)
+
+    def test_pearl_runner_config(self):
+        from rleplus.train.pearl import parse_args
+
+        args = parse_args()
+        self.assertEqual(args.env, "AmphitheaterEnv")
+        self.assertEqual(args.num_actors, 0)
+        self.assertEqual(args.sync_every, 10)
+        self.assertEqual(args.steps_per_learn, 96)
@@ -1,8 +1,18 @@
 import sys
 import unittest
+from datetime import date
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest.mock import patch
 
-from rleplus.env.utils import solve_energyplus_install_path
+from rleplus.env.utils import (
+    DEFAULT_TIMESTEPS_PER_HOUR,
+    read_idf_run_period,
+    read_idf_timesteps_per_hour,
+    solve_energyplus_install_path,
+    write_idf_with_run_period,
+    write_idf_with_timesteps_per_hour,
+)
 
 
 class TestUtils(unittest.TestCase):
@@ -19,3 +29,50 @@ class TestUtils(unittest.TestCase):
     def test_import_energyplus_version(self):
         path = solve_energyplus_install_path()
         self.assertEqual(path, "/usr/local/EnergyPlus-23-2-0")
+
+    def test_idf_timesteps_per_hour(self):
+        examples = Path(__file__).parent.parent / "rleplus" / "examples"
+        with TemporaryDirectory() as tmp_dir:
+            for idf in [examples / "bbright" / "BBright.idf", examples / "amphitheater" / "model.idf"]:
+                self.assertEqual(4, read_idf_timesteps_per_hour(idf))
+
+                derived = write_idf_with_timesteps_per_hour(idf, 1, tmp_dir)
+                self.assertEqual(1, read_idf_timesteps_per_hour(derived))
+                # only the Timestep object differs
+                with open(idf, newline="") as f1, open(derived, newline="") as f2:
+                    diff = [(a, b) for a, b in zip(f1.read().splitlines(True), f2.read().splitlines(True)) if a != b]
+                self.assertEqual(1, len(diff))
+                self.assertEqual(diff[0][0].replace("4", "1", 1), diff[0][1])
+
+            # "Timestep" as a field value or in comments is not the Timestep object
+            idf = Path(tmp_dir) / "no_timestep.idf"
+            idf.write_text("! Timestep, 3;\nVersion,23.1;\nOutput:Variable,*,Zone Mean Air Temperature,Timestep;\n")
+            self.assertEqual(DEFAULT_TIMESTEPS_PER_HOUR, read_idf_timesteps_per_hour(idf))
+            self.assertEqual(2, read_idf_timesteps_per_hour(write_idf_with_timesteps_per_hour(idf, 2, tmp_dir)))
+
+            with self.assertRaises(ValueError):
+                write_idf_with_timesteps_per_hour(idf, 7, tmp_dir)
+
+    def test_idf_run_period(self):
+        idf = Path(__file__).parent.parent / "rleplus" / "examples" / "bbright" / "BBright.idf"
+        with TemporaryDirectory() as tmp_dir:
+            self.assertEqual((date(2006, 1, 1), date(2006, 12, 31)), read_idf_run_period(idf))
+
+            derived = write_idf_with_run_period(idf, date(2006, 3, 15), tmp_dir)
+            self.assertEqual((date(2006, 3, 15), date(2006, 3, 15)), read_idf_run_period(derived))
+            with open(idf, newline="") as f1, open(derived, newline="") as f2:
+                diff = [(a, b) for a, b in zip(f1.read().splitlines(True), f2.read().splitlines(True)) if a != b]
+            # begin/end months and days, and day of week (2006-03-15 is a Wednesday)
+            self.assertEqual(5, len(diff))
+            self.assertIn("Wednesday,", diff[-1][1])
+
+            # without begin year, day of week is shifted from the original one
+            idf = Path(tmp_dir) / "no_year.idf"
+            idf.write_text("Version,23.1;\nRunPeriod,\n  Run,\n  1,\n  1,\n  ,\n  12,\n  31,\n  ,\n  Monday,\n  No;\n")
+            derived = write_idf_with_run_period(idf, date(2001, 1, 3), tmp_dir, days=2)
+            self.assertEqual((date(2001, 1, 3), date(2001, 1, 4)), read_idf_run_period(derived))
+            self.assertIn("  Wednesday,", Path(derived).read_text())
+
+            idf.write_text("Version,23.1;\nRunPeriodControl:DaylightSavingTime,4/1,10/1;\n")
+            with self.assertRaises(ValueError):
+                read_idf_run_period(idf)
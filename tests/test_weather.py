@@ -0,0 +1,72 @@
+import pickle
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from rleplus.env.weather import (
+    Perturbation,
+    WeatherPool,
+    dew_point,
+    read_epw,
+    read_epw_stats,
+    write_epw_variant,
+)
+
+BBRIGHT = Path(__file__).parent.parent / "rleplus" / "examples" / "bbright"
+AMSTERDAM = BBRIGHT / "NLD_Amsterdam.062400_IWEC.epw"
+
+
+class TestWeather(unittest.TestCase):
+    def test_epw_stats(self):
+        stats = read_epw_stats(AMSTERDAM)
+        self.assertEqual(12, len(stats.monthly_temperature))
+        self.assertAlmostEqual(stats.mean_temperature, np.mean(stats.monthly_temperature), delta=0.2)
+        # cold winters, mild summers
+        self.assertLess(stats.monthly_temperature[0], stats.monthly_temperature[6])
+        self.assertGreater(stats.heating_degree_days, 10 * stats.cooling_degree_days)
+
+    def test_dew_point(self):
+        np.testing.assert_allclose([20.0, 9.3], dew_point(np.array([20.0, 20.0]), np.array([100.0, 50.0])), atol=0.1)
+
+    def test_epw_variant(self):
+        with TemporaryDirectory() as tmp_dir:
+            output = Path(tmp_dir) / "variant.epw"
+            stats = write_epw_variant(AMSTERDAM, Perturbation(temperature_offset=2.0, humidity_noise=5.0), output)
+            self.assertAlmostEqual(read_epw_stats(AMSTERDAM).mean_temperature + 2.0, stats.mean_temperature, delta=0.05)
+
+            (header, rows), (variant_header, variant_rows) = read_epw(AMSTERDAM), read_epw(output)
+            self.assertEqual(header[:6] + header[7:], variant_header[:6] + variant_header[7:])
+            self.assertIn("temperature_offset", variant_header[6])
+            # only dry bulb, dew point and relative humidity change
+            self.assertEqual([row[:6] + row[9:] for row in rows], [row[:6] + row[9:] for row in variant_rows])
+            self.assertNotEqual([row[8] for row in rows], [row[8] for row in variant_rows])
+
+            with self.assertRaises(ValueError):
+                write_epw_variant(AMSTERDAM, Perturbation(temperature_offset=60.0), Path(tmp_dir) / "hot.epw")
+
+    def test_weather_pool(self):
+        with TemporaryDirectory() as tmp_dir:
+            pool = WeatherPool(BBRIGHT, tmp_dir, variants_per_file=2, num_strata=2)
+            self.assertEqual(2, len(pool.files))
+
+            rng = np.random.default_rng(0)
+            self.assertIn(pool.sample(rng), pool.files)
+            pool.wait()
+            self.assertEqual(6, len(pool.files))
+            self.assertEqual(2, len(pool.strata or pool._make_strata()))
+            sampled = {pool.sample(rng) for _ in range(200)}
+            self.assertEqual(set(pool.files), sampled)
+
+            # variants are only generated once, and the pool can be shipped to another process
+            variants = sorted(Path(tmp_dir).glob("*.epw"))
+            self.assertEqual(4, len(variants))
+            pool = pickle.loads(pickle.dumps(WeatherPool(BBRIGHT, tmp_dir, variants_per_file=2)))
+            pool.wait()
+            self.assertEqual(6, len(pool.files))
+            self.assertEqual(variants, sorted(Path(tmp_dir).glob("*.epw")))
+
+
+if __name__ == "__main__":
+    unittest.main()